@@ -0,0 +1,74 @@
+"""Add composite and GIN indexes for tenant-scoped access paths
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-17 00:00:00.000000
+
+Indexes are built CONCURRENTLY outside the migration transaction so the
+upgrade can run against a live database without blocking writes. Btree
+indexes are ascending; Postgres scans them backwards for the
+`ORDER BY ... DESC` list queries.
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '004'
+down_revision: Union[str, None] = '003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    ('ix_onboarding_states_company_updated', 'onboarding_states', ['company_id', 'updated_at', 'id'], {}),
+    ('ix_onboarding_states_company_status', 'onboarding_states', ['company_id', 'status'], {}),
+    ('ix_onboarding_states_user_id', 'onboarding_states', ['user_id'], {}),
+    ('ix_repos_company_created', 'repos', ['company_id', 'created_at', 'id'], {}),
+    ('ix_repo_scans_company_updated', 'repo_scans', ['company_id', 'updated_at', 'id'], {}),
+    ('ix_repo_scans_repo_created', 'repo_scans', ['repo_id', 'created_at'], {}),
+    ('ix_events_company_created', 'events', ['company_id', 'created_at', 'id'], {}),
+    ('ix_events_company_entity', 'events', ['company_id', 'entity', 'entity_id', 'created_at'], {}),
+    ('ix_template_parts_company_updated', 'template_parts', ['company_id', 'updated_at', 'id'], {}),
+    ('ix_template_parts_company_role', 'template_parts', ['company_id', 'role_key'], {}),
+    ('ix_template_parts_tags', 'template_parts', ['tags'], {
+        'postgresql_using': 'gin',
+        'postgresql_ops': {'tags': 'jsonb_path_ops'},
+    }),
+    ('ix_onboarding_templates_company_updated', 'onboarding_templates', ['company_id', 'updated_at', 'id'], {}),
+    ('ix_onboarding_templates_company_role', 'onboarding_templates', ['company_id', 'role_key'], {}),
+    ('ix_questionnaires_template_id', 'questionnaires', ['template_id'], {}),
+    ('ix_toolsets_questionnaire_id', 'toolsets', ['questionnaire_id'], {}),
+]
+
+
+def _is_invalid(name: str) -> bool:
+    if context.is_offline_mode():
+        return False
+    return bool(op.get_bind().execute(
+        sa.text("SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"),
+        {"name": name},
+    ).scalar())
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns, kwargs in INDEXES:
+            # A previously interrupted CONCURRENTLY build leaves an INVALID
+            # index behind; drop it so IF NOT EXISTS does not skip the rebuild.
+            if _is_invalid(name):
+                op.drop_index(name, table_name=table, postgresql_concurrently=True)
+            op.create_index(
+                name, table, columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+                **kwargs,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,78 @@
+"""Add normalized onboarding_steps storage and step counters
+
+Revision ID: 005
+Revises: 004
+Create Date: 2025-10-14 00:00:00.000000
+
+Existing onboardings keep JSONB storage. Moving them to (or back from)
+onboarding_steps is a data migration: python migrate_step_storage.py.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '005'
+down_revision: Union[str, None] = '004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('onboarding_states', sa.Column('step_storage', sa.String(length=16), server_default='jsonb', nullable=False))
+    op.add_column('onboarding_states', sa.Column('total_steps', sa.Integer(), server_default=sa.text('0'), nullable=False))
+    op.add_column('onboarding_states', sa.Column('completed_steps', sa.Integer(), server_default=sa.text('0'), nullable=False))
+
+    op.create_table(
+        'onboarding_steps',
+        sa.Column('onboarding_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('step_id', sa.String(), nullable=False),
+        sa.Column('position', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.Column('validation_result', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.ForeignKeyConstraint(['onboarding_id'], ['onboarding_states.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('onboarding_id', 'step_id')
+    )
+
+    # Counters are used by both storage backends
+    op.execute("""
+        UPDATE onboarding_states o
+        SET total_steps = COALESCE(jsonb_array_length(o.steps), 0),
+            completed_steps = (
+                SELECT count(*)
+                FROM jsonb_array_elements(COALESCE(o.steps, '[]'::jsonb)) AS e(value)
+                WHERE e.value ->> 'status' = 'completed'
+            )
+    """)
+
+
+def downgrade() -> None:
+    # Fold table-backed statuses back into the JSONB documents first (for
+    # onboardings created with table storage or moved by migrate_step_storage.py)
+    op.execute("""
+        UPDATE onboarding_states o
+        SET steps = (
+            SELECT jsonb_agg(
+                CASE WHEN s.step_id IS NULL THEN e.value
+                ELSE e.value || jsonb_build_object(
+                    'status', s.status,
+                    'started_at', s.started_at,
+                    'completed_at', s.completed_at,
+                    'validation_result', s.validation_result
+                ) END
+                ORDER BY e.ord
+            )
+            FROM jsonb_array_elements(o.steps) WITH ORDINALITY AS e(value, ord)
+            LEFT JOIN onboarding_steps s
+              ON s.onboarding_id = o.id AND s.step_id = e.value ->> 'id'
+        )
+        WHERE o.step_storage = 'table' AND jsonb_array_length(o.steps) > 0
+    """)
+    op.drop_table('onboarding_steps')
+    op.drop_column('onboarding_states', 'completed_steps')
+    op.drop_column('onboarding_states', 'total_steps')
+    op.drop_column('onboarding_states', 'step_storage')
@@ -0,0 +1,91 @@
+"""Compact onboarding steps into overlays over toolset steps
+
+Revision ID: 006
+Revises: 005
+Create Date: 2025-10-14 00:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '006'
+down_revision: Union[str, None] = '005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# For each stored step with a matching toolset definition (same position and
+# id, else first with the same id), keep `id`, `status` and any key whose
+# value differs from the definition; null state fields are dropped since
+# reads fill them in. Steps without a definition are left untouched.
+COMPACT = """
+UPDATE onboarding_states o
+SET steps = compacted.steps
+FROM (
+    SELECT o2.id, jsonb_agg(
+        CASE WHEN d.value IS NULL THEN e.value ELSE (
+            SELECT COALESCE(jsonb_object_agg(kv.key, kv.value), '{}'::jsonb)
+            FROM jsonb_each(e.value) AS kv
+            WHERE kv.key IN ('id', 'status')
+               OR (
+                   NOT COALESCE(d.value -> kv.key = kv.value, false)
+                   AND NOT (
+                       kv.key IN ('started_at', 'completed_at', 'validation_result')
+                       AND kv.value = 'null'::jsonb
+                   )
+               )
+        ) END
+        ORDER BY e.ord
+    ) AS steps
+    FROM onboarding_states o2
+    JOIN toolsets t ON t.id = o2.toolset_id
+    CROSS JOIN LATERAL jsonb_array_elements(o2.steps) WITH ORDINALITY AS e(value, ord)
+    LEFT JOIN LATERAL (
+        SELECT dv.value
+        FROM jsonb_array_elements(t.resolved_steps) WITH ORDINALITY AS dv(value, ord)
+        WHERE dv.value ->> 'id' = e.value ->> 'id'
+        ORDER BY dv.ord <> e.ord, dv.ord
+        LIMIT 1
+    ) AS d ON true
+    WHERE jsonb_typeof(o2.steps) = 'array' AND jsonb_array_length(o2.steps) > 0
+    GROUP BY o2.id
+) AS compacted
+WHERE o.id = compacted.id
+"""
+
+# Inverse: lay each overlay entry over its definition again
+EXPAND = """
+UPDATE onboarding_states o
+SET steps = expanded.steps
+FROM (
+    SELECT o2.id, jsonb_agg(
+        COALESCE(d.value, '{}'::jsonb)
+        || '{"started_at": null, "completed_at": null, "validation_result": null}'::jsonb
+        || e.value
+        ORDER BY e.ord
+    ) AS steps
+    FROM onboarding_states o2
+    JOIN toolsets t ON t.id = o2.toolset_id
+    CROSS JOIN LATERAL jsonb_array_elements(o2.steps) WITH ORDINALITY AS e(value, ord)
+    LEFT JOIN LATERAL (
+        SELECT dv.value
+        FROM jsonb_array_elements(t.resolved_steps) WITH ORDINALITY AS dv(value, ord)
+        WHERE dv.value ->> 'id' = e.value ->> 'id'
+        ORDER BY dv.ord <> e.ord, dv.ord
+        LIMIT 1
+    ) AS d ON true
+    WHERE jsonb_typeof(o2.steps) = 'array' AND jsonb_array_length(o2.steps) > 0
+    GROUP BY o2.id
+) AS expanded
+WHERE o.id = expanded.id
+"""
+
+
+def upgrade() -> None:
+    op.execute(COMPACT)
+
+
+def downgrade() -> None:
+    op.execute(EXPAND)
@@ -0,0 +1,102 @@
+"""Add onboarding analytics rollup tables
+
+Revision ID: 008
+Revises: 007
+Create Date: 2025-10-15 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '008'
+down_revision: Union[str, None] = '007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _is_invalid(name: str) -> bool:
+    if context.is_offline_mode():
+        return False
+    return bool(op.get_bind().execute(
+        sa.text("SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"),
+        {"name": name},
+    ).scalar())
+
+
+def upgrade() -> None:
+    # Adds two {"key": count} objects key by key (sketch merge, see app.services.sketch)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION jsonb_sum_merge(a jsonb, b jsonb) RETURNS jsonb
+        LANGUAGE sql IMMUTABLE AS $$
+            SELECT COALESCE(jsonb_object_agg(key, total), '{}'::jsonb)
+            FROM (
+                SELECT key, sum(value::bigint) AS total
+                FROM (
+                    SELECT * FROM jsonb_each_text(COALESCE(a, '{}'::jsonb))
+                    UNION ALL
+                    SELECT * FROM jsonb_each_text(COALESCE(b, '{}'::jsonb))
+                ) AS kv
+                GROUP BY key
+            ) AS merged
+        $$
+    """)
+
+    op.create_table(
+        'onboarding_rollups',
+        sa.Column('company_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('role_key', sa.String(), nullable=False),
+        sa.Column('template_version', sa.Integer(), nullable=False),
+        sa.Column('started', sa.Integer(), nullable=False),
+        sa.Column('completed', sa.Integer(), nullable=False),
+        sa.Column('completion_seconds_sum', sa.Float(), nullable=False),
+        sa.Column('completion_sketch', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+        sa.PrimaryKeyConstraint('company_id', 'day', 'role_key', 'template_version')
+    )
+    op.create_table(
+        'onboarding_step_rollups',
+        sa.Column('company_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('role_key', sa.String(), nullable=False),
+        sa.Column('template_version', sa.Integer(), nullable=False),
+        sa.Column('step_id', sa.String(), nullable=False),
+        sa.Column('completions', sa.Integer(), nullable=False),
+        sa.Column('dwell_sketch', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+        sa.PrimaryKeyConstraint('company_id', 'day', 'role_key', 'template_version', 'step_id')
+    )
+    op.create_table(
+        'rollup_watermarks',
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('last_created_at', sa.DateTime(), nullable=False),
+        sa.Column('last_event_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+    op.execute("""
+        INSERT INTO rollup_watermarks (name, last_created_at, last_event_id)
+        VALUES ('onboarding', '1970-01-01', '00000000-0000-0000-0000-000000000000')
+    """)
+    # events is hot: build the watermark scan index without blocking writes
+    # (as in 004; this commits the statements above first)
+    with op.get_context().autocommit_block():
+        if _is_invalid('ix_events_created'):
+            op.drop_index('ix_events_created', table_name='events', postgresql_concurrently=True)
+        op.create_index(
+            'ix_events_created', 'events', ['created_at', 'id'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_events_created', table_name='events', postgresql_concurrently=True, if_exists=True)
+    op.drop_table('rollup_watermarks')
+    op.drop_table('onboarding_step_rollups')
+    op.drop_table('onboarding_rollups')
+    op.execute('DROP FUNCTION IF EXISTS jsonb_sum_merge(jsonb, jsonb)')
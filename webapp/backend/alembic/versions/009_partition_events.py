@@ -0,0 +1,116 @@
+"""Partition events by month on created_at
+
+Revision ID: 009
+Revises: 008
+Create Date: 2025-10-15 12:00:00.000000
+
+The existing table is renamed, a range-partitioned `events` is created with
+one partition per month that has rows (plus the next few and a default
+partition), the rows are copied over and the old table is dropped. The
+primary key becomes (id, created_at) since a partitioned table's unique
+constraints must include the partition key. Copying rewrites the table, so
+run this in a maintenance window on large installs.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '009'
+down_revision: Union[str, None] = '008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    ('ix_events_company_created', ['company_id', 'created_at', 'id']),
+    ('ix_events_company_entity', ['company_id', 'entity', 'entity_id', 'created_at']),
+    ('ix_events_created', ['created_at', 'id']),
+]
+
+# Creates events_pYYYYMM for the month containing `month` (no-op if present);
+# used here and by app.services.event_partitions
+ENSURE_PARTITION_FUNCTION = """
+    CREATE OR REPLACE FUNCTION ensure_events_partition(month date) RETURNS text
+    LANGUAGE plpgsql AS $$
+    DECLARE
+        start_at date := date_trunc('month', month)::date;
+        partition text := 'events_p' || to_char(start_at, 'YYYYMM');
+    BEGIN
+        IF to_regclass(partition) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF events FOR VALUES FROM (%L) TO (%L)',
+                partition, start_at, (start_at + interval '1 month')::date
+            );
+        END IF;
+        RETURN partition;
+    END
+    $$
+"""
+
+
+def _create_indexes() -> None:
+    # On the partitioned parent these cascade to every current and future partition
+    for name, columns in INDEXES:
+        op.create_index(name, 'events', columns)
+
+
+def _drop_indexes() -> None:
+    for name, _ in INDEXES:
+        op.drop_index(name, table_name='events')
+
+
+def upgrade() -> None:
+    op.execute('ALTER TABLE events RENAME TO events_unpartitioned')
+    op.execute('ALTER TABLE events_unpartitioned RENAME CONSTRAINT events_pkey TO events_unpartitioned_pkey')
+    _drop_indexes()
+
+    op.execute("""
+        CREATE TABLE events (
+            id UUID NOT NULL,
+            company_id UUID NOT NULL REFERENCES companies (id),
+            entity VARCHAR NOT NULL,
+            entity_id UUID NOT NULL,
+            action VARCHAR NOT NULL,
+            payload JSONB,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute('CREATE TABLE events_default PARTITION OF events DEFAULT')
+    op.execute(ENSURE_PARTITION_FUNCTION)
+    op.execute("""
+        SELECT ensure_events_partition(month::date)
+        FROM generate_series(
+            date_trunc('month', LEAST(
+                (SELECT min(created_at) FROM events_unpartitioned), now()::timestamp
+            )),
+            date_trunc('month', now()) + interval '3 months',
+            interval '1 month'
+        ) AS month
+    """)
+    _create_indexes()
+
+    op.execute('INSERT INTO events SELECT id, company_id, entity, entity_id, action, payload, created_at FROM events_unpartitioned')
+    op.execute('DROP TABLE events_unpartitioned')
+
+
+def downgrade() -> None:
+    op.execute('ALTER TABLE events RENAME TO events_partitioned')
+    op.execute('ALTER TABLE events_partitioned RENAME CONSTRAINT events_pkey TO events_partitioned_pkey')
+    _drop_indexes()
+    op.execute("""
+        CREATE TABLE events (
+            id UUID NOT NULL PRIMARY KEY,
+            company_id UUID NOT NULL REFERENCES companies (id),
+            entity VARCHAR NOT NULL,
+            entity_id UUID NOT NULL,
+            action VARCHAR NOT NULL,
+            payload JSONB,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL
+        )
+    """)
+    op.execute('INSERT INTO events SELECT id, company_id, entity, entity_id, action, payload, created_at FROM events_partitioned')
+    _create_indexes()
+    op.execute('DROP TABLE events_partitioned CASCADE')
+    op.execute('DROP FUNCTION IF EXISTS ensure_events_partition(date)')
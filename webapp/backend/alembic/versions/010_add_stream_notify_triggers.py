@@ -0,0 +1,89 @@
+"""Publish onboarding, scan and event changes with NOTIFY
+
+Revision ID: 010
+Revises: 009
+Create Date: 2025-10-16 00:00:00.000000
+
+Feeds the SSE stream (app.services.stream). Payloads stay small (ids and
+status fields, never event payloads) to keep well under NOTIFY's 8000 byte
+limit; clients fetch details through the regular endpoints. Statuses are
+lowercased to match the API's enum values. Only the onboarding lifecycle
+events the stream forwards fire a NOTIFY; audit events and the rest of an
+EventWriter batch do not.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '010'
+down_revision: Union[str, None] = '009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+CHANNEL = 'app_stream'  # app.services.stream.STREAM_CHANNEL
+
+# app.services.stream.STREAMED_EVENT_ACTIONS
+STREAMED_EVENT_ACTIONS = ('onboarding_created', 'step_completed', 'step_validated', 'onboarding_completed')
+
+NOTIFY_FUNCTION = f"""
+    CREATE OR REPLACE FUNCTION notify_app_stream() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    DECLARE
+        payload jsonb;
+    BEGIN
+        IF TG_TABLE_NAME = 'onboarding_states' THEN
+            IF TG_OP = 'UPDATE'
+               AND NEW.progress IS NOT DISTINCT FROM OLD.progress
+               AND NEW.status IS NOT DISTINCT FROM OLD.status THEN
+                RETURN NULL;
+            END IF;
+            payload := jsonb_build_object(
+                'type', 'onboarding', 'company_id', NEW.company_id, 'id', NEW.id,
+                'user_id', NEW.user_id, 'status', lower(NEW.status::text), 'progress', NEW.progress,
+                'version', NEW.version, 'updated_at', NEW.updated_at
+            );
+        ELSIF TG_TABLE_NAME = 'repo_scans' THEN
+            IF TG_OP = 'UPDATE' AND NEW.status IS NOT DISTINCT FROM OLD.status THEN
+                RETURN NULL;
+            END IF;
+            payload := jsonb_build_object(
+                'type', 'scan', 'company_id', NEW.company_id, 'id', NEW.id,
+                'repo_id', NEW.repo_id, 'status', lower(NEW.status::text), 'updated_at', NEW.updated_at
+            );
+        ELSE
+            payload := jsonb_build_object(
+                'type', 'event', 'company_id', NEW.company_id, 'id', NEW.id,
+                'entity', NEW.entity, 'entity_id', NEW.entity_id, 'action', NEW.action,
+                'created_at', NEW.created_at
+            );
+        END IF;
+        PERFORM pg_notify('{CHANNEL}', payload::text);
+        RETURN NULL;
+    END
+    $$
+"""
+
+STREAMED_ACTIONS_SQL = ', '.join(f"'{action}'" for action in STREAMED_EVENT_ACTIONS)
+
+TRIGGERS = [
+    ('onboarding_states_notify', 'onboarding_states', 'INSERT OR UPDATE OF progress, status', ''),
+    ('repo_scans_notify', 'repo_scans', 'INSERT OR UPDATE OF status', ''),
+    ('events_notify', 'events', 'INSERT', f'WHEN (NEW.action IN ({STREAMED_ACTIONS_SQL})) '),
+]
+
+
+def upgrade() -> None:
+    op.execute(NOTIFY_FUNCTION)
+    for name, table, events, condition in TRIGGERS:
+        op.execute(
+            f'CREATE TRIGGER {name} AFTER {events} ON {table} '
+            f'FOR EACH ROW {condition}EXECUTE FUNCTION notify_app_stream()'
+        )
+
+
+def downgrade() -> None:
+    for name, table, _, _ in TRIGGERS:
+        op.execute(f'DROP TRIGGER IF EXISTS {name} ON {table}')
+    op.execute('DROP FUNCTION IF EXISTS notify_app_stream()')
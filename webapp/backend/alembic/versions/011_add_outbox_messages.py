@@ -0,0 +1,49 @@
+"""Add transactional outbox for webhook deliveries
+
+Revision ID: 011
+Revises: 010
+Create Date: 2025-10-16 06:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '011'
+down_revision: Union[str, None] = '010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'outbox_messages',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('company_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('topic', sa.String(), nullable=False),
+        sa.Column('aggregate_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('status', sa.String(length=16), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+        sa.Column('locked_until', sa.DateTime(), nullable=True),
+        sa.Column('last_error', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('delivered_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_outbox_messages_due', 'outbox_messages', ['next_attempt_at'],
+        postgresql_where=sa.text("status = 'pending'")
+    )
+    op.create_index('ix_outbox_messages_aggregate', 'outbox_messages', ['aggregate_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_outbox_messages_aggregate', table_name='outbox_messages')
+    op.drop_index('ix_outbox_messages_due', table_name='outbox_messages')
+    op.drop_table('outbox_messages')
@@ -0,0 +1,33 @@
+"""Link template parts to the scan that produced them
+
+Revision ID: 012
+Revises: 011
+Create Date: 2025-10-16 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '012'
+down_revision: Union[str, None] = '011'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('template_parts', sa.Column('source_scan_id', postgresql.UUID(as_uuid=True), nullable=True))
+    op.create_foreign_key(
+        'template_parts_source_scan_id_fkey', 'template_parts', 'repo_scans',
+        ['source_scan_id'], ['id'], ondelete='SET NULL'
+    )
+    op.create_index('ix_template_parts_source_scan', 'template_parts', ['source_scan_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_template_parts_source_scan', table_name='template_parts')
+    op.drop_constraint('template_parts_source_scan_id_fkey', 'template_parts', type_='foreignkey')
+    op.drop_column('template_parts', 'source_scan_id')
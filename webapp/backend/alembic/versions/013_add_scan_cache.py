@@ -0,0 +1,49 @@
+"""Add content-addressed scan cache
+
+Revision ID: 013
+Revises: 012
+Create Date: 2025-10-16 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '013'
+down_revision: Union[str, None] = '012'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'scan_snapshots',
+        sa.Column('repo_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('commit_sha', sa.String(length=64), nullable=False),
+        sa.Column('fingerprint', sa.String(length=64), nullable=False),
+        sa.Column('manifests', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('summary', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['repo_id'], ['repos.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('repo_id', 'commit_sha')
+    )
+    op.create_index('ix_scan_snapshots_repo_created', 'scan_snapshots', ['repo_id', 'created_at'])
+    op.create_table(
+        'scan_manifest_cache',
+        sa.Column('repo_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('blob_sha', sa.String(length=64), nullable=False),
+        sa.Column('kind', sa.String(length=32), nullable=False),
+        sa.Column('result', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['repo_id'], ['repos.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('repo_id', 'blob_sha', 'kind')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('scan_manifest_cache')
+    op.drop_index('ix_scan_snapshots_repo_created', table_name='scan_snapshots')
+    op.drop_table('scan_snapshots')
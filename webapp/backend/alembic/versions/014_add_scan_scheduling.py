@@ -0,0 +1,75 @@
+"""Add scan scheduling columns and one-active-scan-per-repo constraint
+
+Revision ID: 014
+Revises: 013
+Create Date: 2025-10-16 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '014'
+down_revision: Union[str, None] = '013'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('repo_scans', sa.Column('attempts', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('repo_scans', sa.Column('worker_id', sa.String(), nullable=True))
+    op.add_column('repo_scans', sa.Column('started_at', sa.DateTime(), nullable=True))
+    op.add_column('repo_scans', sa.Column('heartbeat_at', sa.DateTime(), nullable=True))
+    op.add_column('repo_scans', sa.Column('lease_expires_at', sa.DateTime(), nullable=True))
+
+    # Keep only the newest queued scan per repo; the duplicates were never
+    # going to run separately from the scheduler's point of view
+    op.execute("""
+        UPDATE repo_scans s
+        SET status = 'ERROR',
+            summary = '{"error": "Superseded by a newer scan of the same repository"}'::jsonb
+        WHERE s.status IN ('QUEUED', 'RUNNING')
+          AND EXISTS (
+            SELECT 1 FROM repo_scans newer
+            WHERE newer.repo_id = s.repo_id
+              AND newer.status IN ('QUEUED', 'RUNNING')
+              AND (newer.created_at, newer.id) > (s.created_at, s.id)
+          )
+    """)
+    # Scans already handed to n8n count as running, so the scheduler does not
+    # trigger them a second time; the reaper settles any that never report back
+    op.execute("""
+        UPDATE repo_scans s
+        SET status = 'RUNNING',
+            attempts = 1,
+            started_at = s.created_at,
+            heartbeat_at = s.created_at,
+            lease_expires_at = (now() AT TIME ZONE 'utc') + interval '1 hour'
+        WHERE s.status = 'QUEUED'
+          AND EXISTS (SELECT 1 FROM outbox_messages m WHERE m.aggregate_id = s.id)
+    """)
+    op.create_index(
+        'uq_repo_scans_repo_active', 'repo_scans', ['repo_id'], unique=True,
+        postgresql_where=sa.text("status IN ('QUEUED', 'RUNNING')")
+    )
+    op.create_index(
+        'ix_repo_scans_queued', 'repo_scans', ['company_id', 'created_at'],
+        postgresql_where=sa.text("status = 'QUEUED'")
+    )
+    op.create_index(
+        'ix_repo_scans_running', 'repo_scans', ['company_id'],
+        postgresql_where=sa.text("status = 'RUNNING'")
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_repo_scans_running', table_name='repo_scans')
+    op.drop_index('ix_repo_scans_queued', table_name='repo_scans')
+    op.drop_index('uq_repo_scans_repo_active', table_name='repo_scans')
+    op.drop_column('repo_scans', 'lease_expires_at')
+    op.drop_column('repo_scans', 'heartbeat_at')
+    op.drop_column('repo_scans', 'started_at')
+    op.drop_column('repo_scans', 'worker_id')
+    op.drop_column('repo_scans', 'attempts')
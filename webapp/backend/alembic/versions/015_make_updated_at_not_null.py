@@ -0,0 +1,42 @@
+"""Make updated_at NOT NULL on keyset-paginated tables
+
+Revision ID: 015
+Revises: 014
+Create Date: 2025-10-17 10:00:00.000000
+
+List endpoints page on (updated_at, id); a NULL updated_at sorted first
+under DESC, broke the next cursor and was skipped by the tuple filter.
+Missing values are backfilled from created_at. NOT NULL is proven by a
+CHECK constraint validated outside the migration transaction, so SET NOT
+NULL skips its full scan under an exclusive lock.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '015'
+down_revision: Union[str, None] = '014'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLES = ['onboarding_states', 'onboarding_templates', 'template_parts', 'repo_scans']
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.execute(f'UPDATE {table} SET updated_at = created_at WHERE updated_at IS NULL')
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            constraint = f'{table}_updated_at_not_null'
+            op.execute(f'ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {constraint}')
+            op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {constraint} CHECK (updated_at IS NOT NULL) NOT VALID')
+            op.execute(f'ALTER TABLE {table} VALIDATE CONSTRAINT {constraint}')
+            op.execute(f'ALTER TABLE {table} ALTER COLUMN updated_at SET NOT NULL')
+            op.execute(f'ALTER TABLE {table} DROP CONSTRAINT {constraint}')
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.alter_column(table, 'updated_at', nullable=True)
@@ -1,21 +1,22 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+import httpx
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from typing import Optional
 from uuid import UUID
 from app.db.session import get_db
+from app.core.config import settings
+from app.core.http import http_clients
 from app.core.security import decode_token
 from app.models.user import User
-from app.schemas.auth import TokenData
+from app.schemas.auth import TokenData, Principal
+from app.services.principal_cache import get_user
 
 
 security = HTTPBearer()
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: AsyncSession = Depends(get_db)
-) -> User:
+def _get_token_data(credentials: HTTPAuthorizationCredentials) -> TokenData:
     token = credentials.credentials
     payload = decode_token(token)
     
@@ -37,10 +38,11 @@ async def get_current_user(
             detail="Invalid token payload"
         )
     
-    result = await db.execute(
-        select(User).where(User.id == UUID(token_data.sub))
-    )
-    user = result.scalar_one_or_none()
+    return token_data
+
+
+async def _load_user(user_id: UUID, db: AsyncSession) -> User:
+    user = await get_user(db, user_id)
     
     if not user:
         raise HTTPException(
@@ -51,10 +53,83 @@ async def get_current_user(
     return user
 
 
+def _remember_principal(request: Request, user_id: UUID, company_id: UUID) -> None:
+    # Read by the audit middleware in app.main and by read-your-writes
+    # routing in app.db.session
+    request.state.audit_actor = (user_id, company_id)
+
+
+async def get_current_user(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db)
+) -> User:
+    token_data = _get_token_data(credentials)
+    user = await _load_user(UUID(token_data.sub), db)
+    _remember_principal(request, user.id, user.company_id)
+    return user
+
+
+async def get_current_principal(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db)
+) -> Principal:
+    token_data = _get_token_data(credentials)
+    
+    if settings.AUTH_CLAIMS_ONLY and token_data.company_id and token_data.role:
+        principal = Principal(
+            user_id=UUID(token_data.sub),
+            company_id=UUID(token_data.company_id),
+            role=token_data.role
+        )
+    else:
+        user = await _load_user(UUID(token_data.sub), db)
+        principal = Principal(user_id=user.id, company_id=user.company_id, role=user.role.value)
+    
+    _remember_principal(request, principal.user_id, principal.company_id)
+    return principal
+
+
 async def require_admin(current_user: User = Depends(get_current_user)) -> User:
     if current_user.role.value != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Admin access required"
         )
-    return current_user
\ No newline at end of file
+    return current_user
+
+
+async def require_admin_principal(
+    principal: Principal = Depends(get_current_principal)
+) -> Principal:
+    if not principal.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return principal
+
+
+def etag_for(version: int) -> str:
+    return f'"{version}"'
+
+
+async def get_if_match(if_match: Optional[str] = Header(None)) -> Optional[int]:
+    """Version from an `If-Match: "<version>"` header (weak tags accepted), or None."""
+    if if_match is None or if_match.strip() == "*":
+        return None
+    tag = if_match.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    try:
+        return int(tag.strip('"'))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="If-Match must be a version ETag"
+        )
+
+
+def get_openai_client() -> httpx.AsyncClient:
+    return http_clients.get("openai")
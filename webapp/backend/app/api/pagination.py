@@ -0,0 +1,66 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence, Tuple, TypeVar
+from uuid import UUID
+
+from fastapi import HTTPException, Query, status
+from sqlalchemy import Select, tuple_
+
+from app.core.config import settings
+
+
+T = TypeVar("T")
+
+
+def encode_cursor(sort_value: datetime, row_id: UUID) -> str:
+    raw = json.dumps([sort_value.isoformat(), str(row_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    return datetime.fromisoformat(sort_value), UUID(row_id)
+
+
+class PageParams:
+    """
+    Keyset pagination query parameters shared by list endpoints.
+    Pages are ordered newest first on `(sort_column, id)`.
+    """
+
+    def __init__(
+        self,
+        cursor: Optional[str] = Query(None, description="Opaque `next_cursor` from the previous page"),
+        limit: int = Query(settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX),
+    ):
+        self.limit = limit
+        self.after: Optional[Tuple[datetime, UUID]] = None
+        if cursor:
+            try:
+                self.after = decode_cursor(cursor)
+            except (ValueError, TypeError):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid pagination cursor"
+                )
+
+
+def paginate(query: Select, sort_column: Any, id_column: Any, page: PageParams) -> Select:
+    """Apply the keyset filter, ordering and a one-row lookahead limit."""
+    if page.after is not None:
+        query = query.where(tuple_(sort_column, id_column) < tuple_(*page.after))
+    return query.order_by(sort_column.desc(), id_column.desc()).limit(page.limit + 1)
+
+
+def split_page(
+    rows: Sequence[T],
+    page: PageParams,
+    key: Callable[[T], Tuple[datetime, UUID]],
+) -> Tuple[List[T], Optional[str]]:
+    """Trim the lookahead row and build the cursor for the next page, if any."""
+    if len(rows) <= page.limit:
+        return list(rows), None
+    items = list(rows[:page.limit])
+    return items, encode_cursor(*key(items[-1]))
@@ -7,8 +7,9 @@ from app.models.repo import Repo
 from app.schemas.auth import LoginRequest, LoginResponse, UserInfo
 from app.schemas.common import success_response, error_response
 from app.schemas.user import UserResponse, UserUpdate
-from app.core.security import verify_password, create_access_token
+from app.core.security import create_access_token
 from app.api.deps import get_current_user
+from app.services.password_service import password_service
 
 
 router = APIRouter(prefix="/api/v1/auth", tags=["auth"])
@@ -25,7 +26,7 @@ async def login(
     )
     user = result.scalar_one_or_none()
     
-    if not user or not verify_password(request.password, user.hashed_password):
+    if not user or not await password_service.verify(request.password, user.hashed_password):
         return error_response("AUTH_FAILED", "Invalid email or password")
     
     # Create access token
@@ -49,7 +50,7 @@ async def login(
         )
     )
     
-    return success_response(response.dict())
+    return success_response(response.model_dump())
 
 
 @router.get("/me")
@@ -63,7 +64,7 @@ async def get_me(current_user: User = Depends(get_current_user)):
         created_at=current_user.created_at,
         working_repo_id=current_user.working_repo_id,
     )
-    return success_response(user_response.dict())
+    return success_response(user_response.model_dump())
 
 
 @router.patch("/me")
@@ -102,4 +103,4 @@ async def update_me(
         created_at=current_user.created_at,
         working_repo_id=current_user.working_repo_id,
     )
-    return success_response(user_response.dict())
+    return success_response(user_response.model_dump())
@@ -5,7 +5,7 @@ from app.db.session import get_db
 from app.models.company import Company
 from app.models.user import User
 from app.schemas.company import CompanyResponse, CompanyUpdate
-from app.schemas.common import success_response, error_response
+from app.schemas.common import success_response, error_response, dump_model
 from app.api.deps import get_current_user
 
 
@@ -23,8 +23,7 @@ async def get_current_company(
     company = result.scalar_one_or_none()
     
     if company:
-        response = CompanyResponse.from_orm(company)
-        return success_response(response.dict())
+        return success_response(dump_model(CompanyResponse, company))
     
     return success_response(None)
 
@@ -52,5 +51,4 @@ async def update_current_company(
     await db.commit()
     await db.refresh(company)
 
-    response = CompanyResponse.from_orm(company)
-    return success_response(response.dict())
+    return success_response(dump_model(CompanyResponse, company))
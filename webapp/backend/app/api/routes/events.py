@@ -1,14 +1,16 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import Optional
+from typing import Literal, Optional
 from uuid import UUID
-from app.db.session import get_db
+from app.db.session import get_read_db
 from app.models.event import Event
-from app.models.user import User
+from app.schemas.auth import Principal
 from app.schemas.event import EventResponse
-from app.schemas.common import success_response
-from app.api.deps import get_current_user
+from app.schemas.common import success_response, dump_models
+from app.api.deps import get_current_principal
+from app.api.pagination import PageParams, paginate, split_page
+from app.services.analytics_rollups import onboarding_time_report, step_dwell_report
 
 
 router = APIRouter(prefix="/api/v1", tags=["events", "analytics"])
@@ -18,10 +20,11 @@ router = APIRouter(prefix="/api/v1", tags=["events", "analytics"])
 async def get_events(
     entity: Optional[str] = None,
     entity_id: Optional[UUID] = None,
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    page: PageParams = Depends(),
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    query = select(Event).where(Event.company_id == current_user.company_id)
+    query = select(Event).where(Event.company_id == principal.company_id)
     
     if entity:
         query = query.where(Event.entity == entity)
@@ -29,42 +32,36 @@ async def get_events(
     if entity_id:
         query = query.where(Event.entity_id == entity_id)
     
-    query = query.order_by(Event.created_at.desc()).limit(100)
+    query = paginate(query, Event.created_at, Event.id, page)
     
     result = await db.execute(query)
-    events = result.scalars().all()
+    events, next_cursor = split_page(
+        result.scalars().all(), page, key=lambda e: (e.created_at, e.id)
+    )
     
-    response = [EventResponse.from_orm(e) for e in events]
-    return success_response([r.dict() for r in response])
+    return success_response(dump_models(EventResponse, events), next_cursor=next_cursor)
 
 
 @router.get("/analytics/onboarding-time")
 async def get_onboarding_analytics(
-    by: Optional[str] = "role",
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    by: Literal["role", "template_version"] = "role",
+    days: int = Query(30, ge=1, le=365),
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    # Mock analytics data for demo
-    analytics = {
-        "by": by,
-        "data": {
-            "intern": {
-                "avg_completion_time_hours": 4.5,
-                "completion_rate": 0.92,
-                "total_onboarded": 45
-            },
-            "manager": {
-                "avg_completion_time_hours": 3.2,
-                "completion_rate": 0.95,
-                "total_onboarded": 12
-            },
-            "cto": {
-                "avg_completion_time_hours": 2.1,
-                "completion_rate": 0.98,
-                "total_onboarded": 3
-            }
-        },
-        "period": "last_30_days"
-    }
+    # Served from the daily rollups kept by app.services.analytics_rollups
+    report = await onboarding_time_report(db, principal.company_id, by, days)
     
-    return success_response(analytics)
\ No newline at end of file
+    return success_response(report)
+
+
+@router.get("/analytics/step-dwell")
+async def get_step_dwell_analytics(
+    role_key: Optional[str] = None,
+    days: int = Query(30, ge=1, le=365),
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
+):
+    report = await step_dwell_report(db, principal.company_id, days, role_key)
+    
+    return success_response(report)
@@ -1,23 +1,43 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, column, func, true, union_all
+from sqlalchemy.dialects.postgresql import JSONB
 from typing import Optional
 from uuid import UUID
-import uuid
-from app.db.session import get_db
-from app.models.onboarding import OnboardingState, OnboardingStatus
+from app.db.session import get_db, get_read_db
+from app.models.onboarding import OnboardingState, OnboardingStatus, OnboardingStep, StepStorage
 from app.models.template import OnboardingTemplate
 from app.models.questionnaire import ToolSet
 from app.models.event import Event
 from app.models.user import User
-from app.schemas.onboarding import OnboardingCreate, OnboardingResponse, StepValidate, RecentOnboardingItem
-from app.schemas.common import success_response, error_response
-from app.api.deps import get_current_user
+from app.schemas.onboarding import (
+    OnboardingCreate, OnboardingResponse, OnboardingSummary, StepValidate, RecentOnboardingItem,
+    StepBatchRequest
+)
+from app.schemas.common import success_response, error_response, dump_model, dump_models
+from app.api.deps import etag_for, get_current_user, get_if_match
+from app.api.pagination import PageParams, paginate, split_page
+from app.services.onboarding_steps import init_steps, overlay_for, resolve_steps, toolset_steps_cache
+from app.services.step_transitions import (
+    ConcurrentUpdate, PreconditionFailed,
+    apply_step_patch, complete_patch, run_step_batch, start_patch, validate_patch
+)
+from app.services.event_writer import event_writer, make_event
+from app.core.config import settings
 
 
 router = APIRouter(prefix="/api/v1/onboardings", tags=["onboardings"])
 
 
+def _precondition_failed():
+    return error_response("PRECONDITION_FAILED", "Onboarding has changed since the given If-Match version", 412)
+
+
+def _with_etag(response, version: int):
+    response.headers["ETag"] = etag_for(version)
+    return response
+
+
 @router.post("/")
 async def create_onboarding(
     request: OnboardingCreate,
@@ -38,16 +58,9 @@ async def create_onboarding(
     if not toolset:
         return error_response("NOT_FOUND", "Toolset not found")
     
-    # Create steps with status tracking
-    steps = []
-    for step in toolset.resolved_steps:
-        steps.append({
-            **step,
-            "status": "pending",
-            "started_at": None,
-            "completed_at": None,
-            "validation_result": None
-        })
+    # Steps reference the toolset's definitions; only a status overlay is stored
+    toolset_steps_cache.set(toolset.id, toolset.resolved_steps or [])
+    steps = overlay_for(toolset.resolved_steps or [])
     
     # Create onboarding state
     onboarding = OnboardingState(
@@ -55,103 +68,165 @@ async def create_onboarding(
         user_id=request.user_id,
         template_id=request.template_id,
         toolset_id=request.toolset_id,
-        status=OnboardingStatus.ACTIVE,
-        progress=0,
-        steps=steps
+        status=OnboardingStatus.ACTIVE
     )
+    step_rows = init_steps(onboarding, steps)
     
     db.add(onboarding)
+    db.add_all(step_rows)
+    db.add(Event(
+        company_id=current_user.company_id,
+        entity="onboarding_state",
+        entity_id=onboarding.id,
+        action="onboarding_created",
+        payload={"template_id": str(request.template_id), "total_steps": onboarding.total_steps}
+    ))
     await db.commit()
     await db.refresh(onboarding)
+    await resolve_steps(db, [onboarding])
     
-    response = OnboardingResponse.from_orm(onboarding)
-    return success_response(response.dict())
+    return _with_etag(success_response(dump_model(OnboardingResponse, onboarding)), onboarding.version)
+
+
+def _step_counts():
+    """
+    LATERAL subquery counting in-progress steps, read from the steps JSONB
+    array or from onboarding_steps depending on the row's storage. Totals
+    and completions come from the maintained counters on the row itself.
+    """
+    step = (
+        func.jsonb_array_elements(OnboardingState.steps)
+        .table_valued(column("value", JSONB))
+        .render_derived(name="step")
+    )
+    statuses = union_all(
+        select(step.c.value["status"].astext.label("status"))
+        .select_from(step)
+        .where(OnboardingState.step_storage == StepStorage.JSONB.value)
+        .correlate(OnboardingState),
+        select(OnboardingStep.status.label("status"))
+        .where(
+            OnboardingStep.onboarding_id == OnboardingState.id,
+            OnboardingState.step_storage == StepStorage.TABLE.value,
+        )
+        .correlate(OnboardingState),
+    ).subquery("step_statuses")
+    return (
+        select(
+            func.count().filter(statuses.c.status == "in_progress").label("in_progress_steps"),
+        )
+        .select_from(statuses)
+        .lateral("step_counts")
+    )
+
+
+def _recent_items_query(company_id: UUID):
+    return (
+        select(
+            OnboardingState.id,
+            OnboardingState.status,
+            OnboardingState.progress,
+            OnboardingState.created_at,
+            OnboardingState.updated_at,
+            func.coalesce(User.name, "Member").label("user_name"),
+            OnboardingTemplate.role_key,
+            OnboardingTemplate.version.label("template_version"),
+        )
+        .join(User, User.id == OnboardingState.user_id)
+        .join(OnboardingTemplate, OnboardingTemplate.id == OnboardingState.template_id)
+        .where(OnboardingState.company_id == company_id)
+    )
 
 
 @router.get("/")
 async def get_onboardings(
     status: Optional[str] = None,
+    summary: bool = True,
+    page: PageParams = Depends(),
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    query = select(OnboardingState).where(
-        OnboardingState.company_id == current_user.company_id
-    )
+    """
+    List onboardings. By default returns summaries (scalar columns plus step
+    counts); pass `summary=false` for full steps, or use GET /{id}.
+    """
+    if summary:
+        counts = _step_counts()
+        query = select(
+            OnboardingState.id,
+            OnboardingState.company_id,
+            OnboardingState.user_id,
+            OnboardingState.template_id,
+            OnboardingState.toolset_id,
+            OnboardingState.status,
+            OnboardingState.progress,
+            OnboardingState.created_at,
+            OnboardingState.updated_at,
+            OnboardingState.total_steps,
+            OnboardingState.completed_steps,
+            counts.c.in_progress_steps,
+        ).join(counts, true())
+    else:
+        query = select(OnboardingState)
+    
+    query = query.where(OnboardingState.company_id == current_user.company_id)
     
     if status:
         query = query.where(OnboardingState.status == status)
     
+    query = paginate(query, OnboardingState.updated_at, OnboardingState.id, page)
     result = await db.execute(query)
-    onboardings = result.scalars().all()
     
-    response = [OnboardingResponse.from_orm(o) for o in onboardings]
-    return success_response([r.dict() for r in response])
+    if summary:
+        rows, next_cursor = split_page(
+            result.all(), page, key=lambda row: (row.updated_at, row.id)
+        )
+        return success_response(dump_models(OnboardingSummary, rows), next_cursor=next_cursor)
+    
+    onboardings, next_cursor = split_page(
+        result.scalars().all(), page, key=lambda o: (o.updated_at, o.id)
+    )
+    await resolve_steps(db, onboardings)
+    
+    return success_response(dump_models(OnboardingResponse, onboardings), next_cursor=next_cursor)
 
 
 @router.get("/recent")
 async def get_recent_onboardings(
     limit: int = 6,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     if limit <= 0:
         limit = 6
 
     # Join OnboardingState with User and Template for enriched display
     result = await db.execute(
-        select(OnboardingState, User, OnboardingTemplate)
-        .join(User, User.id == OnboardingState.user_id)
-        .join(OnboardingTemplate, OnboardingTemplate.id == OnboardingState.template_id)
-        .where(OnboardingState.company_id == current_user.company_id)
+        _recent_items_query(current_user.company_id)
         .order_by(OnboardingState.updated_at.desc())
         .limit(limit)
     )
-    rows = result.all()
-
-    items: list[RecentOnboardingItem] = []
-    for state, user, template in rows:
-        items.append(RecentOnboardingItem(
-            id=state.id,
-            status=state.status.value,
-            progress=state.progress,
-            created_at=state.created_at,
-            updated_at=state.updated_at,
-            user_name=user.name or "Member",
-            role_key=template.role_key,
-            template_version=template.version,
-        ))
 
-    return success_response([i.dict() for i in items])
+    return success_response(dump_models(RecentOnboardingItem, result.all()))
 
 
 @router.get("/enriched")
 async def get_enriched_onboardings(
+    page: PageParams = Depends(),
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     result = await db.execute(
-        select(OnboardingState, User, OnboardingTemplate)
-        .join(User, User.id == OnboardingState.user_id)
-        .join(OnboardingTemplate, OnboardingTemplate.id == OnboardingState.template_id)
-        .where(OnboardingState.company_id == current_user.company_id)
-        .order_by(OnboardingState.updated_at.desc())
+        paginate(
+            _recent_items_query(current_user.company_id),
+            OnboardingState.updated_at, OnboardingState.id, page
+        )
+    )
+    rows, next_cursor = split_page(
+        result.all(), page, key=lambda row: (row.updated_at, row.id)
     )
-    rows = result.all()
-
-    items: list[RecentOnboardingItem] = []
-    for state, user, template in rows:
-        items.append(RecentOnboardingItem(
-            id=state.id,
-            status=state.status.value,
-            progress=state.progress,
-            created_at=state.created_at,
-            updated_at=state.updated_at,
-            user_name=user.name or "Member",
-            role_key=template.role_key,
-            template_version=template.version,
-        ))
 
-    return success_response([i.dict() for i in items])
+    return success_response(dump_models(RecentOnboardingItem, rows), next_cursor=next_cursor)
 
 
 @router.get("/{onboarding_id}")
@@ -173,79 +248,88 @@ async def get_onboarding(
     if not onboarding:
         return error_response("NOT_FOUND", "Onboarding not found")
     
-    response = OnboardingResponse.from_orm(onboarding)
-    return success_response(response.dict())
+    await resolve_steps(db, [onboarding])
+    return _with_etag(success_response(dump_model(OnboardingResponse, onboarding)), onboarding.version)
+
+
+@router.post("/{onboarding_id}/steps:batch")
+async def batch_steps(
+    onboarding_id: UUID,
+    batch: StepBatchRequest,
+    if_match: Optional[int] = Depends(get_if_match),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Apply many start/complete/validate operations in one transaction, e.g.
+    a local agent reporting a run of validators. Returns per-op results.
+    Without If-Match, a concurrent write triggers an automatic re-run.
+    """
+    if not batch.ops:
+        return error_response("INVALID_PAYLOAD", "At least one op is required")
+    if len(batch.ops) > settings.STEP_BATCH_MAX_OPS:
+        return error_response("INVALID_PAYLOAD", f"At most {settings.STEP_BATCH_MAX_OPS} ops per request")
+    
+    try:
+        outcome = await run_step_batch(db, onboarding_id, current_user.company_id, batch.ops, if_match)
+    except PreconditionFailed:
+        return _precondition_failed()
+    except ConcurrentUpdate:
+        return error_response("CONFLICT", "Onboarding is being updated concurrently, retry later", 409)
+    if outcome is None:
+        return error_response("NOT_FOUND", "Onboarding not found")
+    
+    return _with_etag(success_response({
+        "progress": outcome.progress,
+        "applied": sum(1 for r in outcome.results if r.ok),
+        "results": [r.model_dump() for r in outcome.results]
+    }), outcome.version)
 
 
 @router.post("/{onboarding_id}/steps/{step_id}/start")
 async def start_step(
     onboarding_id: UUID,
     step_id: str,
+    if_match: Optional[int] = Depends(get_if_match),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    result = await db.execute(
-        select(OnboardingState).where(
-            and_(
-                OnboardingState.id == onboarding_id,
-                OnboardingState.company_id == current_user.company_id
-            )
+    try:
+        transition = await apply_step_patch(
+            db, onboarding_id, current_user.company_id, step_id, start_patch(), if_match
         )
-    )
-    onboarding = result.scalar_one_or_none()
-    
-    if not onboarding:
-        return error_response("NOT_FOUND", "Onboarding not found")
-    
-    # Update step status
-    for step in onboarding.steps:
-        if step["id"] == step_id:
-            step["status"] = "in_progress"
-            step["started_at"] = str(uuid.uuid4())  # Would be datetime in production
-            break
+    except PreconditionFailed:
+        return _precondition_failed()
+    if transition is None:
+        return error_response("NOT_FOUND", "Onboarding or step not found")
     
     await db.commit()
-    await db.refresh(onboarding)
     
-    return success_response({"started": True})
+    return _with_etag(success_response({"started": True}), transition.version)
 
 
 @router.post("/{onboarding_id}/steps/{step_id}/complete")
 async def complete_step(
     onboarding_id: UUID,
     step_id: str,
+    if_match: Optional[int] = Depends(get_if_match),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    result = await db.execute(
-        select(OnboardingState).where(
-            and_(
-                OnboardingState.id == onboarding_id,
-                OnboardingState.company_id == current_user.company_id
-            )
+    try:
+        transition = await apply_step_patch(
+            db, onboarding_id, current_user.company_id, step_id, complete_patch(), if_match
         )
-    )
-    onboarding = result.scalar_one_or_none()
-    
-    if not onboarding:
-        return error_response("NOT_FOUND", "Onboarding not found")
-    
-    # Update step status
-    for step in onboarding.steps:
-        if step["id"] == step_id:
-            step["status"] = "completed"
-            step["completed_at"] = str(uuid.uuid4())  # Would be datetime in production
-            break
-    
-    # Update progress
-    completed_steps = sum(1 for s in onboarding.steps if s["status"] == "completed")
-    total_steps = len(onboarding.steps)
-    onboarding.progress = int(100 * completed_steps / total_steps) if total_steps > 0 else 0
+    except PreconditionFailed:
+        return _precondition_failed()
+    if transition is None:
+        return error_response("NOT_FOUND", "Onboarding or step not found")
     
     await db.commit()
-    await db.refresh(onboarding)
     
-    return success_response({"completed": True, "progress": onboarding.progress})
+    return _with_etag(
+        success_response({"completed": True, "progress": transition.progress}), transition.version
+    )
 
 
 @router.post("/{onboarding_id}/steps/{step_id}/validate")
@@ -253,57 +337,36 @@ async def validate_step(
     onboarding_id: UUID,
     step_id: str,
     validation: StepValidate,
+    if_match: Optional[int] = Depends(get_if_match),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    result = await db.execute(
-        select(OnboardingState).where(
-            and_(
-                OnboardingState.id == onboarding_id,
-                OnboardingState.company_id == current_user.company_id
-            )
+    try:
+        transition = await apply_step_patch(
+            db, onboarding_id, current_user.company_id, step_id,
+            validate_patch(validation.status, validation.details), if_match
         )
-    )
-    onboarding = result.scalar_one_or_none()
+    except PreconditionFailed:
+        return _precondition_failed()
+    if transition is None:
+        return error_response("NOT_FOUND", "Onboarding or step not found")
     
-    if not onboarding:
-        return error_response("NOT_FOUND", "Onboarding not found")
-    
-    # Update step validation
-    for step in onboarding.steps:
-        if step["id"] == step_id:
-            step["validation_result"] = {
-                "status": validation.status,
-                "details": validation.details
-            }
-            if validation.status == "passed":
-                step["status"] = "completed"
-            break
-    
-    # Update progress
-    completed_steps = sum(1 for s in onboarding.steps if s["status"] == "completed")
-    total_steps = len(onboarding.steps)
-    onboarding.progress = int(100 * completed_steps / total_steps) if total_steps > 0 else 0
+    await db.commit()
     
-    # Create event
-    event = Event(
-        company_id=current_user.company_id,
-        entity="onboarding_state",
-        entity_id=onboarding_id,
-        action="step_validated",
-        payload={
+    await event_writer.emit(make_event(
+        current_user.company_id,
+        "onboarding_state",
+        onboarding_id,
+        "step_validated",
+        {
             "step_id": step_id,
             "status": validation.status,
             "details": validation.details
         }
-    )
-    db.add(event)
-    
-    await db.commit()
-    await db.refresh(onboarding)
+    ))
     
-    return success_response({
+    return _with_etag(success_response({
         "validated": True,
         "status": validation.status,
-        "progress": onboarding.progress
-    })
+        "progress": transition.progress
+    }), transition.version)
@@ -7,7 +7,7 @@ from app.models.questionnaire import Questionnaire
 from app.models.template import OnboardingTemplate, TemplatePart
 from app.models.user import User
 from app.schemas.questionnaire import QuestionnaireCreate, QuestionnaireResponse, AnswersUpdate
-from app.schemas.common import success_response, error_response
+from app.schemas.common import success_response, error_response, dump_model
 from app.api.deps import get_current_user
 
 
@@ -63,8 +63,7 @@ async def create_questionnaire(
     await db.commit()
     await db.refresh(questionnaire)
     
-    response = QuestionnaireResponse.from_orm(questionnaire)
-    return success_response(response.dict())
+    return success_response(dump_model(QuestionnaireResponse, questionnaire))
 
 
 @router.post("/{questionnaire_id}/answers")
@@ -97,5 +96,4 @@ async def update_answers(
     await db.commit()
     await db.refresh(questionnaire)
     
-    response = QuestionnaireResponse.from_orm(questionnaire)
-    return success_response(response.dict())
+    return success_response(dump_model(QuestionnaireResponse, questionnaire))
@@ -1,81 +1,30 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_
 from uuid import UUID
-import httpx
-from app.db.session import get_db
-from app.models.repo import Repo, RepoScan, RepoProvider, ScanStatus
-from app.models.user import User
-from app.models.template import TemplatePart
-from app.schemas.repo import RepoCreate, RepoResponse, RepoScanResponse, ScanResultPayload, RecentScanItem
-from app.schemas.common import success_response, error_response
-from app.api.deps import get_current_user, require_admin
+from app.db.session import get_db, get_read_db
+from app.models.repo import Repo, RepoScan, RepoProvider
+from app.schemas.auth import Principal
+from app.schemas.repo import RepoCreate, RepoResponse, RepoScanResponse, RecentScanItem, ScanResultPayload
+from app.schemas.common import success_response, error_response, dump_model, dump_models, json_request_body
+from app.api.deps import get_current_principal, require_admin_principal
+from app.api.pagination import PageParams, paginate, split_page
 from app.core.config import settings
+from app.services.scan_ingest import PayloadTooLarge, ingest_scan_result, read_scan_result
+from app.services.scan_scheduler import scan_scheduler
 
 
 router = APIRouter(prefix="/api/v1/repos", tags=["repos"])
 
 
-async def notify_n8n(scan_id: UUID, repo_id: UUID, repo: Repo):
-    """
-    Notify n8n webhook to start repo scanning workflow
-    """
-    print(f"[N8N] Starting notification for scan_id={scan_id}, repo_id={repo_id}")
-    print(f"[N8N] N8N_WEBHOOK_URL configured: {bool(settings.N8N_WEBHOOK_URL)}")
-
-    if not settings.N8N_WEBHOOK_URL or settings.N8N_WEBHOOK_URL == "read-it-from-env":
-        print("[N8N] WARNING: N8N_WEBHOOK_URL not configured! Skipping n8n notification.")
-        print("[N8N] Please set N8N_WEBHOOK_URL in your .env file")
-        return
-
-    # Construct repo URL based on provider
-    if repo.provider.value == "github":
-        repo_url = f"https://github.com/{repo.org}/{repo.name}.git"
-    elif repo.provider.value == "gitlab":
-        repo_url = f"https://gitlab.com/{repo.org}/{repo.name}.git"
-    else:
-        repo_url = f"https://{repo.provider.value}.com/{repo.org}/{repo.name}.git"
-
-    payload = {
-        "scan_id": str(scan_id),
-        "repo_id": str(repo_id),
-        "provider": repo.provider.value,
-        "org": repo.org,
-        "name": repo.name,
-        "default_branch": repo.default_branch,
-        "repo_url": repo_url
-    }
-
-    print(f"[N8N] Webhook URL: {settings.N8N_WEBHOOK_URL}")
-    print(f"[N8N] Payload: {payload}")
-
-    try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            print("[N8N] Sending POST request to n8n...")
-            response = await client.post(settings.N8N_WEBHOOK_URL, json=payload)
-            print(f"[N8N] Response status: {response.status_code}")
-            print(f"[N8N] Response body: {response.text[:500]}")  # First 500 chars
-
-            if response.status_code >= 400:
-                print(f"[N8N] ERROR: n8n webhook returned error status {response.status_code}")
-            else:
-                print("[N8N] SUCCESS: n8n webhook triggered successfully")
-    except httpx.TimeoutException:
-        print("[N8N] ERROR: Request to n8n timed out after 10 seconds")
-    except httpx.ConnectError as e:
-        print(f"[N8N] ERROR: Could not connect to n8n webhook: {e}")
-    except Exception as e:
-        print(f"[N8N] ERROR: Failed to notify n8n: {type(e).__name__}: {e}")
-
-
 @router.post("/")
 async def create_repo(
     repo: RepoCreate,
-    current_user: User = Depends(require_admin),
+    principal: Principal = Depends(require_admin_principal),
     db: AsyncSession = Depends(get_db)
 ):
     db_repo = Repo(
-        company_id=current_user.company_id,
+        company_id=principal.company_id,
         provider=RepoProvider(repo.provider),
         org=repo.org,
         name=repo.name,
@@ -86,28 +35,28 @@ async def create_repo(
     await db.commit()
     await db.refresh(db_repo)
     
-    response = RepoResponse.from_orm(db_repo)
-    return success_response(response.dict())
+    return success_response(dump_model(RepoResponse, db_repo))
 
 
 @router.get("/")
 async def get_repos(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    page: PageParams = Depends(),
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    result = await db.execute(
-        select(Repo).where(Repo.company_id == current_user.company_id)
+    query = select(Repo).where(Repo.company_id == principal.company_id)
+    result = await db.execute(paginate(query, Repo.created_at, Repo.id, page))
+    repos, next_cursor = split_page(
+        result.scalars().all(), page, key=lambda r: (r.created_at, r.id)
     )
-    repos = result.scalars().all()
     
-    response = [RepoResponse.from_orm(r) for r in repos]
-    return success_response([r.dict() for r in response])
+    return success_response(dump_models(RepoResponse, repos), next_cursor=next_cursor)
 
 
 @router.post("/{repo_id}/scan")
 async def scan_repo(
     repo_id: UUID,
-    current_user: User = Depends(require_admin),
+    principal: Principal = Depends(require_admin_principal),
     db: AsyncSession = Depends(get_db)
 ):
     # Verify repo exists
@@ -115,7 +64,7 @@ async def scan_repo(
         select(Repo).where(
             and_(
                 Repo.id == repo_id,
-                Repo.company_id == current_user.company_id
+                Repo.company_id == principal.company_id
             )
         )
     )
@@ -124,30 +73,22 @@ async def scan_repo(
     if not repo:
         return error_response("NOT_FOUND", "Repository not found")
 
-    # Create scan record with QUEUED status
-    scan = RepoScan(
-        company_id=current_user.company_id,
-        repo_id=repo_id,
-        status=ScanStatus.QUEUED,
-        summary={}
-    )
-
-    db.add(scan)
+    # Repeated requests while a scan is queued or running get that scan back;
+    # the scheduler starts it once the per-company and global caps allow
+    scan, created = await scan_scheduler.request_scan(db, repo)
     await db.commit()
     await db.refresh(scan)
+    if created:
+        scan_scheduler.wake()
 
-    # Trigger n8n workflow
-    await notify_n8n(scan.id, repo_id, repo)
-
-    response = RepoScanResponse.from_orm(scan)
-    return success_response(response.dict())
+    return success_response({**dump_model(RepoScanResponse, scan), "deduplicated": not created})
 
 
 @router.get("/scans/recent")
 async def get_recent_scans(
     limit: int = 1,
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
 ):
     if limit <= 0:
         limit = 1
@@ -155,7 +96,7 @@ async def get_recent_scans(
     result = await db.execute(
         select(RepoScan, Repo)
         .join(Repo, Repo.id == RepoScan.repo_id)
-        .where(RepoScan.company_id == current_user.company_id)
+        .where(RepoScan.company_id == principal.company_id)
         .order_by(RepoScan.updated_at.desc())
         .limit(limit)
     )
@@ -179,13 +120,13 @@ async def get_recent_scans(
         ))
 
     # Return list for consistency even when limit=1
-    return success_response([item.dict() for item in items])
+    return success_response([item.model_dump() for item in items])
 
 @router.get("/{repo_id}/scans/{scan_id}")
 async def get_scan(
     repo_id: UUID,
     scan_id: UUID,
-    current_user: User = Depends(get_current_user),
+    principal: Principal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     result = await db.execute(
@@ -193,7 +134,7 @@ async def get_scan(
             and_(
                 RepoScan.id == scan_id,
                 RepoScan.repo_id == repo_id,
-                RepoScan.company_id == current_user.company_id
+                RepoScan.company_id == principal.company_id
             )
         )
     )
@@ -202,52 +143,36 @@ async def get_scan(
     if not scan:
         return error_response("NOT_FOUND", "Scan not found")
 
-    response = RepoScanResponse.from_orm(scan)
-    return success_response(response.dict())
+    return success_response(dump_model(RepoScanResponse, scan))
 
 
-@router.post("/scanresult")
+@router.post("/scanresult", openapi_extra={"requestBody": json_request_body(ScanResultPayload)})
 async def receive_scan_result(
-    payload: ScanResultPayload,
+    request: Request,
     db: AsyncSession = Depends(get_db)
 ):
-    # Fetch the scan record
-    result = await db.execute(
-        select(RepoScan).where(RepoScan.id == payload.scan_id)
-    )
-    scan = result.scalar_one_or_none()
-
-    if not scan:
+    """
+    Called by the n8n workflow with the scan's summary and template parts.
+    The ScanResultPayload body is read and validated by
+    app.services.scan_ingest. Replays of an already ingested scan return the
+    original part ids without writing anything.
+    """
+    try:
+        payload = await read_scan_result(request, settings.SCAN_RESULT_MAX_BYTES)
+    except PayloadTooLarge:
+        return error_response("PAYLOAD_TOO_LARGE", f"Scan result exceeds {settings.SCAN_RESULT_MAX_BYTES} bytes", 413)
+    except ValueError as e:
+        return error_response("VALIDATION_ERROR", str(e)[:1000], 422)
+
+    ingested = await ingest_scan_result(db, payload)
+    if ingested is None:
         return error_response("NOT_FOUND", "Scan not found")
 
-    # Update scan status and summary
-    scan.status = ScanStatus.DONE
-    scan.summary = {"markdown": payload.summary_markdown}
-
-    # Create TemplatePart objects from the scan results
-    created_parts = []
-    for part_data in payload.template_parts:
-        template_part = TemplatePart(
-            company_id=scan.company_id,
-            title=part_data.title,
-            description=part_data.description,
-            role_key=part_data.role_key,
-            tags=part_data.tags,
-            fields=part_data.fields,
-            validators=part_data.validators
-        )
-        db.add(template_part)
-        created_parts.append(template_part)
-
     await db.commit()
-    await db.refresh(scan)
-
-    # Refresh all created parts to get their IDs
-    for part in created_parts:
-        await db.refresh(part)
 
     return success_response({
-        "scan_id": str(scan.id),
-        "status": scan.status.value,
-        "created_parts": [str(part.id) for part in created_parts]
+        "scan_id": str(ingested.scan.id),
+        "status": ingested.scan.status.value,
+        "created_parts": [str(part_id) for part_id in ingested.part_ids],
+        "replayed": ingested.replayed
     })
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, Header
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from app.schemas.auth import Principal
+from app.schemas.common import error_response
+from app.api.deps import get_current_principal
+from app.services.stream import sse_frames, stream_hub
+
+
+router = APIRouter(prefix="/api/v1", tags=["stream"])
+
+
+@router.get("/stream")
+async def stream_changes(
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+    principal: Principal = Depends(get_current_principal)
+):
+    """
+    Server-Sent Events for the caller's company: `onboarding` (progress or
+    status changed), `scan` (status changed) and `event` (new event row).
+    A `reset` event means updates may have been missed and views should be
+    refetched.
+    """
+    if stream_hub.at_capacity:
+        return error_response("STREAM_UNAVAILABLE", "Too many open streams, retry later", 503)
+    
+    return StreamingResponse(
+        sse_frames(stream_hub, principal.company_id, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -3,12 +3,13 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, delete, and_
 from typing import Optional
 from uuid import UUID
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.models.template import TemplatePart
-from app.models.user import User
+from app.schemas.auth import Principal
 from app.schemas.template import TemplatePartCreate, TemplatePartUpdate, TemplatePartResponse
-from app.schemas.common import success_response, error_response
-from app.api.deps import get_current_user, require_admin
+from app.schemas.common import success_response, error_response, dump_model, dump_models
+from app.api.deps import get_current_principal, require_admin_principal
+from app.api.pagination import PageParams, paginate, split_page
 
 
 router = APIRouter(prefix="/api/v1/template-parts", tags=["template-parts"])
@@ -18,11 +19,12 @@ router = APIRouter(prefix="/api/v1/template-parts", tags=["template-parts"])
 async def get_template_parts(
     role_key: Optional[str] = None,
     tag: Optional[str] = None,
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    page: PageParams = Depends(),
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
 ):
     query = select(TemplatePart).where(
-        TemplatePart.company_id == current_user.company_id
+        TemplatePart.company_id == principal.company_id
     )
     
     if role_key:
@@ -31,21 +33,23 @@ async def get_template_parts(
     if tag:
         query = query.where(TemplatePart.tags.contains([tag]))
     
+    query = paginate(query, TemplatePart.updated_at, TemplatePart.id, page)
     result = await db.execute(query)
-    parts = result.scalars().all()
+    parts, next_cursor = split_page(
+        result.scalars().all(), page, key=lambda p: (p.updated_at, p.id)
+    )
     
-    response = [TemplatePartResponse.from_orm(p) for p in parts]
-    return success_response([r.dict() for r in response])
+    return success_response(dump_models(TemplatePartResponse, parts), next_cursor=next_cursor)
 
 
 @router.post("/")
 async def create_template_part(
     part: TemplatePartCreate,
-    current_user: User = Depends(require_admin),
+    principal: Principal = Depends(require_admin_principal),
     db: AsyncSession = Depends(get_db)
 ):
     db_part = TemplatePart(
-        company_id=current_user.company_id,
+        company_id=principal.company_id,
         title=part.title,
         description=part.description,
         role_key=part.role_key,
@@ -58,22 +62,21 @@ async def create_template_part(
     await db.commit()
     await db.refresh(db_part)
     
-    response = TemplatePartResponse.from_orm(db_part)
-    return success_response(response.dict())
+    return success_response(dump_model(TemplatePartResponse, db_part))
 
 
 @router.patch("/{part_id}")
 async def update_template_part(
     part_id: UUID,
     update: TemplatePartUpdate,
-    current_user: User = Depends(require_admin),
+    principal: Principal = Depends(require_admin_principal),
     db: AsyncSession = Depends(get_db)
 ):
     result = await db.execute(
         select(TemplatePart).where(
             and_(
                 TemplatePart.id == part_id,
-                TemplatePart.company_id == current_user.company_id
+                TemplatePart.company_id == principal.company_id
             )
         )
     )
@@ -82,28 +85,27 @@ async def update_template_part(
     if not part:
         return error_response("NOT_FOUND", "Template part not found")
     
-    update_data = update.dict(exclude_unset=True)
+    update_data = update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(part, field, value)
     
     await db.commit()
     await db.refresh(part)
     
-    response = TemplatePartResponse.from_orm(part)
-    return success_response(response.dict())
+    return success_response(dump_model(TemplatePartResponse, part))
 
 
 @router.delete("/{part_id}")
 async def delete_template_part(
     part_id: UUID,
-    current_user: User = Depends(require_admin),
+    principal: Principal = Depends(require_admin_principal),
     db: AsyncSession = Depends(get_db)
 ):
     result = await db.execute(
         delete(TemplatePart).where(
             and_(
                 TemplatePart.id == part_id,
-                TemplatePart.company_id == current_user.company_id
+                TemplatePart.company_id == principal.company_id
             )
         )
     )
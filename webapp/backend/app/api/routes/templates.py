@@ -3,14 +3,15 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, delete
 from typing import Optional
 from uuid import UUID
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.models.template import OnboardingTemplate, TemplateStatus
-from app.models.user import User
+from app.schemas.auth import Principal
 from app.models.questionnaire import Questionnaire, ToolSet
 from app.models.onboarding import OnboardingState
 from app.schemas.template import OnboardingTemplateCreate, OnboardingTemplateUpdate, OnboardingTemplateResponse
-from app.schemas.common import success_response, error_response
-from app.api.deps import get_current_user, require_admin
+from app.schemas.common import success_response, error_response, dump_model, dump_models
+from app.api.deps import get_current_principal, require_admin_principal
+from app.api.pagination import PageParams, paginate, split_page
 
 
 router = APIRouter(prefix="/api/v1/templates", tags=["templates"])
@@ -19,31 +20,34 @@ router = APIRouter(prefix="/api/v1/templates", tags=["templates"])
 @router.get("/")
 async def get_templates(
     role_key: Optional[str] = None,
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    page: PageParams = Depends(),
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
 ):
     query = select(OnboardingTemplate).where(
-        OnboardingTemplate.company_id == current_user.company_id
+        OnboardingTemplate.company_id == principal.company_id
     )
     
     if role_key:
         query = query.where(OnboardingTemplate.role_key == role_key)
     
+    query = paginate(query, OnboardingTemplate.updated_at, OnboardingTemplate.id, page)
     result = await db.execute(query)
-    templates = result.scalars().all()
+    templates, next_cursor = split_page(
+        result.scalars().all(), page, key=lambda t: (t.updated_at, t.id)
+    )
     
-    response = [OnboardingTemplateResponse.from_orm(t) for t in templates]
-    return success_response([r.dict() for r in response])
+    return success_response(dump_models(OnboardingTemplateResponse, templates), next_cursor=next_cursor)
 
 
 @router.post("/")
 async def create_template(
     template: OnboardingTemplateCreate,
-    current_user: User = Depends(require_admin),
+    principal: Principal = Depends(require_admin_principal),
     db: AsyncSession = Depends(get_db)
 ):
     db_template = OnboardingTemplate(
-        company_id=current_user.company_id,
+        company_id=principal.company_id,
         name=template.name,
         role_key=template.role_key,
         part_ids=template.part_ids,
@@ -55,21 +59,20 @@ async def create_template(
     await db.commit()
     await db.refresh(db_template)
     
-    response = OnboardingTemplateResponse.from_orm(db_template)
-    return success_response(response.dict())
+    return success_response(dump_model(OnboardingTemplateResponse, db_template))
 
 
 @router.get("/{template_id}")
 async def get_template(
     template_id: UUID,
-    current_user: User = Depends(get_current_user),
+    principal: Principal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     result = await db.execute(
         select(OnboardingTemplate).where(
             and_(
                 OnboardingTemplate.id == template_id,
-                OnboardingTemplate.company_id == current_user.company_id
+                OnboardingTemplate.company_id == principal.company_id
             )
         )
     )
@@ -78,21 +81,20 @@ async def get_template(
     if not template:
         return error_response("NOT_FOUND", "Template not found")
     
-    response = OnboardingTemplateResponse.from_orm(template)
-    return success_response(response.dict())
+    return success_response(dump_model(OnboardingTemplateResponse, template))
 
 @router.patch("/{template_id}")
 async def update_template(
     template_id: UUID,
     update: OnboardingTemplateUpdate,
-    current_user: User = Depends(require_admin),
+    principal: Principal = Depends(require_admin_principal),
     db: AsyncSession = Depends(get_db)
 ):
     result = await db.execute(
         select(OnboardingTemplate).where(
             and_(
                 OnboardingTemplate.id == template_id,
-                OnboardingTemplate.company_id == current_user.company_id
+                OnboardingTemplate.company_id == principal.company_id
             )
         )
     )
@@ -101,28 +103,27 @@ async def update_template(
     if not template:
         return error_response("NOT_FOUND", "Template not found")
 
-    update_data = update.dict(exclude_unset=True)
+    update_data = update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(template, field, value)
 
     await db.commit()
     await db.refresh(template)
 
-    response = OnboardingTemplateResponse.from_orm(template)
-    return success_response(response.dict())
+    return success_response(dump_model(OnboardingTemplateResponse, template))
 
 
 @router.post("/{template_id}/publish")
 async def publish_template(
     template_id: UUID,
-    current_user: User = Depends(require_admin),
+    principal: Principal = Depends(require_admin_principal),
     db: AsyncSession = Depends(get_db)
 ):
     result = await db.execute(
         select(OnboardingTemplate).where(
             and_(
                 OnboardingTemplate.id == template_id,
-                OnboardingTemplate.company_id == current_user.company_id
+                OnboardingTemplate.company_id == principal.company_id
             )
         )
     )
@@ -139,7 +140,7 @@ async def publish_template(
     await db.execute(
         delete(OnboardingTemplate).where(
             and_(
-                OnboardingTemplate.company_id == current_user.company_id,
+                OnboardingTemplate.company_id == principal.company_id,
                 OnboardingTemplate.name == template.name,
                 OnboardingTemplate.role_key == template.role_key,
                 OnboardingTemplate.status == TemplateStatus.DRAFT,
@@ -159,7 +160,7 @@ async def publish_template(
 @router.delete("/{template_id}")
 async def delete_template(
     template_id: UUID,
-    current_user: User = Depends(require_admin),
+    principal: Principal = Depends(require_admin_principal),
     db: AsyncSession = Depends(get_db)
 ):
     # First verify the template exists and belongs to this company
@@ -167,7 +168,7 @@ async def delete_template(
         select(OnboardingTemplate).where(
             and_(
                 OnboardingTemplate.id == template_id,
-                OnboardingTemplate.company_id == current_user.company_id,
+                OnboardingTemplate.company_id == principal.company_id,
             )
         )
     )
@@ -181,7 +182,7 @@ async def delete_template(
         delete(OnboardingState).where(
             and_(
                 OnboardingState.template_id == template_id,
-                OnboardingState.company_id == current_user.company_id,
+                OnboardingState.company_id == principal.company_id,
             )
         )
     )
@@ -191,7 +192,7 @@ async def delete_template(
         select(Questionnaire.id).where(
             and_(
                 Questionnaire.template_id == template_id,
-                Questionnaire.company_id == current_user.company_id,
+                Questionnaire.company_id == principal.company_id,
             )
         )
     )
@@ -203,7 +204,7 @@ async def delete_template(
             delete(ToolSet).where(
                 and_(
                     ToolSet.questionnaire_id.in_(questionnaire_ids),
-                    ToolSet.company_id == current_user.company_id,
+                    ToolSet.company_id == principal.company_id,
                 )
             )
         )
@@ -213,7 +214,7 @@ async def delete_template(
         delete(Questionnaire).where(
             and_(
                 Questionnaire.template_id == template_id,
-                Questionnaire.company_id == current_user.company_id,
+                Questionnaire.company_id == principal.company_id,
             )
         )
     )
@@ -223,7 +224,7 @@ async def delete_template(
         delete(OnboardingTemplate).where(
             and_(
                 OnboardingTemplate.id == template_id,
-                OnboardingTemplate.company_id == current_user.company_id,
+                OnboardingTemplate.company_id == principal.company_id,
             )
         )
     )
@@ -1,13 +1,14 @@
 from fastapi import APIRouter, Depends
+import httpx
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_
 
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, get_openai_client
 from app.db.session import get_db
 from app.models.questionnaire import Questionnaire, ToolSet
 from app.models.template import OnboardingTemplate, TemplatePart
 from app.models.user import User
-from app.schemas.common import error_response, success_response
+from app.schemas.common import error_response, success_response, dump_model
 from app.schemas.questionnaire import ToolSetCreate, ToolSetResponse
 from app.services.toolset_generator import generate_resolved_steps
 
@@ -19,7 +20,8 @@ router = APIRouter(prefix="/api/v1/toolsets", tags=["toolsets"])
 async def create_toolset(
     request: ToolSetCreate,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    openai_client: httpx.AsyncClient = Depends(get_openai_client)
 ):
     # Get questionnaire
     result = await db.execute(
@@ -69,7 +71,8 @@ async def create_toolset(
 
     resolved_steps = await generate_resolved_steps(
         questionnaire.answers or {},
-        template_parts
+        template_parts,
+        openai_client
     )
     
     # Create toolset
@@ -83,5 +86,4 @@ async def create_toolset(
     await db.commit()
     await db.refresh(toolset)
     
-    response = ToolSetResponse.from_orm(toolset)
-    return success_response(response.dict())
+    return success_response(dump_model(ToolSetResponse, toolset))
@@ -0,0 +1,44 @@
+from collections import Counter
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import get_db
+from app.schemas.auth import Principal
+from app.schemas.common import success_response, error_response
+from app.api.deps import require_admin_principal
+from app.services.user_provisioning import BulkPayloadError, parse_bulk_payload, provision_users
+
+
+router = APIRouter(prefix="/api/v1/users", tags=["users"])
+
+
+@router.post(":bulk")
+async def bulk_create_users(
+    request: Request,
+    principal: Principal = Depends(require_admin_principal),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Provision users from a CSV (`text/csv`, header `email,name,password[,role]`)
+    or NDJSON (`application/x-ndjson`) body. Existing emails are skipped.
+    """
+    body = await request.body()
+    content_type = request.headers.get("content-type", "")
+
+    try:
+        records = parse_bulk_payload(body, content_type)
+    except BulkPayloadError as exc:
+        return error_response("INVALID_PAYLOAD", str(exc))
+
+    results = await provision_users(db, principal.company_id, records)
+    counts = Counter(r.status for r in results)
+
+    return success_response({
+        "summary": {
+            "total": len(results),
+            "created": counts["created"],
+            "exists": counts["exists"],
+            "duplicate": counts["duplicate"],
+            "invalid": counts["invalid"],
+        },
+        "results": [r.model_dump() for r in results]
+    })
@@ -4,13 +4,110 @@ from functools import lru_cache
 
 class Settings(BaseSettings):
     DATABASE_URL: str = "read-it-from-env"
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100  # asyncpg server-side statement cache
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 100  # SQLAlchemy adapter cache
+    DB_COMMAND_TIMEOUT_SECONDS: float | None = None
+    # Transaction-pooling PgBouncer cannot keep prepared statements across
+    # transactions: disables both caches and uses unique statement names.
+    DB_PGBOUNCER_MODE: bool = False
+    DB_HEALTH_TIMEOUT_SECONDS: float = 2.0
+    # Optional streaming replica for read-only routes (get_read_db)
+    DATABASE_READ_URL: str | None = None
+    READ_REPLICA_MAX_LAG_SECONDS: float = 5.0
+    READ_REPLICA_CHECK_INTERVAL_SECONDS: float = 2.0
+    READ_REPLICA_RETRY_AFTER_SECONDS: float = 30.0
+    # Users that committed a write within this window read from the primary
+    # (tracked per worker process)
+    READ_YOUR_WRITES_WINDOW_SECONDS: float = 10.0
+    PAGE_SIZE_DEFAULT: int = 50
+    PAGE_SIZE_MAX: int = 200
     JWT_SECRET: str = "read-it-from-env"
     JWT_ALGORITHM: str = "HS256"
     JWT_EXPIRATION_MINUTES: int = 120
     N8N_WEBHOOK_URL: str = "read-it-from-env"
+    N8N_TIMEOUT_SECONDS: float = 10.0
+    SCAN_RESULT_MAX_BYTES: int = 10 * 1024 * 1024
+    # Local scanner (app.services.repo_scanner); manifest parsing moves to a
+    # process pool once a scan has found this many manifests
+    SCANNER_WORKERS: int | None = None  # defaults to CPU count
+    SCANNER_POOL_MIN_MANIFESTS: int = 32
+    SCANNER_POOL_BATCH_SIZE: int = 16
+    SCANNER_MAX_MANIFEST_BYTES: int = 2 * 1024 * 1024
+    SCANNER_GIT_TIMEOUT_SECONDS: float = 120.0
+    # Scan cache (app.services.scan_cache): commit snapshots kept per repo
+    SCAN_CACHE_SNAPSHOTS_PER_REPO: int = 20
+    # Bare mirrors the local scanner checks repos out from (app.services.repo_mirror)
+    REPO_MIRROR_DIR: str = "/tmp/repo-mirrors"
+    REPO_MIRROR_MAX_BYTES: int = 20 * 1024 * 1024 * 1024
+    REPO_MIRROR_GIT_TIMEOUT_SECONDS: float = 600.0
     OPENAI_API_KEY: str | None = None
     OPENAI_MODEL: str = "gpt-4o"
     OPENAI_BASE_URL: str = "https://api.openai.com/v1"
+    OPENAI_TIMEOUT_SECONDS: float = 30.0
+    # Pooled outbound clients (app.core.http); connection caps are per upstream
+    HTTP_CLIENT_HTTP2: bool = True
+    HTTP_CLIENT_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    HTTP_N8N_MAX_CONNECTIONS: int = 10
+    HTTP_OPENAI_MAX_CONNECTIONS: int = 20
+    PRINCIPAL_CACHE_MAX_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 30.0
+    # Trust verified JWT claims for company/role scoping instead of loading
+    # the user row; role changes then apply on the next login.
+    AUTH_CLAIMS_ONLY: bool = False
+    PASSWORD_HASH_EXECUTOR: str = "thread"  # "thread" | "process"
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_CONCURRENCY: int = 8
+    USER_BULK_MAX_ROWS: int = 5000
+    USER_BULK_INSERT_BATCH_SIZE: int = 500
+    USER_BULK_HASH_WORKERS: int | None = None  # defaults to CPU count
+    STEP_BATCH_MAX_OPS: int = 500
+    # Storage for new onboardings: "jsonb" (steps document) or "table" (onboarding_steps rows)
+    ONBOARDING_STEP_STORAGE: str = "jsonb"
+    ONBOARDING_OCC_MAX_RETRIES: int = 5
+    TOOLSET_STEPS_CACHE_MAX_SIZE: int = 1000
+    TOOLSET_STEPS_CACHE_TTL_SECONDS: float = 600.0
+    # Background fold of onboarding events into analytics rollups (0 disables the worker)
+    ANALYTICS_ROLLUP_INTERVAL_SECONDS: float = 30.0
+    ANALYTICS_ROLLUP_LAG_SECONDS: float = 10.0
+    ANALYTICS_ROLLUP_BATCH_SIZE: int = 5000
+    EVENT_WRITER_BATCH_SIZE: int = 500
+    EVENT_WRITER_FLUSH_INTERVAL_SECONDS: float = 0.5
+    EVENT_WRITER_QUEUE_MAX: int = 10000
+    EVENT_WRITER_COPY_THRESHOLD: int = 2000  # batches this large use COPY
+    EVENTS_PARTITION_MONTHS_AHEAD: int = 3
+    EVENTS_RETENTION_MONTHS: int = 0  # 0 keeps every partition
+    # Record an audit event for every successful mutating API request
+    AUDIT_MUTATIONS: bool = True
+    # Server-Sent Events stream fed by LISTEN/NOTIFY (app.services.stream)
+    STREAM_HEARTBEAT_SECONDS: float = 15.0
+    STREAM_REPLAY_BUFFER: int = 256  # messages kept per company for Last-Event-ID
+    STREAM_SUBSCRIBER_QUEUE: int = 100
+    STREAM_MAX_SUBSCRIBERS: int = 10000  # per worker
+    # Outbox dispatcher for webhooks (app.services.outbox)
+    OUTBOX_POLL_INTERVAL_SECONDS: float = 2.0
+    OUTBOX_BATCH_SIZE: int = 50
+    OUTBOX_CONCURRENCY: int = 10
+    OUTBOX_LEASE_SECONDS: float = 60.0
+    OUTBOX_MAX_ATTEMPTS: int = 8
+    OUTBOX_BACKOFF_BASE_SECONDS: float = 2.0
+    OUTBOX_BACKOFF_MAX_SECONDS: float = 600.0
+    # Scan scheduler (app.services.scan_scheduler). "n8n" triggers the workflow
+    # through the outbox; "local" runs repo_scanner in this process.
+    SCAN_EXECUTOR: str = "n8n"  # "n8n" | "local"
+    SCAN_MAX_RUNNING: int = 20  # across all companies and workers
+    SCAN_MAX_RUNNING_PER_COMPANY: int = 2
+    SCAN_WORKER_CONCURRENCY: int = 4  # local scans per worker process
+    SCAN_POLL_INTERVAL_SECONDS: float = 2.0
+    SCAN_HEARTBEAT_SECONDS: float = 15.0
+    SCAN_LEASE_SECONDS: float = 60.0  # local scans, renewed by each heartbeat
+    SCAN_N8N_LEASE_SECONDS: float = 1800.0  # n8n scans get no heartbeat: time for the whole workflow
+    SCAN_MAX_ATTEMPTS: int = 3
+    SCAN_REAPER_INTERVAL_SECONDS: float = 30.0
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,137 @@
+"""
+Long-lived outbound HTTP clients, one per upstream.
+
+Each upstream (n8n, OpenAI) gets its own pooled httpx.AsyncClient, so its
+connection limits act as a per-host cap and one slow upstream cannot
+starve the others. Clients are created on first use and closed by the app
+lifespan. HTTP/2 is negotiated over TLS when the optional `h2` package is
+installed (httpx[http2]); otherwise the client stays on HTTP/1.1 keep-alive.
+
+Every request is traced, so stats() reports how many requests reused a
+pooled connection instead of paying for a new TCP (and TLS) handshake.
+"""
+import importlib.util
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import httpx
+
+from app.core.config import settings
+
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+@dataclass
+class ClientConfig:
+    timeout: float
+    max_connections: int
+    max_keepalive_connections: Optional[int] = None
+
+
+CLIENT_CONFIGS: Dict[str, ClientConfig] = {
+    "n8n": ClientConfig(
+        timeout=settings.N8N_TIMEOUT_SECONDS,
+        max_connections=settings.HTTP_N8N_MAX_CONNECTIONS,
+    ),
+    "openai": ClientConfig(
+        timeout=settings.OPENAI_TIMEOUT_SECONDS,
+        max_connections=settings.HTTP_OPENAI_MAX_CONNECTIONS,
+    ),
+}
+
+
+class ConnectionStats:
+    def __init__(self):
+        self.requests = 0
+        self.new_connections = 0
+        self.tls_handshakes = 0
+        self.http2_requests = 0
+        self.errors = 0
+
+    async def trace(self, event_name: str, info: Dict[str, Any]) -> None:
+        if event_name == "connection.connect_tcp.complete":
+            self.new_connections += 1
+        elif event_name == "connection.start_tls.complete":
+            self.tls_handshakes += 1
+        elif event_name == "http2.send_request_headers.started":
+            self.http2_requests += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        reused = max(self.requests - self.new_connections, 0)
+        return {
+            "requests": self.requests,
+            "new_connections": self.new_connections,
+            "reused_connections": reused,
+            "reuse_ratio": round(reused / self.requests, 3) if self.requests else 0.0,
+            "tls_handshakes": self.tls_handshakes,
+            "http2_requests": self.http2_requests,
+            "errors": self.errors,
+        }
+
+
+class MeteredTransport(httpx.AsyncBaseTransport):
+    """Wraps a transport to count requests and the connections they open."""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, stats: ConnectionStats):
+        self.inner = inner
+        self.stats = stats
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.stats.requests += 1
+        caller_trace = request.extensions.get("trace")
+
+        async def trace(event_name: str, info: Dict[str, Any]) -> None:
+            await self.stats.trace(event_name, info)
+            if caller_trace is not None:
+                result = caller_trace(event_name, info)
+                if hasattr(result, "__await__"):
+                    await result
+
+        request.extensions = {**request.extensions, "trace": trace}
+        try:
+            return await self.inner.handle_async_request(request)
+        except Exception:
+            self.stats.errors += 1
+            raise
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+def build_client(config: ClientConfig, stats: ConnectionStats, **kwargs: Any) -> httpx.AsyncClient:
+    http2 = settings.HTTP_CLIENT_HTTP2 and HTTP2_AVAILABLE
+    limits = httpx.Limits(
+        max_connections=config.max_connections,
+        max_keepalive_connections=config.max_keepalive_connections or config.max_connections,
+        keepalive_expiry=settings.HTTP_CLIENT_KEEPALIVE_EXPIRY_SECONDS,
+    )
+    transport = MeteredTransport(httpx.AsyncHTTPTransport(http2=http2, limits=limits), stats)
+    return httpx.AsyncClient(timeout=config.timeout, transport=transport, **kwargs)
+
+
+class HTTPClients:
+    def __init__(self, configs: Dict[str, ClientConfig]):
+        self.configs = configs
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._stats: Dict[str, ConnectionStats] = {name: ConnectionStats() for name in configs}
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = self._clients[name] = build_client(self.configs[name], self._stats[name])
+        return client
+
+    async def aclose(self) -> None:
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "http2": settings.HTTP_CLIENT_HTTP2 and HTTP2_AVAILABLE,
+            **{name: stats.as_dict() for name, stats in self._stats.items()},
+        }
+
+
+http_clients = HTTPClients(CLIENT_CONFIGS)
@@ -9,4 +9,5 @@ class Base(DeclarativeBase):
 
 class TimestampMixin:
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
\ No newline at end of file
+    # Part of the keyset pagination key (app.api.pagination), so never NULL
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
\ No newline at end of file
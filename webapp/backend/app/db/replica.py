@@ -0,0 +1,75 @@
+import asyncio
+import time
+from typing import Any, Dict, Optional
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class ReplicaMonitor:
+    """
+    Decides whether the read replica may serve a request.
+
+    Replication lag is sampled at most every `check_interval` seconds and
+    shared by all requests on the worker. A replica that errors or lags by
+    more than `max_lag` is skipped; after an error it is not probed again
+    for `retry_after` seconds.
+    """
+
+    def __init__(self, engine: AsyncEngine, max_lag: float, check_interval: float, retry_after: float):
+        self.engine = engine
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.retry_after = retry_after
+        self.usable = False
+        self.lag_seconds: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.fallbacks = 0
+        self._next_check = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def is_usable(self) -> bool:
+        if time.monotonic() >= self._next_check:
+            if self._lock is None:
+                self._lock = asyncio.Lock()
+            async with self._lock:
+                if time.monotonic() >= self._next_check:
+                    await self._probe()
+        if not self.usable:
+            self.fallbacks += 1
+        return self.usable
+
+    async def _probe(self) -> None:
+        try:
+            async with asyncio.timeout(self.check_interval):
+                async with self.engine.connect() as conn:
+                    lag = float((await conn.execute(REPLICA_LAG_SQL)).scalar_one())
+        except Exception as exc:  # noqa: BLE001
+            print(f"[DB] WARNING: read replica unavailable, using primary: {type(exc).__name__}: {exc}")
+            self.usable = False
+            self.lag_seconds = None
+            self.last_error = f"{type(exc).__name__}: {exc}"[:300]
+            self._next_check = time.monotonic() + self.retry_after
+            return
+
+        self.lag_seconds = lag
+        self.usable = lag <= self.max_lag
+        self.last_error = None
+        self._next_check = time.monotonic() + self.check_interval
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "usable": self.usable,
+            "lag_seconds": self.lag_seconds,
+            "max_lag_seconds": self.max_lag,
+            "fallbacks": self.fallbacks,
+            "last_error": self.last_error,
+        }
@@ -1,14 +1,168 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+import asyncio
+import time
+from typing import Any, Dict
+from uuid import uuid4
+import orjson
+from fastapi import Request
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.db.replica import ReplicaMonitor
 
 
-engine = create_async_engine(settings.DATABASE_URL, echo=False)
+def _json_serializer(value: Any) -> str:
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+def _engine_options() -> Dict[str, Any]:
+    connect_args: Dict[str, Any] = {
+        "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        "prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+    }
+    if settings.DB_COMMAND_TIMEOUT_SECONDS:
+        connect_args["command_timeout"] = settings.DB_COMMAND_TIMEOUT_SECONDS
+    if settings.DB_PGBOUNCER_MODE:
+        connect_args.update(
+            statement_cache_size=0,
+            prepared_statement_cache_size=0,
+            prepared_statement_name_func=lambda: f"__asyncpg_{uuid4()}__",
+        )
+
+    return {
+        "echo": False,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "connect_args": connect_args,
+        # JSONB columns (steps, summaries, answers) round-trip through orjson
+        "json_serializer": _json_serializer,
+        "json_deserializer": orjson.loads,
+    }
+
+
+engine = create_async_engine(settings.DATABASE_URL, **_engine_options())
 AsyncSessionLocal = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+read_engine: AsyncEngine | None = None
+ReadSessionLocal: async_sessionmaker | None = None
+replica_monitor: ReplicaMonitor | None = None
+if settings.DATABASE_READ_URL:
+    read_engine = create_async_engine(settings.DATABASE_READ_URL, **_engine_options())
+    ReadSessionLocal = async_sessionmaker(read_engine, class_=AsyncSession, expire_on_commit=False)
+    replica_monitor = ReplicaMonitor(
+        read_engine,
+        max_lag=settings.READ_REPLICA_MAX_LAG_SECONDS,
+        check_interval=settings.READ_REPLICA_CHECK_INTERVAL_SECONDS,
+        retry_after=settings.READ_REPLICA_RETRY_AFTER_SECONDS,
+    )
+
+# Users (by authenticated user id) that recently committed on the primary.
+# In-memory, so read-your-writes only holds for reads served by the same
+# worker process as the write.
+_REQUEST_KEY = "request"
+recent_writers: TTLCache[bool] = TTLCache(
+    max_size=100_000,
+    ttl_seconds=settings.READ_YOUR_WRITES_WINDOW_SECONDS,
+)
+
+_pool_counters = {"connects": 0, "checkouts": 0, "invalidations": 0}
+
+
+@event.listens_for(engine.sync_engine, "connect")
+def _count_connect(dbapi_connection, connection_record):
+    _pool_counters["connects"] += 1
+
+
+@event.listens_for(engine.sync_engine, "checkout")
+def _count_checkout(dbapi_connection, connection_record, connection_proxy):
+    _pool_counters["checkouts"] += 1
+
+
+@event.listens_for(engine.sync_engine, "invalidate")
+def _count_invalidate(dbapi_connection, connection_record, exception):
+    _pool_counters["invalidations"] += 1
+
 
-async def get_db():
+def pool_status(db_engine: AsyncEngine = engine) -> Dict[str, Any]:
+    pool = db_engine.pool
+    capacity = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+    checked_out = pool.checkedout()
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": checked_out,
+        "overflow": pool.overflow(),
+        "capacity": capacity,
+        "utilization": round(checked_out / capacity, 3) if capacity else 0.0,
+        "exhausted": checked_out >= capacity,
+        **_pool_counters,
+    }
+
+
+async def check_database(db_engine: AsyncEngine = engine) -> Dict[str, Any]:
+    """Round-trip a SELECT 1 through the pool, bounded by DB_HEALTH_TIMEOUT_SECONDS."""
+    started = time.perf_counter()
+    try:
+        async with asyncio.timeout(settings.DB_HEALTH_TIMEOUT_SECONDS):
+            async with db_engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+    except Exception as exc:  # noqa: BLE001
+        return {
+            "reachable": False,
+            "error": f"{type(exc).__name__}: {exc}"[:300],
+            "pool": pool_status(db_engine),
+        }
+    return {
+        "reachable": True,
+        "latency_ms": round(1000 * (time.perf_counter() - started), 2),
+        "pool": pool_status(db_engine),
+    }
+
+
+@event.listens_for(Session, "after_commit")
+def _remember_writer(session: Session) -> None:
+    request = session.info.get(_REQUEST_KEY)
+    user_id = _caller_id(request) if request is not None else None
+    if user_id:
+        recent_writers.set(user_id, True)
+
+
+def _caller_id(request: Request) -> str | None:
+    # Set by the auth dependencies (app.api.deps) once the caller is known;
+    # get_db runs before them, so it is read at commit time
+    actor = getattr(request.state, "audit_actor", None)
+    return str(actor[0]) if actor else None
+
+
+async def get_db(request: Request):
     async with AsyncSessionLocal() as session:
+        session.sync_session.info[_REQUEST_KEY] = request
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
+async def get_read_db(request: Request):
+    """
+    Session for read-only routes. Uses the replica when one is configured,
+    healthy and within the lag budget, unless the caller wrote recently
+    (through this process). Declare it after the route's auth dependency,
+    which identifies the caller.
+    """
+    user_id = _caller_id(request)
+    use_replica = (
+        ReadSessionLocal is not None
+        and not (user_id and recent_writers.get(user_id))
+        and await replica_monitor.is_usable()
+    )
+    session_factory = ReadSessionLocal if use_replica else AsyncSessionLocal
+    async with session_factory() as session:
         try:
             yield session
         finally:
-            await session.close()
\ No newline at end of file
+            await session.close()
@@ -1,9 +1,53 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.routes import (
     auth, companies, template_parts, templates,
-    questionnaires, toolsets, onboardings, repos, events
+    questionnaires, toolsets, onboardings, repos, events, users, stream
 )
+from app.db.session import check_database, read_engine, replica_monitor
+from app.core.config import settings
+from app.core.http import http_clients
+from app.schemas.common import ERROR_BODY_PREFIX
+from app.services.analytics_rollups import run_rollup_worker
+from app.services.event_partitions import run_partition_maintenance
+from app.services.event_writer import event_writer, make_event
+from app.services.outbox import outbox_dispatcher
+from app.services.principal_cache import principal_cache
+from app.services.repo_mirror import repo_mirror
+from app.services.repo_scanner import repo_scanner
+from app.services.scan_cache import scan_cache
+from app.services.scan_scheduler import scan_scheduler
+from app.services.stream import stream_hub
+from app.services.onboarding_steps import toolset_steps_cache
+from app.services.password_service import password_service
+from app.services.user_provisioning import bulk_password_service
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    workers = [asyncio.create_task(run_partition_maintenance())]
+    if settings.ANALYTICS_ROLLUP_INTERVAL_SECONDS > 0:
+        workers.append(asyncio.create_task(run_rollup_worker()))
+    event_writer.start()
+    stream_hub.start()
+    outbox_dispatcher.start()
+    scan_scheduler.start()
+    yield
+    await scan_scheduler.stop()
+    await outbox_dispatcher.stop()
+    await http_clients.aclose()
+    await stream_hub.stop()
+    await event_writer.stop()
+    for worker in workers:
+        worker.cancel()
+    await asyncio.gather(*workers, return_exceptions=True)
+    password_service.shutdown()
+    bulk_password_service.shutdown()
+    repo_scanner.shutdown()
+
 
 # Create FastAPI app
 app = FastAPI(
@@ -11,7 +55,8 @@ app = FastAPI(
     description="Admin app for developer onboarding configuration and tracking",
     version="0.1.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # Configure CORS - open for hackathon
@@ -23,6 +68,47 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+MUTATING_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+@app.middleware("http")
+async def audit_mutations(request: Request, call_next):
+    response = await call_next(request)
+    # Set by the auth dependencies; anonymous requests (login, register) are skipped
+    actor = getattr(request.state, "audit_actor", None)
+    if (
+        not settings.AUDIT_MUTATIONS
+        or actor is None
+        or request.method not in MUTATING_METHODS
+        or response.status_code >= 400
+    ):
+        return response
+
+    # Rejections come back as HTTP 200 with ok=false (error_response), so
+    # success is read from the envelope. Mutation responses are small JSON
+    # bodies; buffering them here is cheap.
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    response = Response(
+        body,
+        status_code=response.status_code,
+        headers=response.headers,
+        background=response.background,
+    )
+    if body.startswith(ERROR_BODY_PREFIX):
+        return response
+
+    user_id, company_id = actor
+    route = request.scope.get("route")
+    await event_writer.emit(make_event(
+        company_id,
+        "user",
+        user_id,
+        f"{request.method} {route.path if route else request.url.path}",
+        {"path_params": request.path_params, "status_code": response.status_code},
+    ))
+    return response
+
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(companies.router)
@@ -33,6 +119,8 @@ app.include_router(toolsets.router)
 app.include_router(onboardings.router)
 app.include_router(repos.router)
 app.include_router(events.router)
+app.include_router(users.router)
+app.include_router(stream.router)
 
 
 @app.get("/")
@@ -46,4 +134,33 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {
+        "status": "healthy",
+        "principal_cache": principal_cache.stats(),
+        "toolset_steps_cache": toolset_steps_cache.stats(),
+        "password_service": password_service.stats(),
+        "event_writer": event_writer.stats(),
+        "stream": stream_hub.stats(),
+        "outbox": outbox_dispatcher.stats(),
+        "scan_scheduler": scan_scheduler.stats(),
+        "http_clients": http_clients.stats(),
+        "repo_scanner": repo_scanner.stats(),
+        "scan_cache": scan_cache.stats(),
+        "repo_mirror": repo_mirror.stats(),
+    }
+
+
+@app.get("/health/ready")
+async def readiness_check():
+    database = await check_database()
+    content = {
+        "status": "ready" if database["reachable"] else "unavailable",
+        "database": database,
+    }
+    if read_engine is not None:
+        # A degraded replica does not fail readiness: reads fall back to the primary
+        content["replica"] = {
+            **await check_database(read_engine),
+            "routing": replica_monitor.stats(),
+        }
+    return JSONResponse(status_code=200 if database["reachable"] else 503, content=content)
@@ -0,0 +1,39 @@
+from sqlalchemy import Column, String, Integer, Float, Date, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from app.db.base import Base
+
+
+class OnboardingRollup(Base):
+    """Daily onboarding counts and time-to-complete sketch per company/role/template version."""
+    __tablename__ = "onboarding_rollups"
+
+    company_id = Column(UUID(as_uuid=True), ForeignKey("companies.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    role_key = Column(String, primary_key=True)
+    template_version = Column(Integer, primary_key=True)
+    started = Column(Integer, default=0, nullable=False)
+    completed = Column(Integer, default=0, nullable=False)
+    completion_seconds_sum = Column(Float, default=0.0, nullable=False)
+    completion_sketch = Column(JSONB, default=dict, nullable=False)  # app.services.sketch
+
+
+class OnboardingStepRollup(Base):
+    """Daily per-step dwell time (started -> completed) sketch."""
+    __tablename__ = "onboarding_step_rollups"
+
+    company_id = Column(UUID(as_uuid=True), ForeignKey("companies.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    role_key = Column(String, primary_key=True)
+    template_version = Column(Integer, primary_key=True)
+    step_id = Column(String, primary_key=True)
+    completions = Column(Integer, default=0, nullable=False)
+    dwell_sketch = Column(JSONB, default=dict, nullable=False)
+
+
+class RollupWatermark(Base):
+    """Position of the last event folded into the rollups, per rollup job."""
+    __tablename__ = "rollup_watermarks"
+
+    name = Column(String, primary_key=True)
+    last_created_at = Column(DateTime, nullable=False)
+    last_event_id = Column(UUID(as_uuid=True), nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 import uuid
 from datetime import datetime
@@ -7,6 +7,14 @@ from app.db.base import Base
 
 class Event(Base):
     __tablename__ = "events"
+    # Range-partitioned by month on created_at (migration 009), hence the
+    # composite primary key
+    __table_args__ = (
+        Index("ix_events_company_created", "company_id", "created_at", "id"),
+        # Rollup worker scans by (created_at, id) across companies
+        Index("ix_events_created", "created_at", "id"),
+        Index("ix_events_company_entity", "company_id", "entity", "entity_id", "created_at"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     company_id = Column(UUID(as_uuid=True), ForeignKey("companies.id"), nullable=False)
@@ -14,4 +22,4 @@ class Event(Base):
     entity_id = Column(UUID(as_uuid=True), nullable=False)
     action = Column(String, nullable=False)
     payload = Column(JSONB, default=dict)
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
\ No newline at end of file
+    created_at = Column(DateTime, default=datetime.utcnow, primary_key=True)
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey, Enum, Integer
+from sqlalchemy import Column, ForeignKey, Enum, Integer, Index, String, DateTime, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 import uuid
 from app.db.base import Base, TimestampMixin
@@ -11,8 +11,18 @@ class OnboardingStatus(str, enum.Enum):
     PAUSED = "paused"
 
 
+class StepStorage(str, enum.Enum):
+    JSONB = "jsonb"  # step status lives inside onboarding_states.steps
+    TABLE = "table"  # step status lives in onboarding_steps; steps keeps the definitions
+
+
 class OnboardingState(Base, TimestampMixin):
     __tablename__ = "onboarding_states"
+    __table_args__ = (
+        Index("ix_onboarding_states_company_updated", "company_id", "updated_at", "id"),
+        Index("ix_onboarding_states_company_status", "company_id", "status"),
+        Index("ix_onboarding_states_user_id", "user_id"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     company_id = Column(UUID(as_uuid=True), ForeignKey("companies.id"), nullable=False)
@@ -21,4 +31,24 @@ class OnboardingState(Base, TimestampMixin):
     toolset_id = Column(UUID(as_uuid=True), ForeignKey("toolsets.id"), nullable=False)
     status = Column(Enum(OnboardingStatus), default=OnboardingStatus.ACTIVE, nullable=False)
     progress = Column(Integer, default=0, nullable=False)
-    steps = Column(JSONB, default=list)
\ No newline at end of file
+    steps = Column(JSONB, default=list)
+    step_storage = Column(String(16), default=StepStorage.JSONB.value, server_default=StepStorage.JSONB.value, nullable=False)
+    # Maintained incrementally by step transitions so progress never needs a full recount
+    total_steps = Column(Integer, default=0, server_default=text("0"), nullable=False)
+    completed_steps = Column(Integer, default=0, server_default=text("0"), nullable=False)
+    # Optimistic concurrency: ORM flushes check and bump it, raw transition SQL bumps it too
+    version = Column(Integer, nullable=False, server_default=text("1"))
+
+    __mapper_args__ = {"version_id_col": version}
+
+
+class OnboardingStep(Base):
+    __tablename__ = "onboarding_steps"
+
+    onboarding_id = Column(UUID(as_uuid=True), ForeignKey("onboarding_states.id", ondelete="CASCADE"), primary_key=True)
+    step_id = Column(String, primary_key=True)
+    position = Column(Integer, nullable=False)
+    status = Column(String, default="pending", nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
+    validation_result = Column(JSONB, nullable=True)
\ No newline at end of file
@@ -0,0 +1,38 @@
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Index, text
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+import uuid
+from datetime import datetime
+from app.db.base import Base
+import enum
+
+
+class OutboxStatus(str, enum.Enum):
+    PENDING = "pending"
+    DELIVERED = "delivered"
+    DEAD = "dead"  # gave up; kept for inspection and manual replay
+
+
+class OutboxMessage(Base):
+    """A side effect (e.g. a webhook) committed with the change that caused it."""
+    __tablename__ = "outbox_messages"
+    __table_args__ = (
+        # Dispatcher claim query: due pending messages only
+        Index(
+            "ix_outbox_messages_due", "next_attempt_at",
+            postgresql_where=text("status = 'pending'"),
+        ),
+        Index("ix_outbox_messages_aggregate", "aggregate_id"),
+    )
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    company_id = Column(UUID(as_uuid=True), ForeignKey("companies.id"), nullable=False)
+    topic = Column(String, nullable=False)
+    aggregate_id = Column(UUID(as_uuid=True), nullable=False)
+    payload = Column(JSONB, default=dict, nullable=False)
+    status = Column(String(16), default=OutboxStatus.PENDING.value, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    locked_until = Column(DateTime)  # lease held by a dispatcher while delivering
+    last_error = Column(String)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    delivered_at = Column(DateTime)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime, ForeignKey
+from sqlalchemy import Column, DateTime, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 import uuid
 from datetime import datetime
@@ -7,6 +7,9 @@ from app.db.base import Base
 
 class Questionnaire(Base):
     __tablename__ = "questionnaires"
+    __table_args__ = (
+        Index("ix_questionnaires_template_id", "template_id"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     company_id = Column(UUID(as_uuid=True), ForeignKey("companies.id"), nullable=False)
@@ -18,6 +21,9 @@ class Questionnaire(Base):
 
 class ToolSet(Base):
     __tablename__ = "toolsets"
+    __table_args__ = (
+        Index("ix_toolsets_questionnaire_id", "questionnaire_id"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     company_id = Column(UUID(as_uuid=True), ForeignKey("companies.id"), nullable=False)
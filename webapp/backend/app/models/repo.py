@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Enum, Index, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 import uuid
 from datetime import datetime
@@ -20,6 +20,9 @@ class ScanStatus(str, enum.Enum):
 
 class Repo(Base):
     __tablename__ = "repos"
+    __table_args__ = (
+        Index("ix_repos_company_created", "company_id", "created_at", "id"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     company_id = Column(UUID(as_uuid=True), ForeignKey("companies.id"), nullable=False)
@@ -32,9 +35,26 @@ class Repo(Base):
 
 class RepoScan(Base, TimestampMixin):
     __tablename__ = "repo_scans"
+    __table_args__ = (
+        Index("ix_repo_scans_company_updated", "company_id", "updated_at", "id"),
+        Index("ix_repo_scans_repo_created", "repo_id", "created_at"),
+        # At most one queued or running scan per repo (scan_scheduler dedup)
+        Index(
+            "uq_repo_scans_repo_active", "repo_id", unique=True,
+            postgresql_where=text("status IN ('QUEUED', 'RUNNING')"),
+        ),
+        # Scheduler claim order and running-slot counts
+        Index("ix_repo_scans_queued", "company_id", "created_at", postgresql_where=text("status = 'QUEUED'")),
+        Index("ix_repo_scans_running", "company_id", postgresql_where=text("status = 'RUNNING'")),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     company_id = Column(UUID(as_uuid=True), ForeignKey("companies.id"), nullable=False)
     repo_id = Column(UUID(as_uuid=True), ForeignKey("repos.id"), nullable=False)
     status = Column(Enum(ScanStatus), default=ScanStatus.QUEUED, nullable=False)
-    summary = Column(JSONB, default=dict)
\ No newline at end of file
+    summary = Column(JSONB, default=dict)
+    attempts = Column(Integer, default=0, nullable=False)
+    worker_id = Column(String)  # scheduler worker that claimed the current attempt
+    started_at = Column(DateTime)
+    heartbeat_at = Column(DateTime)
+    lease_expires_at = Column(DateTime)  # the reaper takes RUNNING scans back after this
\ No newline at end of file
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from datetime import datetime
+from app.db.base import Base
+
+
+class ScanSnapshot(Base):
+    """The summary a repo scanned to at one commit, with its manifest blobs."""
+    __tablename__ = "scan_snapshots"
+    __table_args__ = (
+        Index("ix_scan_snapshots_repo_created", "repo_id", "created_at"),
+    )
+    
+    repo_id = Column(UUID(as_uuid=True), ForeignKey("repos.id", ondelete="CASCADE"), primary_key=True)
+    commit_sha = Column(String(64), primary_key=True)
+    fingerprint = Column(String(64), nullable=False)  # TreeListing.fingerprint()
+    manifests = Column(JSONB, default=dict, nullable=False)  # {path: blob sha}
+    summary = Column(JSONB, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class ManifestParse(Base):
+    """Parse result of one manifest blob, shared by every commit that contains it."""
+    __tablename__ = "scan_manifest_cache"
+    
+    repo_id = Column(UUID(as_uuid=True), ForeignKey("repos.id", ondelete="CASCADE"), primary_key=True)
+    blob_sha = Column(String(64), primary_key=True)
+    kind = Column(String(32), primary_key=True)
+    result = Column(JSONB, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, ForeignKey, Enum, Integer
+from sqlalchemy import Column, String, ForeignKey, Enum, Integer, Index
 from sqlalchemy.dialects.postgresql import UUID, JSONB, ARRAY
 import uuid
 from app.db.base import Base, TimestampMixin
@@ -12,6 +12,15 @@ class TemplateStatus(str, enum.Enum):
 
 class TemplatePart(Base, TimestampMixin):
     __tablename__ = "template_parts"
+    __table_args__ = (
+        Index("ix_template_parts_company_updated", "company_id", "updated_at", "id"),
+        Index("ix_template_parts_company_role", "company_id", "role_key"),
+        Index("ix_template_parts_source_scan", "source_scan_id"),
+        Index(
+            "ix_template_parts_tags", "tags",
+            postgresql_using="gin", postgresql_ops={"tags": "jsonb_path_ops"},
+        ),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     company_id = Column(UUID(as_uuid=True), ForeignKey("companies.id"), nullable=False)
@@ -21,10 +30,16 @@ class TemplatePart(Base, TimestampMixin):
     tags = Column(JSONB, default=list)
     fields = Column(JSONB, default=list)
     validators = Column(JSONB, default=list)
+    # Scan whose result created this part; makes scan result replays no-ops
+    source_scan_id = Column(UUID(as_uuid=True), ForeignKey("repo_scans.id", ondelete="SET NULL"))
 
 
 class OnboardingTemplate(Base, TimestampMixin):
     __tablename__ = "onboarding_templates"
+    __table_args__ = (
+        Index("ix_onboarding_templates_company_updated", "company_id", "updated_at", "id"),
+        Index("ix_onboarding_templates_company_role", "company_id", "role_key"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     company_id = Column(UUID(as_uuid=True), ForeignKey("companies.id"), nullable=False)
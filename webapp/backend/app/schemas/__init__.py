@@ -10,7 +10,8 @@ from app.schemas.questionnaire import (
     ToolSetCreate, ToolSetResponse
 )
 from app.schemas.onboarding import (
-    OnboardingCreate, OnboardingResponse, StepValidate
+    OnboardingCreate, OnboardingResponse, OnboardingSummary, StepValidate,
+    StepBatchOp, StepBatchRequest, StepBatchOpResult
 )
 from app.schemas.repo import RepoCreate, RepoResponse, RepoScanResponse
 from app.schemas.event import EventResponse
@@ -25,7 +26,8 @@ __all__ = [
     "OnboardingTemplateCreate", "OnboardingTemplateUpdate", "OnboardingTemplateResponse",
     "QuestionnaireCreate", "QuestionnaireResponse", "AnswersUpdate",
     "ToolSetCreate", "ToolSetResponse",
-    "OnboardingCreate", "OnboardingResponse", "StepValidate",
+    "OnboardingCreate", "OnboardingResponse", "OnboardingSummary", "StepValidate",
+    "StepBatchOp", "StepBatchRequest", "StepBatchOpResult",
     "RepoCreate", "RepoResponse", "RepoScanResponse",
     "EventResponse",
     "APIResponse"
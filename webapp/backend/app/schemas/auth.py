@@ -14,6 +14,16 @@ class TokenData(BaseModel):
     role: Optional[str] = None
 
 
+class Principal(BaseModel):
+    user_id: UUID
+    company_id: UUID
+    role: str
+
+    @property
+    def is_admin(self) -> bool:
+        return self.role == "admin"
+
+
 class UserInfo(BaseModel):
     id: UUID
     email: str
@@ -1,5 +1,10 @@
-from typing import Optional, Any, Dict
-from pydantic import BaseModel
+from functools import lru_cache
+from typing import Optional, Any, Dict, Iterable, List, Type, TypeVar
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, TypeAdapter
+
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
 
 
 class ErrorDetail(BaseModel):
@@ -11,11 +16,63 @@ class APIResponse(BaseModel):
     ok: bool
     data: Optional[Any] = None
     error: Optional[ErrorDetail] = None
+    next_cursor: Optional[str] = None
+
+
+@lru_cache(maxsize=None)
+def _list_adapter(schema: Type[ModelT]) -> TypeAdapter:
+    return TypeAdapter(List[schema])
+
+
+def dump_model(schema: Type[ModelT], obj: Any) -> Dict[str, Any]:
+    """Validate an ORM object (or mapping) against `schema` and dump it in one pass."""
+    return schema.model_validate(obj, from_attributes=True).model_dump()
+
+
+def dump_models(schema: Type[ModelT], rows: Iterable[Any]) -> List[Dict[str, Any]]:
+    """List variant of `dump_model` using a cached TypeAdapter for the whole batch."""
+    adapter = _list_adapter(schema)
+    return adapter.dump_python(adapter.validate_python(list(rows), from_attributes=True))
+
+
+def success_response(data: Any, **meta: Any) -> ORJSONResponse:
+    # `meta` carries envelope extras such as `next_cursor` for paginated lists.
+    # Returning a Response skips FastAPI's jsonable_encoder pass; orjson handles
+    # datetimes, UUIDs and enums natively.
+    return ORJSONResponse({"ok": True, "data": data, **meta})
+
+
+# Every error_response body starts with this (orjson keeps key order and adds
+# no whitespace); lets middleware tell failures apart despite the HTTP 200
+ERROR_BODY_PREFIX = b'{"ok":false'
+
+
+def error_response(code: str, message: str, status_code: int = 200) -> ORJSONResponse:
+    # Errors use HTTP 200 with ok=false, except where the status carries
+    # protocol meaning (e.g. 412 for a failed If-Match)
+    return ORJSONResponse(
+        {"ok": False, "error": {"code": code, "message": message}},
+        status_code=status_code,
+    )
 
 
-def success_response(data: Any) -> Dict[str, Any]:
-    return {"ok": True, "data": data}
+def json_request_body(schema: Type[BaseModel]) -> Dict[str, Any]:
+    """
+    OpenAPI requestBody for routes that read and validate the body
+    themselves (openapi_extra). Nested models are inlined, since the
+    schema is not registered under components.
+    """
+    json_schema = schema.model_json_schema()
+    defs = json_schema.pop("$defs", {})
 
+    def inline(node: Any) -> Any:
+        if isinstance(node, dict):
+            ref = node.get("$ref", "")
+            if ref.startswith("#/$defs/"):
+                return inline(defs[ref.removeprefix("#/$defs/")])
+            return {key: inline(value) for key, value in node.items()}
+        if isinstance(node, list):
+            return [inline(item) for item in node]
+        return node
 
-def error_response(code: str, message: str) -> Dict[str, Any]:
-    return {"ok": False, "error": {"code": code, "message": message}}
\ No newline at end of file
+    return {"required": True, "content": {"application/json": {"schema": inline(json_schema)}}}
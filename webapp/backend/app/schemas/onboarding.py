@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from uuid import UUID
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Literal
 from datetime import datetime
 
 
@@ -19,6 +19,7 @@ class OnboardingResponse(BaseModel):
     status: str
     progress: int
     steps: List[Dict[str, Any]]
+    version: int
     created_at: datetime
     updated_at: datetime
     
@@ -26,11 +27,45 @@ class OnboardingResponse(BaseModel):
         from_attributes = True
 
 
+class OnboardingSummary(BaseModel):
+    id: UUID
+    company_id: UUID
+    user_id: UUID
+    template_id: UUID
+    toolset_id: UUID
+    status: str
+    progress: int
+    total_steps: int
+    completed_steps: int
+    in_progress_steps: int
+    created_at: datetime
+    updated_at: datetime
+
+
 class StepValidate(BaseModel):
     status: str  # "passed" | "failed"
     details: Optional[Dict[str, Any]] = None
 
 
+class StepBatchOp(BaseModel):
+    op: Literal["start", "complete", "validate"]
+    step_id: str
+    status: Optional[str] = None  # validate only: "passed" | "failed"
+    details: Optional[Dict[str, Any]] = None
+
+
+class StepBatchRequest(BaseModel):
+    ops: List[StepBatchOp]
+
+
+class StepBatchOpResult(BaseModel):
+    index: int
+    op: str
+    step_id: str
+    ok: bool
+    error: Optional[str] = None
+
+
 class RecentOnboardingItem(BaseModel):
     id: UUID
     status: str
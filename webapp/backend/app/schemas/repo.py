@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from uuid import UUID
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from datetime import datetime
 
 
@@ -30,6 +30,9 @@ class RepoScanResponse(BaseModel):
     repo_id: UUID
     status: str
     summary: Dict[str, Any]
+    attempts: int = 0
+    started_at: Optional[datetime] = None
+    heartbeat_at: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
 
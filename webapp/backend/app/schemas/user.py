@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr
 from uuid import UUID
-from typing import Optional
+from typing import Optional, Literal
 from datetime import datetime
 
 
@@ -29,3 +29,18 @@ class UserResponse(BaseModel):
     
     class Config:
         from_attributes = True
+
+
+class UserBulkRow(BaseModel):
+    email: EmailStr
+    name: str
+    password: str
+    role: Literal["admin", "dev"] = "dev"
+
+
+class UserBulkRowResult(BaseModel):
+    row: int
+    email: Optional[str] = None
+    status: str  # "created" | "exists" | "duplicate" | "invalid"
+    id: Optional[UUID] = None
+    error: Optional[str] = None
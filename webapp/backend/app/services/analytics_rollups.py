@@ -0,0 +1,282 @@
+"""
+Incremental onboarding analytics.
+
+A background worker folds `onboarding_created`, `onboarding_completed` and
+`step_completed` events into daily rollups per company / role / template
+version (app.models.analytics). Each pass reads the events after a
+watermark in (created_at, id) order, aggregates them in memory and upserts
+the touched buckets, adding counters and merging duration sketches
+(app.services.sketch) in SQL. The watermark row is locked with SKIP LOCKED,
+so with several API processes only one folds at a time.
+
+Events newer than ANALYTICS_ROLLUP_LAG_SECONDS are left for the next pass:
+`created_at` is stamped before commit, so a slow transaction can land an
+event behind one that was already folded.
+
+The analytics endpoints then only read the few rollup rows in the window.
+"""
+import asyncio
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.analytics import OnboardingRollup, OnboardingStepRollup, RollupWatermark
+from app.models.event import Event
+from app.models.onboarding import OnboardingState
+from app.models.template import OnboardingTemplate
+from app.services.sketch import LogHistogram
+
+
+WATERMARK_NAME = "onboarding"
+ROLLUP_ACTIONS = ("onboarding_created", "onboarding_completed", "step_completed")
+UNKNOWN_ROLE = "unknown"
+QUANTILES = (("p50", 0.5), ("p90", 0.9), ("p99", 0.99))
+
+
+def _bucket() -> Dict[str, Any]:
+    return {"started": 0, "completed": 0, "completion_seconds_sum": 0.0, "sketch": LogHistogram()}
+
+
+def _step_bucket() -> Dict[str, Any]:
+    return {"completions": 0, "sketch": LogHistogram()}
+
+
+def _fold(rows) -> Tuple[Dict[tuple, Dict[str, Any]], Dict[tuple, Dict[str, Any]]]:
+    buckets: Dict[tuple, Dict[str, Any]] = defaultdict(_bucket)
+    step_buckets: Dict[tuple, Dict[str, Any]] = defaultdict(_step_bucket)
+
+    for row in rows:
+        key = (row.company_id, row.created_at.date(), row.role_key, row.template_version)
+        payload = row.payload or {}
+        if row.action == "onboarding_created":
+            buckets[key]["started"] += 1
+        elif row.action == "onboarding_completed":
+            bucket = buckets[key]
+            bucket["completed"] += 1
+            seconds = payload.get("seconds")
+            if seconds is not None:
+                bucket["completion_seconds_sum"] += seconds
+                bucket["sketch"].add(seconds)
+        elif payload.get("step_id") is not None:
+            bucket = step_buckets[key + (payload["step_id"],)]
+            bucket["completions"] += 1
+            if payload.get("dwell_seconds") is not None:
+                bucket["sketch"].add(payload["dwell_seconds"])
+
+    return buckets, step_buckets
+
+
+async def _upsert_rollups(db: AsyncSession, buckets: Dict[tuple, Dict[str, Any]]) -> None:
+    if not buckets:
+        return
+    stmt = pg_insert(OnboardingRollup).values([
+        {
+            "company_id": company_id,
+            "day": day,
+            "role_key": role_key,
+            "template_version": template_version,
+            "started": bucket["started"],
+            "completed": bucket["completed"],
+            "completion_seconds_sum": bucket["completion_seconds_sum"],
+            "completion_sketch": bucket["sketch"].to_json(),
+        }
+        for (company_id, day, role_key, template_version), bucket in buckets.items()
+    ])
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=["company_id", "day", "role_key", "template_version"],
+        set_={
+            "started": OnboardingRollup.started + stmt.excluded.started,
+            "completed": OnboardingRollup.completed + stmt.excluded.completed,
+            "completion_seconds_sum": (
+                OnboardingRollup.completion_seconds_sum + stmt.excluded.completion_seconds_sum
+            ),
+            "completion_sketch": func.jsonb_sum_merge(
+                OnboardingRollup.completion_sketch, stmt.excluded.completion_sketch
+            ),
+        },
+    ))
+
+
+async def _upsert_step_rollups(db: AsyncSession, buckets: Dict[tuple, Dict[str, Any]]) -> None:
+    if not buckets:
+        return
+    stmt = pg_insert(OnboardingStepRollup).values([
+        {
+            "company_id": company_id,
+            "day": day,
+            "role_key": role_key,
+            "template_version": template_version,
+            "step_id": step_id,
+            "completions": bucket["completions"],
+            "dwell_sketch": bucket["sketch"].to_json(),
+        }
+        for (company_id, day, role_key, template_version, step_id), bucket in buckets.items()
+    ])
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=["company_id", "day", "role_key", "template_version", "step_id"],
+        set_={
+            "completions": OnboardingStepRollup.completions + stmt.excluded.completions,
+            "dwell_sketch": func.jsonb_sum_merge(
+                OnboardingStepRollup.dwell_sketch, stmt.excluded.dwell_sketch
+            ),
+        },
+    ))
+
+
+async def refresh_rollups(db: AsyncSession, batch_size: Optional[int] = None) -> int:
+    """
+    Fold up to `batch_size` new events into the rollups and advance the
+    watermark. Returns the number of events folded (0 when another worker
+    holds the watermark). The caller commits.
+    """
+    if batch_size is None:
+        batch_size = settings.ANALYTICS_ROLLUP_BATCH_SIZE
+
+    watermark = (await db.execute(
+        select(RollupWatermark)
+        .where(RollupWatermark.name == WATERMARK_NAME)
+        .with_for_update(skip_locked=True)
+    )).scalar_one_or_none()
+    if watermark is None:
+        return 0
+
+    horizon = datetime.utcnow() - timedelta(seconds=settings.ANALYTICS_ROLLUP_LAG_SECONDS)
+    result = await db.execute(
+        select(
+            Event.id,
+            Event.company_id,
+            Event.action,
+            Event.payload,
+            Event.created_at,
+            func.coalesce(OnboardingTemplate.role_key, UNKNOWN_ROLE).label("role_key"),
+            func.coalesce(OnboardingTemplate.version, 0).label("template_version"),
+        )
+        .outerjoin(OnboardingState, OnboardingState.id == Event.entity_id)
+        .outerjoin(OnboardingTemplate, OnboardingTemplate.id == OnboardingState.template_id)
+        .where(
+            tuple_(Event.created_at, Event.id) > tuple_(watermark.last_created_at, watermark.last_event_id),
+            Event.created_at < horizon,
+        )
+        .order_by(Event.created_at, Event.id)
+        .limit(batch_size)
+    )
+    rows = result.all()
+    if not rows:
+        return 0
+
+    buckets, step_buckets = _fold(row for row in rows if row.action in ROLLUP_ACTIONS)
+    await _upsert_rollups(db, buckets)
+    await _upsert_step_rollups(db, step_buckets)
+
+    # Unrelated events are scanned too so the watermark moves past them
+    watermark.last_created_at = rows[-1].created_at
+    watermark.last_event_id = rows[-1].id
+    return len(rows)
+
+
+async def run_rollup_worker() -> None:
+    """Refresh the rollups every ANALYTICS_ROLLUP_INTERVAL_SECONDS until cancelled."""
+    while True:
+        folded = 0
+        try:
+            async with AsyncSessionLocal() as db:
+                folded = await refresh_rollups(db)
+                await db.commit()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[ROLLUPS] Refresh failed: {e}")
+        # A full batch means there is a backlog; keep going without sleeping
+        if folded < settings.ANALYTICS_ROLLUP_BATCH_SIZE:
+            await asyncio.sleep(settings.ANALYTICS_ROLLUP_INTERVAL_SECONDS)
+
+
+def _group_key(row: Any, by: str) -> str:
+    if by == "template_version":
+        return f"{row.role_key}@v{row.template_version}"
+    return row.role_key
+
+
+def _hours(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds / 3600, 2)
+
+
+def _minutes(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds / 60, 1)
+
+
+def _window_start(days: int) -> date:
+    return datetime.utcnow().date() - timedelta(days=days - 1)
+
+
+async def onboarding_time_report(db: AsyncSession, company_id: UUID, by: str, days: int) -> Dict[str, Any]:
+    """
+    Completion rate and time-to-complete per role (or role@template version)
+    over the last `days` days. The rate compares completions to starts that
+    fall inside the same window.
+    """
+    result = await db.execute(
+        select(OnboardingRollup).where(
+            OnboardingRollup.company_id == company_id,
+            OnboardingRollup.day >= _window_start(days),
+        )
+    )
+
+    groups: Dict[str, Dict[str, Any]] = defaultdict(_bucket)
+    for row in result.scalars():
+        group = groups[_group_key(row, by)]
+        group["started"] += row.started
+        group["completed"] += row.completed
+        group["completion_seconds_sum"] += row.completion_seconds_sum
+        group["sketch"].merge(LogHistogram(row.completion_sketch))
+
+    data = {}
+    for key, group in sorted(groups.items()):
+        completed, started = group["completed"], group["started"]
+        data[key] = {
+            "avg_completion_time_hours": _hours(group["completion_seconds_sum"] / completed) if completed else None,
+            "completion_rate": round(min(completed / started, 1.0), 4) if started else None,
+            "total_onboarded": completed,
+            "total_started": started,
+            **{
+                f"{label}_completion_time_hours": _hours(group["sketch"].quantile(q))
+                for label, q in QUANTILES
+            },
+        }
+    return {"by": by, "data": data, "period": f"last_{days}_days"}
+
+
+async def step_dwell_report(
+    db: AsyncSession, company_id: UUID, days: int, role_key: Optional[str] = None
+) -> Dict[str, Any]:
+    """Per-step completions and dwell time (started -> completed) over the last `days` days."""
+    query = select(OnboardingStepRollup).where(
+        OnboardingStepRollup.company_id == company_id,
+        OnboardingStepRollup.day >= _window_start(days),
+    )
+    if role_key:
+        query = query.where(OnboardingStepRollup.role_key == role_key)
+    result = await db.execute(query)
+
+    steps: Dict[str, Dict[str, Any]] = defaultdict(_step_bucket)
+    for row in result.scalars():
+        step = steps[row.step_id]
+        step["completions"] += row.completions
+        step["sketch"].merge(LogHistogram(row.dwell_sketch))
+
+    data: List[Dict[str, Any]] = [
+        {
+            "step_id": step_id,
+            "completions": step["completions"],
+            **{f"{label}_dwell_minutes": _minutes(step["sketch"].quantile(q)) for label, q in QUANTILES},
+        }
+        for step_id, step in sorted(steps.items())
+    ]
+    return {"role_key": role_key, "data": data, "period": f"last_{days}_days"}
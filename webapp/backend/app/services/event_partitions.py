@@ -0,0 +1,92 @@
+"""
+Monthly partitions of the `events` table (see migration 009).
+
+Partitions are named events_pYYYYMM and cover [month start, next month
+start). Maintenance creates the current month and EVENTS_PARTITION_MONTHS_AHEAD
+months after it, and, with EVENTS_RETENTION_MONTHS set, drops partitions
+whose month ended before the retention window. Rows outside every monthly
+partition land in events_default.
+"""
+import asyncio
+from datetime import date
+from typing import Any, Dict, List
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+
+
+PARTITION_PREFIX = "events_p"
+MAINTENANCE_INTERVAL_SECONDS = 6 * 3600
+
+_LIST_PARTITIONS = text("""
+    SELECT c.relname
+    FROM pg_inherits AS i
+    JOIN pg_class AS c ON c.oid = i.inhrelid
+    JOIN pg_class AS p ON p.oid = i.inhparent
+    WHERE p.relname = 'events' AND c.relname LIKE 'events\\_p%'
+    ORDER BY c.relname
+""")
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARTITION_PREFIX}{month:%Y%m}"
+
+
+def _partition_month(name: str) -> date:
+    stamp = name[len(PARTITION_PREFIX):]
+    return date(int(stamp[:4]), int(stamp[4:6]), 1)
+
+
+async def ensure_partitions(db: AsyncSession, months_ahead: int) -> List[str]:
+    this_month = date.today().replace(day=1)
+    months = [_add_months(this_month, n) for n in range(months_ahead + 1)]
+    for month in months:
+        await db.execute(text("SELECT ensure_events_partition(:month)"), {"month": month})
+    return [partition_name(m) for m in months]
+
+
+async def drop_expired_partitions(db: AsyncSession, retention_months: int) -> List[str]:
+    """Drop whole partitions older than the retention window (cheaper than DELETE)."""
+    cutoff = _add_months(date.today().replace(day=1), -retention_months)
+    names = (await db.execute(_LIST_PARTITIONS)).scalars().all()
+    dropped = []
+    for name in names:
+        try:
+            month = _partition_month(name)
+        except ValueError:
+            continue
+        if month < cutoff:
+            await db.execute(text(f'DROP TABLE IF EXISTS "{name}"'))
+            dropped.append(name)
+    return dropped
+
+
+async def maintain_event_partitions() -> Dict[str, Any]:
+    async with AsyncSessionLocal() as db:
+        created = await ensure_partitions(db, settings.EVENTS_PARTITION_MONTHS_AHEAD)
+        dropped = []
+        if settings.EVENTS_RETENTION_MONTHS > 0:
+            dropped = await drop_expired_partitions(db, settings.EVENTS_RETENTION_MONTHS)
+        await db.commit()
+    if dropped:
+        print(f"[EVENTS] Dropped expired partitions: {', '.join(dropped)}")
+    return {"ensured": created, "dropped": dropped}
+
+
+async def run_partition_maintenance() -> None:
+    while True:
+        try:
+            await maintain_event_partitions()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[EVENTS] Partition maintenance failed: {e}")
+        await asyncio.sleep(MAINTENANCE_INTERVAL_SECONDS)
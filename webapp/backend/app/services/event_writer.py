@@ -0,0 +1,194 @@
+"""
+Buffered event writer.
+
+Request handlers hand events to an in-process queue instead of inserting
+them inside their own transaction. A single background task drains the
+queue and writes a batch once EVENT_WRITER_BATCH_SIZE events are waiting or
+EVENT_WRITER_FLUSH_INTERVAL_SECONDS have passed since the first one, with a
+multi-row INSERT, or COPY for batches of EVENT_WRITER_COPY_THRESHOLD and up.
+
+The queue is bounded: when the database falls behind, `emit` waits for room
+(backpressure) rather than letting memory grow. On shutdown the queue is
+drained before the task exits. Events that must commit or roll back with a
+state change (e.g. the step events feeding analytics) are still written in
+that transaction; this path is for audit and notification events.
+
+`id` and `created_at` are stamped at emit time, so a row's `created_at` can
+precede its insert by up to the flush interval.
+"""
+import asyncio
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal, _json_serializer
+from app.models.event import Event
+
+
+COPY_COLUMNS = ("id", "company_id", "entity", "entity_id", "action", "payload", "created_at")
+
+
+def make_event(
+    company_id: UUID,
+    entity: str,
+    entity_id: UUID,
+    action: str,
+    payload: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    return {
+        "id": uuid.uuid4(),
+        "company_id": company_id,
+        "entity": entity,
+        "entity_id": entity_id,
+        "action": action,
+        "payload": payload or {},
+        "created_at": datetime.utcnow(),
+    }
+
+
+class EventWriter:
+    def __init__(self, batch_size: int, flush_interval: float, queue_max: int, copy_threshold: int):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue_max = queue_max
+        self.copy_threshold = copy_threshold
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.emitted = 0
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.copies = 0
+        self.backpressure_waits = 0
+        self.total_flush_seconds = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_max)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Write everything still queued, then stop the flush task."""
+        if not self.running:
+            return
+        await self._queue.put(None)  # sentinel: flush and exit
+        await self._task
+        self._task = None
+
+    async def emit(self, event: Dict[str, Any]) -> None:
+        """Queue one event (see make_event); waits while the queue is full."""
+        self.emitted += 1
+        if not self.running:
+            # No background task (scripts, tests): write through
+            await self._write([event])
+            return
+        if self._queue.full():
+            self.backpressure_waits += 1
+        await self._queue.put(event)
+
+    async def emit_many(self, events: List[Dict[str, Any]]) -> None:
+        for event in events:
+            await self.emit(event)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is None:
+                break
+            batch = [first]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    event = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if event is None:
+                    stopping = True
+                    break
+                batch.append(event)
+            await self._flush(batch)
+
+        # Drain anything queued behind the sentinel
+        leftover = []
+        while not self._queue.empty():
+            event = self._queue.get_nowait()
+            if event is not None:
+                leftover.append(event)
+        for start in range(0, len(leftover), self.batch_size):
+            await self._flush(leftover[start:start + self.batch_size])
+
+    async def _flush(self, batch: List[Dict[str, Any]]) -> None:
+        started_at = time.perf_counter()
+        for attempt in (1, 2):
+            try:
+                await self._write(batch)
+                break
+            except Exception as e:
+                if attempt == 2:
+                    self.dropped += len(batch)
+                    print(f"[EVENTS] Dropped {len(batch)} events after failed flush: {e}")
+                else:
+                    await asyncio.sleep(self.flush_interval)
+        self.flushes += 1
+        self.total_flush_seconds += time.perf_counter() - started_at
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> None:
+        async with AsyncSessionLocal() as db:
+            if len(batch) >= self.copy_threshold:
+                conn = await db.connection()
+                raw = await conn.get_raw_connection()
+                # The engine's jsonb codec takes pre-serialized text
+                await raw.driver_connection.copy_records_to_table(
+                    Event.__tablename__,
+                    columns=COPY_COLUMNS,
+                    records=[
+                        tuple(
+                            _json_serializer(e[c]) if c == "payload" else e[c]
+                            for c in COPY_COLUMNS
+                        )
+                        for e in batch
+                    ],
+                )
+                self.copies += 1
+            else:
+                await db.execute(insert(Event), batch)
+            await db.commit()
+        self.written += len(batch)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "queue_max": self.queue_max,
+            "emitted": self.emitted,
+            "written": self.written,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "copies": self.copies,
+            "backpressure_waits": self.backpressure_waits,
+            "avg_flush_ms": round(1000 * self.total_flush_seconds / self.flushes, 2) if self.flushes else 0.0,
+        }
+
+
+event_writer = EventWriter(
+    batch_size=settings.EVENT_WRITER_BATCH_SIZE,
+    flush_interval=settings.EVENT_WRITER_FLUSH_INTERVAL_SECONDS,
+    queue_max=settings.EVENT_WRITER_QUEUE_MAX,
+    copy_threshold=settings.EVENT_WRITER_COPY_THRESHOLD,
+)
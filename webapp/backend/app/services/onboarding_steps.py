@@ -0,0 +1,169 @@
+"""
+Step storage for onboarding states.
+
+Step definitions (title, instructions, commands, ...) live once in the
+immutable `toolsets.resolved_steps`. `onboarding_states.steps` holds a
+compact overlay aligned with it: `{"id", "status"}` plus whichever of the
+timestamps / validation result have been set. Rows created before the
+overlay format carry full step copies; they merge the same way.
+
+Where the overlay's state lives is the storage backend: `jsonb` keeps it
+inside `onboarding_states.steps`; `table` moves it to `onboarding_steps`,
+so a transition writes one narrow row instead of rewriting the document.
+The backend is recorded per onboarding in `step_storage`;
+ONBOARDING_STEP_STORAGE only picks it for new onboardings, and
+migrate_step_storage.py moves existing ones.
+"""
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List
+import uuid
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.onboarding import OnboardingState, OnboardingStep, StepStorage
+from app.models.questionnaire import ToolSet
+
+
+STATE_FIELDS = ("status", "started_at", "completed_at", "validation_result")
+# Overlay entries omit unset fields; responses always carry them
+_UNSET_STATE = {"status": "pending", "started_at": None, "completed_at": None, "validation_result": None}
+
+# Toolsets are never modified after creation; the TTL only bounds memory
+toolset_steps_cache: TTLCache[List[Dict[str, Any]]] = TTLCache(
+    max_size=settings.TOOLSET_STEPS_CACHE_MAX_SIZE,
+    ttl_seconds=settings.TOOLSET_STEPS_CACHE_TTL_SECONDS,
+)
+
+
+def progress_for(completed: int, total: int) -> int:
+    return int(100 * completed / total) if total > 0 else 0
+
+
+def overlay_for(definitions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Initial overlay for a toolset's steps. Steps without an id cannot be
+    matched back to their definition, so those are copied in full.
+    """
+    overlay = []
+    for step in definitions:
+        if step.get("id") is None:
+            overlay.append({**step, **_UNSET_STATE})
+        else:
+            overlay.append({"id": step["id"], "status": "pending"})
+    return overlay
+
+
+def merge_steps(
+    definitions: List[Dict[str, Any]],
+    overlay: List[Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    """
+    Merge an overlay with its toolset definitions. Entries are matched by
+    position first (the overlay is created aligned with the toolset), then
+    by id; unmatched entries are returned as stored, with unset state fields
+    filled in.
+    """
+    by_id: Dict[Any, Dict[str, Any]] = {}
+    for step in definitions:
+        by_id.setdefault(step.get("id"), step)
+
+    merged = []
+    for position, entry in enumerate(overlay):
+        step_id = entry.get("id")
+        definition = definitions[position] if position < len(definitions) else None
+        if definition is None or definition.get("id") != step_id:
+            definition = by_id.get(step_id) if step_id is not None else None
+        merged.append({**(definition or {}), **_UNSET_STATE, **entry})
+    return merged
+
+
+async def _toolset_steps(db: AsyncSession, toolset_ids: Iterable[uuid.UUID]) -> Dict[uuid.UUID, List[Dict[str, Any]]]:
+    found: Dict[uuid.UUID, List[Dict[str, Any]]] = {}
+    missing = []
+    for toolset_id in set(toolset_ids):
+        steps = toolset_steps_cache.get(toolset_id)
+        if steps is None:
+            missing.append(toolset_id)
+        else:
+            found[toolset_id] = steps
+
+    if missing:
+        result = await db.execute(
+            select(ToolSet.id, ToolSet.resolved_steps).where(ToolSet.id.in_(missing))
+        )
+        for toolset_id, steps in result.all():
+            found[toolset_id] = steps or []
+            toolset_steps_cache.set(toolset_id, found[toolset_id])
+    return found
+
+
+def init_steps(onboarding: OnboardingState, steps: List[Dict[str, Any]]) -> List[OnboardingStep]:
+    """
+    Attach `steps` to a new onboarding using the configured backend and set
+    its counters. Returns the `onboarding_steps` rows the caller must add
+    (empty for JSONB storage).
+    """
+    if onboarding.id is None:
+        onboarding.id = uuid.uuid4()
+    onboarding.steps = steps
+    onboarding.total_steps = len(steps)
+    onboarding.completed_steps = sum(1 for s in steps if s.get("status") == "completed")
+    onboarding.progress = progress_for(onboarding.completed_steps, onboarding.total_steps)
+    onboarding.step_storage = settings.ONBOARDING_STEP_STORAGE
+
+    if onboarding.step_storage != StepStorage.TABLE.value:
+        return []
+
+    rows: Dict[str, OnboardingStep] = {}
+    for position, step in enumerate(steps):
+        step_id = step.get("id")
+        if step_id is None or step_id in rows:
+            continue
+        rows[step_id] = OnboardingStep(
+            onboarding_id=onboarding.id,
+            step_id=step_id,
+            position=position,
+            status=step.get("status") or "pending",
+            validation_result=step.get("validation_result"),
+        )
+    return list(rows.values())
+
+
+async def resolve_steps(db: AsyncSession, onboardings: Iterable[OnboardingState]) -> None:
+    """
+    Replace each onboarding's stored overlay with full steps: toolset
+    definitions (cached), then `onboarding_steps` state for table-backed
+    rows. One query each for the whole batch at most. The merged list is
+    set as the committed value, so nothing is flushed back and responses
+    keep their usual shape.
+    """
+    onboardings = list(onboardings)
+    if not onboardings:
+        return
+
+    definitions = await _toolset_steps(db, (o.toolset_id for o in onboardings))
+
+    states: Dict[uuid.UUID, Dict[str, Dict[str, Any]]] = defaultdict(dict)
+    table_ids = [o.id for o in onboardings if o.step_storage == StepStorage.TABLE.value]
+    if table_ids:
+        result = await db.execute(
+            select(OnboardingStep.onboarding_id, OnboardingStep.step_id, *(
+                getattr(OnboardingStep, field) for field in STATE_FIELDS
+            )).where(OnboardingStep.onboarding_id.in_(table_ids))
+        )
+        for row in result.all():
+            states[row.onboarding_id][row.step_id] = {field: getattr(row, field) for field in STATE_FIELDS}
+
+    for onboarding in onboardings:
+        merged = merge_steps(definitions.get(onboarding.toolset_id, []), onboarding.steps or [])
+        by_step = states.get(onboarding.id)
+        if by_step:
+            merged = [
+                {**step, **by_step[step.get("id")]} if step.get("id") in by_step else step
+                for step in merged
+            ]
+        set_committed_value(onboarding, "steps", merged)
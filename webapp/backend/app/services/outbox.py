@@ -0,0 +1,266 @@
+"""
+Transactional outbox and its dispatcher.
+
+Handlers call `enqueue` in the same transaction as the change that needs a
+side effect (a scan row and its n8n webhook), so either both commit or
+neither does, and the request never waits on the remote service. The
+dispatcher claims due messages in batches, leasing them with `locked_until`
+under FOR UPDATE SKIP LOCKED so several workers can run side by side, and
+delivers them over the shared pooled client (app.core.http).
+
+A failed delivery is retried after an exponential backoff with jitter.
+After OUTBOX_MAX_ATTEMPTS failures, or on a non-retryable 4xx response, the
+message goes to the `dead` state and the topic's failure hook runs (for
+scans: the scan moves to ERROR). A dispatcher that dies mid-delivery only
+holds its lease for OUTBOX_LEASE_SECONDS, so delivery is at-least-once.
+"""
+import asyncio
+import random
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from uuid import UUID
+
+import httpx
+from sqlalchemy import literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.http import http_clients
+from app.db.session import AsyncSessionLocal
+from app.models.outbox import OutboxMessage, OutboxStatus
+from app.models.repo import Repo, RepoScan, ScanStatus
+from app.services.repo_mirror import clone_url
+
+
+N8N_SCAN_TOPIC = "n8n.scan_requested"
+
+# Client errors that may succeed on retry; any other 4xx is permanent
+RETRYABLE_CLIENT_STATUSES = {408, 409, 425, 429}
+
+
+class DeliveryError(Exception):
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+def enqueue(db: AsyncSession, company_id: UUID, topic: str, aggregate_id: UUID, payload: Dict[str, Any]) -> OutboxMessage:
+    """Stage a message on the caller's session; it is sent once the caller commits."""
+    message = OutboxMessage(
+        company_id=company_id,
+        topic=topic,
+        aggregate_id=aggregate_id,
+        payload=payload,
+        status=OutboxStatus.PENDING.value,
+        attempts=0,
+        next_attempt_at=datetime.utcnow(),
+    )
+    db.add(message)
+    return message
+
+
+def n8n_scan_payload(scan_id: UUID, repo: Repo) -> Dict[str, Any]:
+    return {
+        "scan_id": str(scan_id),
+        "repo_id": str(repo.id),
+        "provider": repo.provider.value,
+        "org": repo.org,
+        "name": repo.name,
+        "default_branch": repo.default_branch,
+        "repo_url": clone_url(repo.provider.value, repo.org, repo.name)
+    }
+
+
+def backoff_delay(attempts: int) -> float:
+    """Exponential backoff with "equal jitter": half fixed, half random."""
+    delay = min(
+        settings.OUTBOX_BACKOFF_MAX_SECONDS,
+        settings.OUTBOX_BACKOFF_BASE_SECONDS * 2 ** max(attempts - 1, 0),
+    )
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+async def _post_n8n(client: httpx.AsyncClient, message: OutboxMessage) -> None:
+    if not settings.N8N_WEBHOOK_URL or settings.N8N_WEBHOOK_URL == "read-it-from-env":
+        raise DeliveryError("N8N_WEBHOOK_URL is not configured")
+    try:
+        response = await client.post(settings.N8N_WEBHOOK_URL, json=message.payload)
+    except httpx.TimeoutException:
+        raise DeliveryError(f"Timed out after {settings.N8N_TIMEOUT_SECONDS}s")
+    except httpx.HTTPError as e:
+        raise DeliveryError(f"{type(e).__name__}: {e}")
+    if response.status_code >= 400:
+        retryable = response.status_code >= 500 or response.status_code in RETRYABLE_CLIENT_STATUSES
+        raise DeliveryError(f"HTTP {response.status_code}: {response.text[:200]}", retryable=retryable)
+
+
+async def _fail_scan(db: AsyncSession, message: OutboxMessage) -> None:
+    await db.execute(
+        update(RepoScan)
+        .where(RepoScan.id == message.aggregate_id, RepoScan.status.in_([ScanStatus.QUEUED, ScanStatus.RUNNING]))
+        .values(
+            status=ScanStatus.ERROR,
+            lease_expires_at=None,
+            summary={"error": f"Could not start the scan workflow: {message.last_error}"},
+        )
+    )
+
+
+Sender = Callable[[httpx.AsyncClient, OutboxMessage], Awaitable[None]]
+DeadLetterHook = Callable[[AsyncSession, OutboxMessage], Awaitable[None]]
+
+SENDERS: Dict[str, Sender] = {N8N_SCAN_TOPIC: _post_n8n}
+DEAD_LETTER_HOOKS: Dict[str, DeadLetterHook] = {N8N_SCAN_TOPIC: _fail_scan}
+
+
+class OutboxDispatcher:
+    def __init__(self, batch_size: int, concurrency: int, poll_interval: float, lease_seconds: float):
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+        self.delivered = 0
+        self.retried = 0
+        self.dead = 0
+        self.last_error: Optional[str] = None
+
+    def start(self) -> None:
+        if self._task is not None and not self._task.done():
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def wake(self) -> None:
+        """Skip the rest of the poll interval (call after committing a message)."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            claimed = 0
+            try:
+                claimed = await self.dispatch_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"[:300]
+                print(f"[OUTBOX] Dispatch failed: {self.last_error}")
+            if claimed < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+
+    async def _claim(self) -> List[OutboxMessage]:
+        now = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            due = (
+                select(OutboxMessage.id)
+                .where(
+                    # Inlined so generic plans still match the partial index
+                    OutboxMessage.status == literal(OutboxStatus.PENDING.value, literal_execute=True),
+                    OutboxMessage.next_attempt_at <= now,
+                    (OutboxMessage.locked_until.is_(None)) | (OutboxMessage.locked_until < now),
+                )
+                .order_by(OutboxMessage.next_attempt_at)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            result = await db.execute(
+                update(OutboxMessage)
+                .where(OutboxMessage.id.in_(due.scalar_subquery()))
+                .values(locked_until=now + timedelta(seconds=self.lease_seconds))
+                .returning(OutboxMessage)
+                .execution_options(synchronize_session=False)
+            )
+            messages = list(result.scalars())
+            await db.commit()
+        return messages
+
+    async def dispatch_once(self) -> int:
+        """Claim one batch of due messages and deliver it. Returns the batch size."""
+        messages = await self._claim()
+        if not messages:
+            return 0
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def deliver(message: OutboxMessage) -> Optional[DeliveryError]:
+            async with semaphore:
+                sender = SENDERS.get(message.topic)
+                if sender is None:
+                    return DeliveryError(f"No sender for topic {message.topic}", retryable=False)
+                try:
+                    await sender(http_clients.get("n8n"), message)
+                except DeliveryError as e:
+                    return e
+                return None
+
+        outcomes = await asyncio.gather(*(deliver(m) for m in messages))
+        async with AsyncSessionLocal() as db:
+            for message, error in zip(messages, outcomes):
+                await self._record(db, message, error)
+            await db.commit()
+        return len(messages)
+
+    async def _record(self, db: AsyncSession, message: OutboxMessage, error: Optional[DeliveryError]) -> None:
+        now = datetime.utcnow()
+        attempts = message.attempts + 1
+        values: Dict[str, Any] = {"attempts": attempts, "locked_until": None}
+        if error is None:
+            values.update(status=OutboxStatus.DELIVERED.value, delivered_at=now, last_error=None)
+        elif not error.retryable or attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            values.update(status=OutboxStatus.DEAD.value, last_error=str(error)[:1000])
+        else:
+            values.update(
+                next_attempt_at=now + timedelta(seconds=backoff_delay(attempts)),
+                last_error=str(error)[:1000],
+            )
+
+        # Only while our lease holds: after it expires another dispatcher owns the message
+        result = await db.execute(
+            update(OutboxMessage)
+            .where(OutboxMessage.id == message.id, OutboxMessage.locked_until == message.locked_until)
+            .values(**values)
+        )
+        if result.rowcount == 0:
+            return
+
+        status = values.get("status")
+        if status == OutboxStatus.DELIVERED.value:
+            self.delivered += 1
+        elif status is None:
+            self.retried += 1
+        else:
+            self.dead += 1
+            print(f"[OUTBOX] Dead-lettered {message.topic} {message.id} after {attempts} attempts: {error}")
+            message.last_error = values["last_error"]
+            hook = DEAD_LETTER_HOOKS.get(message.topic)
+            if hook is not None:
+                await hook(db, message)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "delivered": self.delivered,
+            "retried": self.retried,
+            "dead": self.dead,
+            "last_error": self.last_error,
+        }
+
+
+outbox_dispatcher = OutboxDispatcher(
+    batch_size=settings.OUTBOX_BATCH_SIZE,
+    concurrency=settings.OUTBOX_CONCURRENCY,
+    poll_interval=settings.OUTBOX_POLL_INTERVAL_SECONDS,
+    lease_seconds=settings.OUTBOX_LEASE_SECONDS,
+)
@@ -0,0 +1,113 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.security import hash_password, verify_password
+
+
+class PasswordService:
+    """
+    Runs bcrypt hashing/verification off the event loop in a bounded pool.
+
+    At most `max_concurrency` operations are handed to the executor at once;
+    callers beyond that wait on a semaphore and are reported as queued.
+    """
+
+    def __init__(self, executor_kind: str, max_workers: int, max_concurrency: int):
+        if executor_kind not in ("thread", "process"):
+            raise ValueError(f"Unsupported password executor: {executor_kind}")
+        self.executor_kind = executor_kind
+        self.max_workers = max_workers
+        self.max_concurrency = max_concurrency
+        self._executor: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.completed = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.queued = 0
+        self.max_queued = 0
+        self.total_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="bcrypt",
+                )
+        return self._executor
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        semaphore = self._get_semaphore()
+        enqueued_at = time.perf_counter()
+        self.queued += 1
+        self.max_queued = max(self.max_queued, self.queued)
+        try:
+            await semaphore.acquire()
+        finally:
+            self.queued -= 1
+        started_at = time.perf_counter()
+        self.total_wait_seconds += started_at - enqueued_at
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._get_executor(), fn, *args)
+            self.completed += 1
+            return result
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self.total_run_seconds += time.perf_counter() - started_at
+            semaphore.release()
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def hash_many(self, passwords: List[str]) -> List[str]:
+        return list(await asyncio.gather(*(self.hash(p) for p in passwords)))
+
+    def stats(self) -> Dict[str, Any]:
+        finished = self.completed + self.failed
+        return {
+            "executor": self.executor_kind,
+            "max_workers": self.max_workers,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+            "completed": self.completed,
+            "failed": self.failed,
+            "avg_wait_ms": round(1000 * self.total_wait_seconds / finished, 2) if finished else 0.0,
+            "avg_run_ms": round(1000 * self.total_run_seconds / finished, 2) if finished else 0.0,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+password_service = PasswordService(
+    executor_kind=settings.PASSWORD_HASH_EXECUTOR,
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_concurrency=settings.PASSWORD_HASH_MAX_CONCURRENCY,
+)
@@ -0,0 +1,98 @@
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.user import User
+
+
+# Column snapshots of recently authenticated users, keyed by user id.
+# Entries are invalidated when a session that modified the user commits;
+# other workers converge within PRINCIPAL_CACHE_TTL_SECONDS.
+principal_cache: TTLCache[Dict[str, Any]] = TTLCache(
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+_PENDING_KEY = "principal_cache_pending"
+_CLEAR_ALL = object()
+_generation = 0
+
+
+def _snapshot(user: User) -> Dict[str, Any]:
+    return {
+        attr.key: getattr(user, attr.key)
+        for attr in inspect(User).column_attrs
+    }
+
+
+async def _restore(db: AsyncSession, values: Dict[str, Any]) -> User:
+    user = User(**values)
+    make_transient_to_detached(user)
+    # Attach to the request session without a SELECT so route handlers can
+    # keep mutating and committing `current_user` as before.
+    return await db.merge(user, load=False)
+
+
+async def get_user(db: AsyncSession, user_id: UUID) -> Optional[User]:
+    values = principal_cache.get(user_id)
+    if values is not None:
+        return await _restore(db, values)
+
+    generation = _generation
+    result = await db.execute(select(User).where(User.id == user_id))
+    user = result.scalar_one_or_none()
+
+    # Skip caching if an invalidation landed while the SELECT was in flight.
+    if user is not None and generation == _generation:
+        principal_cache.set(user_id, _snapshot(user))
+    return user
+
+
+def invalidate_user(user_id: UUID) -> None:
+    global _generation
+    _generation += 1
+    principal_cache.invalidate(user_id)
+
+
+def invalidate_all() -> None:
+    global _generation
+    _generation += 1
+    principal_cache.clear()
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed_users(session: Session, flush_context) -> None:
+    pending = session.info.setdefault(_PENDING_KEY, set())
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User) and obj.id is not None:
+            pending.add(obj.id)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_user_writes(orm_execute_state) -> None:
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    if any(mapper.class_ is User for mapper in orm_execute_state.all_mappers):
+        orm_execute_state.session.info.setdefault(_PENDING_KEY, set()).add(_CLEAR_ALL)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_users(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    if _CLEAR_ALL in pending:
+        invalidate_all()
+        return
+    for user_id in pending:
+        invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_users(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,365 @@
+"""
+Local bare-mirror cache for repository checkouts.
+
+Each (provider, org, name) gets one bare clone under REPO_MIRROR_DIR. A scan
+updates it with an incremental `git fetch` instead of a fresh clone, then
+checks the wanted commit out into a throwaway `git worktree` that shares the
+mirror's object store, so no history is copied. A worktree can be sparse
+(only the paths a scan reads), which keeps checkout cost independent of the
+repo's size.
+
+Concurrent scans of one repo in this process share a single fetch. Fetches
+and worktree registration take the mirror's write lock (an asyncio lock
+plus an exclusive lock file, for other processes); file checkout happens
+outside it. A shared lock file is held while a mirror is in use. When the cache exceeds
+REPO_MIRROR_MAX_BYTES, the least recently used mirrors that nobody holds are
+deleted.
+"""
+import asyncio
+import fcntl
+import os
+import re
+import shutil
+import time
+import uuid
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from app.core.config import settings
+
+
+# Worktrees left behind by a crashed process are removed after this long
+STALE_WORKTREE_SECONDS = 24 * 3600
+LOCK_POLL_SECONDS = 0.1
+
+
+class MirrorError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class MirrorKey:
+    provider: str
+    org: str
+    name: str
+
+    @classmethod
+    def for_repo(cls, repo) -> "MirrorKey":
+        return cls(repo.provider.value, repo.org, repo.name)
+
+    @property
+    def parts(self) -> Tuple[str, str, str]:
+        # Safe as path components whatever the org or repo name contains
+        return tuple(
+            re.sub(r"[^A-Za-z0-9._-]", "_", part).lstrip(".") or "_"
+            for part in (self.provider, self.org, self.name)
+        )
+
+
+def clone_url(provider: str, org: str, name: str) -> str:
+    if provider == "github":
+        return f"https://github.com/{org}/{name}.git"
+    if provider == "gitlab":
+        return f"https://gitlab.com/{org}/{name}.git"
+    return f"https://{provider}.com/{org}/{name}.git"
+
+
+async def _git(*args: str, timeout: float) -> str:
+    proc = await asyncio.create_subprocess_exec(
+        "git", *args,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        env={**os.environ, "GIT_TERMINAL_PROMPT": "0"},
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+    except BaseException:
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+        raise
+    if proc.returncode != 0:
+        command = args[2] if args[0] == "-C" else args[0]
+        raise MirrorError(f"git {command} failed: {stderr.decode(errors='replace')[-500:].strip()}")
+    return stdout.decode().strip()
+
+
+def _disk_usage(path: str) -> int:
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, filename)).st_blocks * 512
+            except OSError:
+                pass
+    return total
+
+
+class FileLock:
+    """flock(2) on a lock file, polled so that waiting stays cancellable."""
+
+    def __init__(self, path: str, shared: bool = False):
+        self.path = path
+        self.operation = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+        self._fd: Optional[int] = None
+
+    def try_acquire(self) -> bool:
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, self.operation | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    async def acquire(self, timeout: float) -> None:
+        deadline = time.monotonic() + timeout
+        while not self.try_acquire():
+            if time.monotonic() > deadline:
+                raise MirrorError(f"Timed out waiting for {self.path}")
+            await asyncio.sleep(LOCK_POLL_SECONDS)
+
+    def release(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)  # closing the descriptor drops the lock
+            self._fd = None
+
+
+class MirrorSession:
+    """A fetched mirror, protected from eviction until the session ends."""
+
+    def __init__(self, manager: "RepoMirror", path: str):
+        self.manager = manager
+        self.path = path
+
+    async def resolve(self, ref: str) -> str:
+        """Commit SHA of a branch, tag or commit in the mirror."""
+        return await _git("-C", self.path, "rev-parse", "--verify", f"{ref}^{{commit}}", timeout=self.manager.git_timeout)
+
+    @asynccontextmanager
+    async def worktree(self, ref: str, sparse: Optional[List[str]] = None) -> AsyncIterator[str]:
+        """
+        Check `ref` out into a temporary worktree (detached HEAD). With
+        `sparse` (gitignore-style patterns), only matching files are written.
+        """
+        path = os.path.join(self.manager.root, "worktrees", uuid.uuid4().hex)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        timeout = self.manager.git_timeout
+        # Concurrent `worktree add` on one repository races on its metadata
+        async with self.manager.write_lock(self.path):
+            await _git("-C", self.path, "worktree", "add", "--detach", "--no-checkout", "--quiet", path, ref, timeout=timeout)
+        self.manager.checkouts += 1
+        try:
+            if sparse:
+                await _git("-C", path, "sparse-checkout", "set", "--no-cone", *sparse, timeout=timeout)
+            await _git("-C", path, "reset", "--hard", "--quiet", timeout=timeout)
+            yield path
+        finally:
+            try:
+                async with self.manager.write_lock(self.path):
+                    await _git("-C", self.path, "worktree", "remove", "--force", path, timeout=timeout)
+            except (MirrorError, asyncio.TimeoutError) as e:
+                print(f"[MIRROR] Could not remove worktree {path}: {e}")
+            shutil.rmtree(path, ignore_errors=True)
+
+
+class RepoMirror:
+    def __init__(self, root: str, max_bytes: int, git_timeout: float):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.git_timeout = git_timeout
+        self._flights: Dict[str, asyncio.Task] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._in_use: Dict[str, int] = {}
+        # Bytes per mirror, measured after each fetch. Only touched on the
+        # event loop; the eviction thread works on copies.
+        self._sizes: Dict[str, int] = {}
+
+        self.clones = 0
+        self.fetches = 0
+        self.shared_fetches = 0
+        self.checkouts = 0
+        self.failures = 0
+        self.evictions = 0
+        self.evicted_bytes = 0
+
+    def mirror_path(self, key: MirrorKey) -> str:
+        provider, org, name = key.parts
+        return os.path.join(self.root, "mirrors", provider, org, f"{name}.git")
+
+    @asynccontextmanager
+    async def write_lock(self, path: str) -> AsyncIterator[None]:
+        """Serializes fetches and worktree registration on one mirror."""
+        async with self._locks.setdefault(path, asyncio.Lock()):
+            file_lock = FileLock(f"{path}.lock")
+            await file_lock.acquire(self.git_timeout)
+            try:
+                yield
+            finally:
+                file_lock.release()
+
+    @asynccontextmanager
+    async def session(self, key: MirrorKey, url: str) -> AsyncIterator[MirrorSession]:
+        """Clone or fetch the mirror of `key` and hold it for the duration."""
+        path = self.mirror_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        use_lock = FileLock(f"{path}.use.lock", shared=True)
+        self._in_use[path] = self._in_use.get(path, 0) + 1
+        try:
+            await use_lock.acquire(self.git_timeout)
+            try:
+                await self.update(path, url)
+                yield MirrorSession(self, path)
+            finally:
+                use_lock.release()
+        finally:
+            self._in_use[path] -= 1
+            if not self._in_use[path]:
+                del self._in_use[path]
+
+    async def update(self, path: str, url: str) -> None:
+        """Bring the mirror up to date; concurrent callers share one fetch."""
+        flight = self._flights.get(path)
+        if flight is not None:
+            self.shared_fetches += 1
+        else:
+            flight = self._flights[path] = asyncio.create_task(self._update(path, url))
+            flight.add_done_callback(self._landed(path))
+        # Shielded: a cancelled caller must not abort the fetch the others wait on
+        await asyncio.shield(flight)
+
+    def _landed(self, path: str):
+        def done(task: asyncio.Task) -> None:
+            self._flights.pop(path, None)
+            if not task.cancelled() and task.exception() is not None:
+                self.failures += 1
+        return done
+
+    async def _update(self, path: str, url: str) -> None:
+        async with self.write_lock(path):
+            if os.path.isdir(path):
+                await _git("-C", path, "fetch", "--prune", "--tags", "--quiet", "origin", timeout=self.git_timeout)
+                self.fetches += 1
+            else:
+                # Cloned aside and renamed, so a failed clone never looks like a mirror
+                tmp = f"{path}.tmp-{uuid.uuid4().hex}"
+                try:
+                    await _git("clone", "--bare", "--quiet", url, tmp, timeout=self.git_timeout)
+                    await _git("-C", tmp, "config", "remote.origin.fetch", "+refs/heads/*:refs/heads/*", timeout=self.git_timeout)
+                    os.rename(tmp, path)
+                finally:
+                    shutil.rmtree(tmp, ignore_errors=True)
+                self.clones += 1
+            await _git("-C", path, "worktree", "prune", timeout=self.git_timeout)
+        os.utime(path)  # the mtime orders LRU eviction, also across restarts
+        self._sizes[path] = await asyncio.to_thread(_disk_usage, path)
+        result = await asyncio.to_thread(self._evict, dict(self._sizes), set(self._in_use))
+        self._apply_eviction(*result)
+
+    def _inventory(self, sizes: Dict[str, int]) -> List[Tuple[float, str, int]]:
+        """Mirrors on disk as (mtime, path, bytes); measures those missing from `sizes`."""
+        mirrors = []
+        base = os.path.join(self.root, "mirrors")
+        for dirpath, dirnames, _ in os.walk(base):
+            for name in list(dirnames):
+                if name.endswith(".git"):
+                    dirnames.remove(name)
+                    path = os.path.join(dirpath, name)
+                    try:
+                        size = sizes[path] if path in sizes else _disk_usage(path)
+                        mirrors.append((os.stat(path).st_mtime, path, size))
+                    except OSError:
+                        pass
+        return mirrors
+
+    def _remove_stale_worktrees(self) -> None:
+        base = os.path.join(self.root, "worktrees")
+        cutoff = time.time() - STALE_WORKTREE_SECONDS
+        try:
+            entries = list(os.scandir(base))
+        except OSError:
+            return
+        for entry in entries:
+            try:
+                if entry.stat(follow_symlinks=False).st_mtime < cutoff:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+            except OSError:
+                pass
+
+    def evict(self) -> int:
+        """Delete least recently used idle mirrors until under budget. Blocking."""
+        measured, evicted = self._evict(dict(self._sizes), set(self._in_use))
+        self._apply_eviction(measured, evicted)
+        return len(evicted)
+
+    def _evict(self, sizes: Dict[str, int], in_use: Set[str]) -> Tuple[Dict[str, int], List[Tuple[str, int]]]:
+        """
+        The blocking part of evict(), safe to run in a worker thread: reads
+        only the given copies and returns the sizes of the mirrors found on
+        disk and the (path, bytes) of those it deleted.
+        """
+        self._remove_stale_worktrees()
+        mirrors = self._inventory(sizes)
+        measured = {path: size for _, path, size in mirrors}
+        total = sum(measured.values())
+        evicted = []
+        for _, path, size in sorted(mirrors):
+            if total <= self.max_bytes:
+                break
+            if path in in_use:
+                continue
+            # Busy in another process (in use or fetching): skip rather than wait
+            use_lock, write_lock = FileLock(f"{path}.use.lock"), FileLock(f"{path}.lock")
+            if not use_lock.try_acquire():
+                continue
+            try:
+                if not write_lock.try_acquire():
+                    continue
+                try:
+                    shutil.rmtree(path, ignore_errors=True)
+                finally:
+                    write_lock.release()
+            finally:
+                use_lock.release()
+            del measured[path]
+            total -= size
+            evicted.append((path, size))
+            print(f"[MIRROR] Evicted {path} ({size // (1024 * 1024)} MiB)")
+        return measured, evicted
+
+    def _apply_eviction(self, measured: Dict[str, int], evicted: List[Tuple[str, int]]) -> None:
+        # Sizes recorded by fetches that landed meanwhile are newer; keep them
+        for path, size in measured.items():
+            self._sizes.setdefault(path, size)
+        for path in list(self._sizes):
+            # Gone from disk (evicted here, or removed by another process),
+            # unless it was cloned again while the thread ran
+            if path not in measured and not os.path.isdir(path):
+                del self._sizes[path]
+        for _, size in evicted:
+            self.evictions += 1
+            self.evicted_bytes += size
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mirrors": len(self._sizes),
+            "bytes": sum(self._sizes.values()),
+            "max_bytes": self.max_bytes,
+            "in_use": len(self._in_use),
+            "clones": self.clones,
+            "fetches": self.fetches,
+            "shared_fetches": self.shared_fetches,
+            "checkouts": self.checkouts,
+            "failures": self.failures,
+            "evictions": self.evictions,
+            "evicted_bytes": self.evicted_bytes,
+        }
+
+
+repo_mirror = RepoMirror(
+    root=settings.REPO_MIRROR_DIR,
+    max_bytes=settings.REPO_MIRROR_MAX_BYTES,
+    git_timeout=settings.REPO_MIRROR_GIT_TIMEOUT_SECONDS,
+)
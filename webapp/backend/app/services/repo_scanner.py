@@ -0,0 +1,616 @@
+"""
+Local repository scanner: walks a checked-out tree and builds the
+`RepoScan.summary` document (dependencies, package managers, Makefile
+targets, file count and language stats).
+
+The walk is a lazy os.scandir generator, so only the directories still to
+visit are held in memory, and ignored directories (.gitignore files at any
+level plus .git/info/exclude) are pruned without being entered. Manifests
+are parsed inline for small repos; once a walk has found
+SCANNER_POOL_MIN_MANIFESTS of them, the rest are handed to a shared process
+pool in batches while the walk continues.
+
+For git checkouts, list_git_tree reads the tracked files and their blob
+SHAs from git instead of walking, which is what the scan cache
+(app.services.scan_cache) keys its manifest parse results on.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import subprocess
+import time
+import tomllib
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.core.config import settings
+
+
+# File name -> manifest kind handed to parse_manifest
+MANIFESTS = {
+    "pyproject.toml": "pyproject",
+    "package.json": "package_json",
+    "go.mod": "go_mod",
+    "Cargo.toml": "cargo",
+    "Makefile": "makefile",
+    "makefile": "makefile",
+    "GNUmakefile": "makefile",
+}
+
+# Lockfiles only tell us which package manager is in use; they are not read
+LOCKFILES = {
+    "package-lock.json": "npm",
+    "npm-shrinkwrap.json": "npm",
+    "yarn.lock": "yarn",
+    "pnpm-lock.yaml": "pnpm",
+    "bun.lockb": "bun",
+    "poetry.lock": "poetry",
+    "uv.lock": "uv",
+    "Pipfile.lock": "pipenv",
+    "go.sum": "go",
+    "Cargo.lock": "cargo",
+}
+
+NODE_MANAGERS = {"npm", "yarn", "pnpm", "bun"}
+
+REQUIREMENTS_RE = re.compile(r"^requirements([-_.][\w.-]*)?\.(txt|in)$")
+
+# Sparse-checkout patterns covering every file a cached git scan reads
+MANIFEST_PATTERNS = [*MANIFESTS, "requirements*.txt", "requirements*.in"]
+
+LANGUAGES = {
+    ".py": "Python", ".pyi": "Python",
+    ".js": "JavaScript", ".jsx": "JavaScript", ".mjs": "JavaScript", ".cjs": "JavaScript",
+    ".ts": "TypeScript", ".tsx": "TypeScript",
+    ".go": "Go",
+    ".rs": "Rust",
+    ".java": "Java", ".kt": "Kotlin", ".scala": "Scala",
+    ".rb": "Ruby", ".php": "PHP", ".cs": "C#", ".swift": "Swift",
+    ".c": "C", ".h": "C", ".cc": "C++", ".cpp": "C++", ".hpp": "C++",
+    ".sh": "Shell", ".bash": "Shell",
+    ".sql": "SQL",
+    ".html": "HTML", ".css": "CSS", ".scss": "CSS", ".vue": "Vue", ".svelte": "Svelte",
+}
+
+PYTHON_NAME_RE = re.compile(r"^\s*([A-Za-z0-9][A-Za-z0-9._-]*)")
+MAKE_TARGET_RE = re.compile(r"^([A-Za-z0-9_][A-Za-z0-9_./-]*)\s*::?(?!=)")
+GO_REQUIRE_RE = re.compile(r"^\s*(?:require\s+)?([^\s()]+)\s+v[^\s]+")
+
+
+# --- .gitignore ------------------------------------------------------------
+
+@dataclass
+class IgnoreRule:
+    regex: re.Pattern
+    negate: bool
+    dir_only: bool
+
+
+def _glob_to_regex(pattern: str) -> str:
+    out: List[str] = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif c == "*":
+            out.append("[^/]*")
+            i += 1
+        elif c == "?":
+            out.append("[^/]")
+            i += 1
+        elif c == "[":
+            end = pattern.find("]", i + 2)
+            if end == -1:
+                out.append(re.escape(c))
+                i += 1
+                continue
+            body = pattern[i + 1:end]
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            out.append("[" + body.replace("\\", "\\\\") + "]")
+            i = end + 1
+        elif c == "\\" and i + 1 < n:
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            out.append(re.escape(c))
+            i += 1
+    return "".join(out)
+
+
+def parse_gitignore(text: str, base: str) -> List[IgnoreRule]:
+    """Rules of a .gitignore in `base` (repo-relative, "" for the root)."""
+    prefix = re.escape(base + "/") if base else ""
+    rules = []
+    for line in text.splitlines():
+        line = line.rstrip()
+        if line.endswith("\\"):
+            line += " "
+        if not line or line.startswith("#"):
+            continue
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        elif line.startswith("\\"):
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+        # A slash anywhere but the end anchors the pattern to this directory
+        anchored = "/" in line
+        line = line.lstrip("/")
+        glob = _glob_to_regex(line)
+        regex = prefix + glob if anchored else prefix + "(?:.*/)?" + glob
+        rules.append(IgnoreRule(re.compile(regex + r"\Z", re.DOTALL), negate, dir_only))
+    return rules
+
+
+def _combine(rules: List[IgnoreRule]) -> Optional[re.Pattern]:
+    if not rules:
+        return None
+    return re.compile("|".join(f"(?:{rule.regex.pattern})" for rule in rules), re.DOTALL)
+
+
+class IgnoreRules:
+    """The .gitignore rules in effect for one directory; the last match wins."""
+
+    def __init__(self, rules: List[IgnoreRule]):
+        self.rules = rules
+        # Without negations order does not matter: one alternation per entry
+        self.simple = not any(rule.negate for rule in rules)
+        if self.simple:
+            self._files = _combine([rule for rule in rules if not rule.dir_only])
+            self._dirs = _combine(rules)
+
+    def __bool__(self) -> bool:
+        return bool(self.rules)
+
+    def extend(self, rules: List[IgnoreRule]) -> "IgnoreRules":
+        return IgnoreRules(self.rules + rules) if rules else self
+
+    def match(self, path: str, is_dir: bool) -> bool:
+        if self.simple:
+            regex = self._dirs if is_dir else self._files
+            return regex is not None and regex.match(path) is not None
+        ignored = False
+        for rule in self.rules:
+            if rule.dir_only and not is_dir:
+                continue
+            if rule.negate == ignored and rule.regex.match(path):
+                ignored = not rule.negate
+        return ignored
+
+
+def _read_rules(path: str, base: str) -> List[IgnoreRule]:
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            return parse_gitignore(f.read(), base)
+    except OSError:
+        return []
+
+
+def walk_repository(root: str) -> Iterator[Tuple[str, os.DirEntry]]:
+    """
+    Yield (repo-relative path, entry) for every file that git would not
+    ignore. Symlinks are not followed and .git is never entered.
+    """
+    root_rules = IgnoreRules(_read_rules(os.path.join(root, ".git", "info", "exclude"), ""))
+    stack: List[Tuple[str, str, IgnoreRules]] = [(root, "", root_rules)]
+    while stack:
+        path, rel, rules = stack.pop()
+        try:
+            with os.scandir(path) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+        if any(e.name == ".gitignore" for e in entries):
+            rules = rules.extend(_read_rules(os.path.join(path, ".gitignore"), rel))
+        subdirs = []
+        for entry in entries:
+            child = f"{rel}/{entry.name}" if rel else entry.name
+            try:
+                if entry.is_symlink():
+                    continue
+                is_dir = entry.is_dir()
+            except OSError:
+                continue
+            if is_dir and entry.name == ".git":
+                continue
+            if rules and rules.match(child, is_dir):
+                continue
+            if is_dir:
+                subdirs.append((entry.path, child, rules))
+            else:
+                yield child, entry
+        # Reversed so directories are visited in name order
+        stack.extend(reversed(subdirs))
+
+
+# --- manifests -------------------------------------------------------------
+
+def _pep508_name(requirement: str) -> Optional[str]:
+    match = PYTHON_NAME_RE.match(requirement)
+    return match.group(1).lower().replace("_", "-") if match else None
+
+
+def _parse_requirements(text: str) -> Dict[str, List[str]]:
+    deps = []
+    for line in text.splitlines():
+        line = line.split(" #", 1)[0].strip()
+        if not line or line.startswith(("#", "-", "git+", "http:", "https:", "file:")):
+            continue
+        name = _pep508_name(line)
+        if name:
+            deps.append(f"python:{name}")
+    return {"package_managers": ["pip"], "dependencies": deps}
+
+
+def _parse_pyproject(text: str) -> Dict[str, List[str]]:
+    data = tomllib.loads(text)
+    tool = data.get("tool", {})
+    project = data.get("project", {})
+    requirements = list(project.get("dependencies", []))
+    for extra in project.get("optional-dependencies", {}).values():
+        requirements.extend(extra)
+    for group in data.get("dependency-groups", {}).values():
+        requirements.extend(r for r in group if isinstance(r, str))
+    deps = {_pep508_name(r) for r in requirements}
+
+    poetry = tool.get("poetry", {})
+    poetry_tables = [poetry.get("dependencies", {}), poetry.get("dev-dependencies", {})]
+    poetry_tables.extend(g.get("dependencies", {}) for g in poetry.get("group", {}).values())
+    for table in poetry_tables:
+        deps.update(name.lower() for name in table if name.lower() != "python")
+
+    if "poetry" in tool:
+        manager = "poetry"
+    elif "pdm" in tool:
+        manager = "pdm"
+    elif "uv" in tool:
+        manager = "uv"
+    else:
+        manager = "pip"
+    return {"package_managers": [manager], "dependencies": [f"python:{d}" for d in deps if d]}
+
+
+def _parse_package_json(text: str) -> Dict[str, List[str]]:
+    data = json.loads(text)
+    deps = set()
+    for key in ("dependencies", "devDependencies", "peerDependencies", "optionalDependencies"):
+        section = data.get(key)
+        if isinstance(section, dict):
+            deps.update(section)
+    result = {"dependencies": [f"node:{d}" for d in deps]}
+    # "packageManager": "pnpm@8.15.0" (corepack); otherwise a lockfile decides
+    declared = str(data.get("packageManager") or "").split("@", 1)[0]
+    result["package_managers"] = [declared] if declared else []
+    return result
+
+
+def _parse_go_mod(text: str) -> Dict[str, List[str]]:
+    deps = []
+    in_require = False
+    for line in text.splitlines():
+        line = line.split("//", 1)[0].strip()
+        if line.startswith("require ("):
+            in_require = True
+            continue
+        if in_require and line == ")":
+            in_require = False
+            continue
+        if in_require or line.startswith("require "):
+            match = GO_REQUIRE_RE.match(line)
+            if match:
+                deps.append(f"go:{match.group(1)}")
+    return {"package_managers": ["go"], "dependencies": deps}
+
+
+def _parse_cargo(text: str) -> Dict[str, List[str]]:
+    data = tomllib.loads(text)
+    tables = [data.get(k, {}) for k in ("dependencies", "dev-dependencies", "build-dependencies")]
+    tables.append(data.get("workspace", {}).get("dependencies", {}))
+    for target in data.get("target", {}).values():
+        tables.extend(target.get(k, {}) for k in ("dependencies", "dev-dependencies"))
+    deps = {name for table in tables for name in table}
+    return {"package_managers": ["cargo"], "dependencies": [f"rust:{d}" for d in deps]}
+
+
+def _parse_makefile(text: str) -> Dict[str, List[str]]:
+    targets = []
+    for line in text.splitlines():
+        match = MAKE_TARGET_RE.match(line)
+        if match and not match.group(1).startswith("."):
+            targets.append(match.group(1))
+    return {"package_managers": ["make"], "make_targets": targets}
+
+
+PARSERS = {
+    "requirements": _parse_requirements,
+    "pyproject": _parse_pyproject,
+    "package_json": _parse_package_json,
+    "go_mod": _parse_go_mod,
+    "cargo": _parse_cargo,
+    "makefile": _parse_makefile,
+}
+
+
+def manifest_kind(name: str) -> Optional[str]:
+    kind = MANIFESTS.get(name)
+    if kind is None and name.startswith("requirements") and REQUIREMENTS_RE.match(name):
+        kind = "requirements"
+    return kind
+
+
+def parse_manifest(path: str, kind: str) -> Dict[str, Any]:
+    """
+    Parse one manifest. Runs in pool workers, so it only takes and returns
+    plain data; a broken or oversized manifest yields {"error": ...}. A
+    file that could not be read also gets "transient": True, since another
+    read may succeed (see `cacheable`).
+    """
+    try:
+        if os.path.getsize(path) > settings.SCANNER_MAX_MANIFEST_BYTES:
+            return {"error": "too large"}
+        with open(path, encoding="utf-8", errors="replace") as f:
+            text = f.read()
+    except OSError as e:
+        return {"error": f"{type(e).__name__}: {e}"[:200], "transient": True}
+    try:
+        return PARSERS[kind](text)
+    except (ValueError, AttributeError, TypeError) as e:
+        return {"error": f"{type(e).__name__}: {e}"[:200]}
+
+
+def cacheable(result: Dict[str, Any]) -> bool:
+    """Whether a parse result depends only on the file's content."""
+    return not result.get("transient")
+
+
+def parse_manifests(batch: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+    return [parse_manifest(path, kind) for path, kind in batch]
+
+
+def _language(name: str) -> Optional[str]:
+    dot = name.rfind(".")
+    return LANGUAGES.get(name[dot:].lower()) if dot > 0 else None
+
+
+# --- git checkouts ---------------------------------------------------------
+
+@dataclass
+class TreeListing:
+    """The tracked files of one commit, reduced to what the summary needs."""
+    commit: str
+    manifests: List[Tuple[str, str, str]]  # (path, kind, blob sha) in path order
+    lock_managers: List[str]
+    file_count: int
+    language_files: Dict[str, int]
+
+    def fingerprint(self) -> str:
+        """Equal fingerprints build equal summaries, whatever else changed."""
+        inputs = {
+            "manifests": [(path, sha) for path, _, sha in self.manifests],
+            "lock_managers": sorted(self.lock_managers),
+            "file_count": self.file_count,
+            "language_files": sorted(self.language_files.items()),
+        }
+        return hashlib.sha256(json.dumps(inputs).encode()).hexdigest()
+
+
+def _git(root: str, *args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        ["git", "-C", root, *args],
+        capture_output=True,
+        check=True,
+        timeout=settings.SCANNER_GIT_TIMEOUT_SECONDS,
+    )
+
+
+def git_head(root: str) -> Optional[str]:
+    """Commit SHA checked out at `root`, or None if it is not a git checkout."""
+    try:
+        return _git(root, "rev-parse", "--verify", "HEAD^{commit}").stdout.decode().strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def list_git_tree(root: str, commit: str) -> TreeListing:
+    """
+    List the files of `commit` from git's object database (no file reads).
+    Symlinks and submodules are skipped, as in walk_repository.
+    """
+    listing = TreeListing(commit=commit, manifests=[], lock_managers=[], file_count=0, language_files={})
+    proc = subprocess.Popen(
+        ["git", "-C", root, "ls-tree", "-r", "-z", "--full-tree", commit],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        pending = b""
+        while True:
+            chunk = proc.stdout.read(1 << 16)
+            if not chunk:
+                break
+            records = (pending + chunk).split(b"\0")
+            pending = records.pop()
+            for record in records:
+                meta, _, path = record.partition(b"\t")
+                mode, obj_type, sha = meta.split(b" ")
+                if obj_type != b"blob" or mode == b"120000":
+                    continue
+                _tally(listing, path.decode("utf-8", "surrogateescape"), sha.decode())
+    finally:
+        proc.stdout.close()
+        if proc.wait(timeout=settings.SCANNER_GIT_TIMEOUT_SECONDS) != 0:
+            raise RuntimeError(f"git ls-tree {commit} failed in {root}")
+    return listing
+
+
+def _tally(listing: TreeListing, path: str, sha: str) -> None:
+    listing.file_count += 1
+    name = path.rpartition("/")[2]
+    kind = manifest_kind(name)
+    if kind is not None:
+        listing.manifests.append((path, kind, sha))
+    elif name in LOCKFILES:
+        listing.lock_managers.append(LOCKFILES[name])
+    language = _language(name)
+    if language is not None:
+        listing.language_files[language] = listing.language_files.get(language, 0) + 1
+
+
+# --- scanner ---------------------------------------------------------------
+
+def build_summary(
+    results: List[Dict[str, Any]],
+    lock_managers: List[str],
+    file_count: int,
+    language_files: Dict[str, int],
+) -> Dict[str, Any]:
+    """Fold manifest results and walk counters into the RepoScan.summary shape."""
+    dependencies = set()
+    managers = set(lock_managers)
+    targets: Dict[str, None] = {}
+    for result in results:
+        dependencies.update(result.get("dependencies", ()))
+        managers.update(result.get("package_managers", ()))
+        targets.update(dict.fromkeys(result.get("make_targets", ())))
+    # package.json without a lockfile or a declared manager means plain npm
+    if any(d.startswith("node:") for d in dependencies) and not managers & NODE_MANAGERS:
+        managers.add("npm")
+
+    total = sum(language_files.values())
+    language_stats = {
+        language: f"{round(100 * count / total)}%"
+        for language, count in sorted(language_files.items(), key=lambda item: -item[1])
+    }
+    return {
+        "dependencies": sorted(dependencies),
+        "make_targets": list(targets),
+        "package_managers": sorted(managers),
+        "file_count": file_count,
+        "language_stats": language_stats,
+    }
+
+
+class RepoScanner:
+    def __init__(self, max_workers: Optional[int], pool_min_manifests: int, pool_batch_size: int):
+        self.max_workers = max_workers
+        self.pool_min_manifests = pool_min_manifests
+        self.pool_batch_size = pool_batch_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+        self.scans = 0
+        self.failed = 0
+        self.files = 0
+        self.manifests = 0
+        self.pooled_manifests = 0
+        self.manifest_errors = 0
+        self.total_seconds = 0.0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def scan(self, root: str) -> Dict[str, Any]:
+        """Scan a checked-out tree. Blocking; use scan_async from the event loop."""
+        if not os.path.isdir(root):
+            raise FileNotFoundError(f"Not a directory: {root}")
+        started = time.perf_counter()
+        results: List[Dict[str, Any]] = []
+        futures: List[Future] = []
+        batch: List[Tuple[str, str]] = []
+        found = 0
+        lock_managers: List[str] = []
+        language_files: Dict[str, int] = {}
+        file_count = 0
+        try:
+            for rel, entry in walk_repository(root):
+                file_count += 1
+                name = entry.name
+                kind = manifest_kind(name)
+                if kind is not None:
+                    found += 1
+                    if found < self.pool_min_manifests:
+                        results.append(parse_manifest(entry.path, kind))
+                    else:
+                        batch.append((entry.path, kind))
+                        if len(batch) >= self.pool_batch_size:
+                            futures.append(self._get_executor().submit(parse_manifests, batch))
+                            batch = []
+                elif name in LOCKFILES:
+                    lock_managers.append(LOCKFILES[name])
+                language = _language(name)
+                if language is not None:
+                    language_files[language] = language_files.get(language, 0) + 1
+
+            if batch:
+                futures.append(self._get_executor().submit(parse_manifests, batch))
+            pooled = len(results)
+            for future in futures:
+                results.extend(future.result())
+            pooled = len(results) - pooled
+        except Exception:
+            self.failed += 1
+            raise
+        errors = [r for r in results if "error" in r]
+        summary = build_summary(results, lock_managers, file_count, language_files)
+
+        self.scans += 1
+        self.files += file_count
+        self.manifests += len(results)
+        self.pooled_manifests += pooled
+        self.manifest_errors += len(errors)
+        self.total_seconds += time.perf_counter() - started
+        return summary
+
+    async def scan_async(self, root: str) -> Dict[str, Any]:
+        return await asyncio.to_thread(self.scan, root)
+
+    def parse_many(self, items: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """Parse (path, kind) manifests in order, in the pool when there are many."""
+        if len(items) < self.pool_min_manifests:
+            results = parse_manifests(items)
+        else:
+            size = self.pool_batch_size
+            batches = [items[i:i + size] for i in range(0, len(items), size)]
+            results = [r for batch in self._get_executor().map(parse_manifests, batches) for r in batch]
+            self.pooled_manifests += len(results)
+        self.manifests += len(results)
+        self.manifest_errors += sum(1 for r in results if "error" in r)
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_workers": self.max_workers,
+            "pool_started": self._executor is not None,
+            "scans": self.scans,
+            "failed": self.failed,
+            "files": self.files,
+            "manifests": self.manifests,
+            "pooled_manifests": self.pooled_manifests,
+            "manifest_errors": self.manifest_errors,
+            "avg_scan_ms": round(1000 * self.total_seconds / self.scans, 2) if self.scans else 0.0,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+repo_scanner = RepoScanner(
+    max_workers=settings.SCANNER_WORKERS,
+    pool_min_manifests=settings.SCANNER_POOL_MIN_MANIFESTS,
+    pool_batch_size=settings.SCANNER_POOL_BATCH_SIZE,
+)
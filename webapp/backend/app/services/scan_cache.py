@@ -0,0 +1,221 @@
+"""
+Incremental, content-addressed scan cache.
+
+A git checkout is summarized from its commit's tree listing (paths and blob
+SHAs straight from git, no file reads), in three tiers:
+
+  commit       the repo was already scanned at this commit: stored summary
+  unchanged    same manifests, lockfiles and file/language counts as the
+               repo's latest snapshot: its summary is reused
+  incremental  only manifests whose blob is not in the cache are parsed;
+               the rest come from scan_manifest_cache
+
+Directories that are not git checkouts fall back to a full repo_scanner
+walk. Manifests are read from the working tree, so the checkout must be a
+clean checkout of HEAD (as the repo mirror's worktrees are).
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import delete, select, text, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.scan_cache import ManifestParse, ScanSnapshot
+from app.services.repo_scanner import (
+    RepoScanner, TreeListing, build_summary, cacheable, git_head, list_git_tree, repo_scanner,
+)
+
+
+# Keeps the (blob_sha, kind) IN list well under asyncpg's bind parameter limit
+LOOKUP_CHUNK = 5000
+
+# Parse results no remaining snapshot of the repo refers to
+PRUNE_MANIFESTS = text("""
+DELETE FROM scan_manifest_cache m
+WHERE m.repo_id = :repo_id
+  AND NOT EXISTS (
+    SELECT 1
+    FROM scan_snapshots s, jsonb_each_text(s.manifests) e
+    WHERE s.repo_id = m.repo_id AND e.value = m.blob_sha
+  )
+""")
+
+
+@dataclass
+class CachedScan:
+    summary: Dict[str, Any]
+    commit: Optional[str]
+    source: str  # "commit" | "unchanged" | "incremental" | "full"
+    parsed: int = 0  # manifests parsed by this scan
+    reused: int = 0  # manifests served from the cache
+
+
+class ScanCache:
+    def __init__(
+        self, scanner: RepoScanner, snapshots_per_repo: int, session_factory: async_sessionmaker = AsyncSessionLocal,
+    ):
+        self.scanner = scanner
+        self.snapshots_per_repo = snapshots_per_repo
+        self.session_factory = session_factory
+
+        self.sources: Dict[str, int] = {"commit": 0, "unchanged": 0, "incremental": 0, "full": 0}
+        self.parsed = 0
+        self.reused = 0
+        self.total_seconds = 0.0
+
+    async def scan(self, repo_id: UUID, root: str) -> CachedScan:
+        """
+        Summarize the checkout at `root`, reusing earlier work. Database work
+        happens in short sessions of its own: no connection is held while
+        git lists the tree or manifests are read and parsed.
+        """
+        started = time.perf_counter()
+        result = await self._scan(repo_id, root)
+        self.sources[result.source] += 1
+        self.parsed += result.parsed
+        self.reused += result.reused
+        self.total_seconds += time.perf_counter() - started
+        return result
+
+    async def lookup(self, db: AsyncSession, repo_id: UUID, commit: str) -> Optional[CachedScan]:
+        """The stored result for a commit, so callers can skip the checkout."""
+        snapshot = await db.get(ScanSnapshot, (repo_id, commit))
+        if snapshot is None:
+            return None
+        self.sources["commit"] += 1
+        return CachedScan(summary=snapshot.summary, commit=commit, source="commit")
+
+    async def _scan(self, repo_id: UUID, root: str) -> CachedScan:
+        commit = await asyncio.to_thread(git_head, root)
+        if commit is None:
+            return CachedScan(summary=await self.scanner.scan_async(root), commit=None, source="full")
+
+        async with self.session_factory() as db:
+            snapshot = await db.get(ScanSnapshot, (repo_id, commit))
+            if snapshot is not None:
+                return CachedScan(summary=snapshot.summary, commit=commit, source="commit")
+            latest = (await db.execute(
+                select(ScanSnapshot)
+                .where(ScanSnapshot.repo_id == repo_id)
+                .order_by(ScanSnapshot.created_at.desc())
+                .limit(1)
+            )).scalar_one_or_none()
+
+        listing = await asyncio.to_thread(list_git_tree, root, commit)
+        fingerprint = listing.fingerprint()
+        fresh: Dict[tuple, Dict[str, Any]] = {}
+        if latest is not None and latest.fingerprint == fingerprint:
+            result = CachedScan(summary=latest.summary, commit=commit, source="unchanged")
+        else:
+            async with self.session_factory() as db:
+                cached = await self._cached_parses(db, repo_id, listing)
+            result, fresh = await self._incremental(root, listing, cached)
+
+        # A manifest that could not be read (I/O error, incomplete checkout)
+        # is neither cached by blob nor allowed into a commit snapshot
+        complete = all(cacheable(parsed) for parsed in fresh.values())
+        fresh = {key: parsed for key, parsed in fresh.items() if cacheable(parsed)}
+        async with self.session_factory() as db:
+            if fresh:
+                await db.execute(
+                    pg_insert(ManifestParse).on_conflict_do_nothing(),
+                    [
+                        {"repo_id": repo_id, "blob_sha": sha, "kind": kind, "result": parsed}
+                        for (sha, kind), parsed in fresh.items()
+                    ],
+                )
+            if complete:
+                await self._store_snapshot(db, repo_id, listing, fingerprint, result.summary)
+            await db.commit()
+        return result
+
+    async def _cached_parses(self, db: AsyncSession, repo_id: UUID, listing: TreeListing) -> Dict[tuple, Dict[str, Any]]:
+        keys = list({(sha, kind) for _, kind, sha in listing.manifests})
+        cached: Dict[tuple, Dict[str, Any]] = {}
+        for start in range(0, len(keys), LOOKUP_CHUNK):
+            rows = await db.execute(
+                select(ManifestParse.blob_sha, ManifestParse.kind, ManifestParse.result)
+                .where(
+                    ManifestParse.repo_id == repo_id,
+                    tuple_(ManifestParse.blob_sha, ManifestParse.kind).in_(keys[start:start + LOOKUP_CHUNK]),
+                )
+            )
+            cached.update(((sha, kind), result) for sha, kind, result in rows)
+        return cached
+
+    async def _incremental(
+        self, root: str, listing: TreeListing, cached: Dict[tuple, Dict[str, Any]],
+    ) -> Tuple[CachedScan, Dict[tuple, Dict[str, Any]]]:
+        """Parse the manifests missing from `cached`; returns the scan and the new parses."""
+        # One parse per distinct blob, even if several paths share it
+        missing: Dict[tuple, str] = {}
+        for path, kind, sha in listing.manifests:
+            if (sha, kind) not in cached:
+                missing.setdefault((sha, kind), path)
+        fresh: Dict[tuple, Dict[str, Any]] = {}
+        if missing:
+            items = [(f"{root}/{path}", kind) for (_, kind), path in missing.items()]
+            parsed = await asyncio.to_thread(self.scanner.parse_many, items)
+            fresh = dict(zip(missing, parsed))
+            cached = {**cached, **fresh}
+
+        results = [cached[(sha, kind)] for _, kind, sha in listing.manifests]
+        summary = build_summary(results, listing.lock_managers, listing.file_count, listing.language_files)
+        result = CachedScan(
+            summary=summary,
+            commit=listing.commit,
+            source="incremental",
+            parsed=len(missing),
+            reused=len(listing.manifests) - len(missing),
+        )
+        return result, fresh
+
+    async def _store_snapshot(
+        self, db: AsyncSession, repo_id: UUID, listing: TreeListing, fingerprint: str, summary: Dict[str, Any],
+    ) -> None:
+        await db.execute(
+            pg_insert(ScanSnapshot)
+            .values(
+                repo_id=repo_id,
+                commit_sha=listing.commit,
+                fingerprint=fingerprint,
+                manifests={path: sha for path, _, sha in listing.manifests},
+                summary=summary,
+            )
+            .on_conflict_do_nothing()
+        )
+        expired = (
+            select(ScanSnapshot.commit_sha)
+            .where(ScanSnapshot.repo_id == repo_id)
+            .order_by(ScanSnapshot.created_at.desc())
+            .offset(self.snapshots_per_repo)
+        )
+        trimmed = await db.execute(
+            delete(ScanSnapshot)
+            .where(ScanSnapshot.repo_id == repo_id, ScanSnapshot.commit_sha.in_(expired.scalar_subquery()))
+            .execution_options(synchronize_session=False)
+        )
+        if trimmed.rowcount:
+            await db.execute(PRUNE_MANIFESTS, {"repo_id": repo_id})
+
+    def stats(self) -> Dict[str, Any]:
+        scans = sum(self.sources.values())
+        return {
+            "scans": scans,
+            "commit_hits": self.sources["commit"],
+            "unchanged_hits": self.sources["unchanged"],
+            "incremental_scans": self.sources["incremental"],
+            "full_scans": self.sources["full"],
+            "manifests_parsed": self.parsed,
+            "manifests_reused": self.reused,
+            "avg_scan_ms": round(1000 * self.total_seconds / scans, 2) if scans else 0.0,
+        }
+
+
+scan_cache = ScanCache(repo_scanner, snapshots_per_repo=settings.SCAN_CACHE_SNAPSHOTS_PER_REPO)
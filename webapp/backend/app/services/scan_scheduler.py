@@ -0,0 +1,428 @@
+"""
+Scan scheduler: dedup, concurrency caps and leases on top of repo_scans.
+
+`request_scan` inserts a QUEUED scan unless the repo already has one queued
+or running (a partial unique index makes this race-free), so repeated
+clicks share one scan. The scheduler loop moves QUEUED scans to RUNNING
+while fewer than SCAN_MAX_RUNNING scans run in total and fewer than
+SCAN_MAX_RUNNING_PER_COMPANY per company, taking each company's oldest
+scans round-robin so one busy tenant cannot starve the others.
+
+Claiming locks candidate rows FOR UPDATE SKIP LOCKED, and the counting and
+claiming run under a transaction-scoped advisory lock, so the caps hold with
+any number of API workers (one that misses the lock just waits for its next
+tick). Every claim takes a lease:
+
+  n8n    the workflow is triggered through the outbox in the claiming
+         transaction; /repos/scanresult finishes the scan
+  local  the scan runs in this process (scan_services.scan_repository) and
+         a heartbeat renews the lease until it ends in DONE or ERROR
+
+The reaper puts RUNNING scans whose lease has expired (a worker that died,
+a workflow that never reported back) back in the queue, or moves them to
+ERROR after SCAN_MAX_ATTEMPTS.
+"""
+import asyncio
+import os
+import socket
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import func, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.repo import Repo, RepoScan, ScanStatus
+from app.services.outbox import N8N_SCAN_TOPIC, enqueue, n8n_scan_payload, outbox_dispatcher
+from app.services.scan_services import scan_repository
+
+
+# Serializes cap accounting across workers (pg_try_advisory_xact_lock key)
+SCHEDULER_LOCK_KEY = 0x5CA45C4ED
+REAP_BATCH = 100
+
+ACTIVE_STATUSES = (ScanStatus.QUEUED, ScanStatus.RUNNING)
+# Must match the predicate of uq_repo_scans_repo_active for ON CONFLICT inference
+ACTIVE_PREDICATE = text("status IN ('QUEUED', 'RUNNING')")
+
+# The first :per_company queued scans of every company, ranked behind the
+# scans that company already runs; the best ranks across companies win the
+# free slots, oldest first within a rank
+CLAIM = text("""
+WITH companies AS (
+    SELECT DISTINCT company_id FROM repo_scans WHERE status = 'QUEUED'
+), queued AS (
+    SELECT q.id, q.company_id, q.created_at
+    FROM companies c
+    CROSS JOIN LATERAL (
+        SELECT s.id, s.company_id, s.created_at
+        FROM repo_scans s
+        WHERE s.status = 'QUEUED' AND s.company_id = c.company_id
+        ORDER BY s.created_at
+        LIMIT :per_company
+        FOR UPDATE SKIP LOCKED
+    ) q
+), running AS (
+    SELECT company_id, count(*) AS n
+    FROM repo_scans
+    WHERE status = 'RUNNING'
+    GROUP BY company_id
+), ranked AS (
+    SELECT q.id, q.created_at,
+           coalesce(r.n, 0) + row_number() OVER (PARTITION BY q.company_id ORDER BY q.created_at) AS slot
+    FROM queued q
+    LEFT JOIN running r ON r.company_id = q.company_id
+), picked AS (
+    SELECT id FROM ranked
+    WHERE slot <= :per_company
+    ORDER BY slot, created_at
+    LIMIT :slots
+)
+UPDATE repo_scans s
+SET status = 'RUNNING',
+    attempts = s.attempts + 1,
+    worker_id = :worker_id,
+    started_at = :now,
+    heartbeat_at = :now,
+    lease_expires_at = :lease_expires_at,
+    updated_at = :now
+FROM picked
+WHERE s.id = picked.id
+RETURNING s.id, s.repo_id, s.company_id, s.attempts
+""")
+
+
+@dataclass(frozen=True)
+class ScanClaim:
+    scan_id: UUID
+    repo_id: UUID
+    company_id: UUID
+    attempts: int
+
+
+class ScanScheduler:
+    def __init__(
+        self,
+        executor: str,
+        max_running: int,
+        max_running_per_company: int,
+        concurrency: int,
+        poll_interval: float,
+        heartbeat_interval: float,
+        lease_seconds: float,
+        n8n_lease_seconds: float,
+        max_attempts: int,
+        reaper_interval: float,
+    ):
+        if executor not in ("n8n", "local"):
+            raise ValueError(f"Unknown scan executor {executor!r}")
+        self.executor = executor
+        self.max_running = max_running
+        self.max_running_per_company = max_running_per_company
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.lease_seconds = lease_seconds
+        self.n8n_lease_seconds = n8n_lease_seconds
+        self.max_attempts = max_attempts
+        self.reaper_interval = reaper_interval
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._task: Optional[asyncio.Task] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._running: Dict[UUID, asyncio.Task] = {}  # local scans of this worker
+
+        self.deduplicated = 0
+        self.claimed = 0
+        self.completed = 0
+        self.failed = 0
+        self.requeued = 0
+        self.timed_out = 0
+        self.lock_misses = 0
+        self.last_error: Optional[str] = None
+
+    async def request_scan(self, db: AsyncSession, repo: Repo) -> Tuple[RepoScan, bool]:
+        """
+        The repo's queued or running scan, or a new QUEUED one. Returns
+        (scan, created); the caller commits and wakes the scheduler.
+        """
+        for _ in range(3):
+            scan_id = (await db.execute(
+                pg_insert(RepoScan)
+                .values(company_id=repo.company_id, repo_id=repo.id, status=ScanStatus.QUEUED, summary={}, attempts=0)
+                .on_conflict_do_nothing(index_elements=[RepoScan.repo_id], index_where=ACTIVE_PREDICATE)
+                .returning(RepoScan.id)
+            )).scalar_one_or_none()
+            if scan_id is not None:
+                return await db.get(RepoScan, scan_id), True
+            existing = (await db.execute(
+                select(RepoScan).where(RepoScan.repo_id == repo.id, RepoScan.status.in_(ACTIVE_STATUSES))
+            )).scalar_one_or_none()
+            if existing is not None:
+                self.deduplicated += 1
+                return existing, False
+            # The conflicting scan finished in between: try the insert again
+        raise RuntimeError(f"Could not queue a scan for repo {repo.id}")
+
+    def start(self) -> None:
+        if self._task is not None and not self._task.done():
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        if self.executor == "local":
+            self._heartbeat_task = asyncio.create_task(self._heartbeat())
+
+    async def stop(self) -> None:
+        local_scans = list(self._running)
+        tasks = [task for task in (self._task, self._heartbeat_task) if task is not None]
+        tasks.extend(self._running.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = self._heartbeat_task = None
+        if local_scans:
+            try:
+                await self._release(local_scans)
+            except Exception as e:
+                print(f"[SCHEDULER] Could not release running scans: {e}")
+
+    def wake(self) -> None:
+        """Skip the rest of the poll interval (call after queueing a scan)."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        next_reap = 0.0
+        while True:
+            claimed = 0
+            try:
+                if time.monotonic() >= next_reap:
+                    await self.reap()
+                    next_reap = time.monotonic() + self.reaper_interval
+                claimed = await self.schedule_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"[:300]
+                print(f"[SCHEDULER] Scheduling failed: {self.last_error}")
+            if not claimed:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+
+    async def schedule_once(self) -> int:
+        """Claim as many queued scans as the caps allow and start them. Returns the count."""
+        claims = await self._claim()
+        if self.executor == "n8n":
+            if claims:
+                outbox_dispatcher.wake()
+        else:
+            for claim in claims:
+                self._running[claim.scan_id] = asyncio.create_task(self._execute(claim))
+        self.claimed += len(claims)
+        return len(claims)
+
+    async def _claim(self) -> List[ScanClaim]:
+        local_free = self.concurrency - len(self._running) if self.executor == "local" else self.max_running
+        if local_free <= 0:
+            return []
+        now = datetime.utcnow()
+        lease = self.lease_seconds if self.executor == "local" else self.n8n_lease_seconds
+        async with AsyncSessionLocal() as db:
+            locked = await db.scalar(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": SCHEDULER_LOCK_KEY})
+            if not locked:
+                self.lock_misses += 1
+                return []
+            running = await db.scalar(
+                select(func.count()).select_from(RepoScan).where(RepoScan.status == ScanStatus.RUNNING)
+            )
+            slots = min(self.max_running - running, local_free)
+            if slots <= 0:
+                return []
+            rows = (await db.execute(CLAIM, {
+                "per_company": self.max_running_per_company,
+                "slots": slots,
+                "worker_id": self.worker_id,
+                "now": now,
+                "lease_expires_at": now + timedelta(seconds=lease),
+            })).all()
+            claims = [ScanClaim(*row) for row in rows]
+            if claims and self.executor == "n8n":
+                repos = {
+                    repo.id: repo
+                    for repo in (await db.execute(
+                        select(Repo).where(Repo.id.in_([claim.repo_id for claim in claims]))
+                    )).scalars()
+                }
+                # The workflow is triggered once this commits, and only then
+                for claim in claims:
+                    enqueue(db, claim.company_id, N8N_SCAN_TOPIC, claim.scan_id,
+                            n8n_scan_payload(claim.scan_id, repos[claim.repo_id]))
+            await db.commit()
+        return claims
+
+    async def _execute(self, claim: ScanClaim) -> None:
+        try:
+            async with AsyncSessionLocal() as db:
+                repo = await db.get(Repo, claim.repo_id)
+            cached = await scan_repository(repo)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.failed += 1
+            print(f"[SCHEDULER] Scan {claim.scan_id} of repo {claim.repo_id} failed: {e}")
+            await self._finish(claim, ScanStatus.ERROR, {"error": f"{type(e).__name__}: {e}"[:500]})
+        else:
+            print(f"[SCHEDULER] Scan {claim.scan_id} at {cached.commit or 'working tree'}: {cached.source}, "
+                  f"{cached.parsed} manifests parsed, {cached.reused} reused")
+            if await self._finish(claim, ScanStatus.DONE, cached.summary):
+                self.completed += 1
+        finally:
+            self._running.pop(claim.scan_id, None)
+            self.wake()  # a slot is free
+
+    async def _finish(self, claim: ScanClaim, status: ScanStatus, summary: Dict[str, Any]) -> bool:
+        # Only our own attempt: once reaped, the scan may belong to another worker
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(RepoScan)
+                .where(
+                    RepoScan.id == claim.scan_id,
+                    RepoScan.status == ScanStatus.RUNNING,
+                    RepoScan.worker_id == self.worker_id,
+                    RepoScan.attempts == claim.attempts,
+                )
+                .values(status=status, summary=summary, lease_expires_at=None)
+            )
+            await db.commit()
+        return result.rowcount == 1
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            if not self._running:
+                continue
+            try:
+                await self.beat()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"[:300]
+                print(f"[SCHEDULER] Heartbeat failed: {self.last_error}")
+
+    async def beat(self) -> None:
+        """Renew the leases of this worker's local scans in one statement."""
+        now = datetime.utcnow()
+        scan_ids = list(self._running)
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(RepoScan)
+                .where(
+                    RepoScan.id.in_(scan_ids),
+                    RepoScan.status == ScanStatus.RUNNING,
+                    RepoScan.worker_id == self.worker_id,
+                )
+                # A heartbeat is not a change: keep updated_at (and the recent scans order)
+                .values(heartbeat_at=now, lease_expires_at=now + timedelta(seconds=self.lease_seconds),
+                        updated_at=RepoScan.updated_at)
+                .returning(RepoScan.id)
+            )
+            renewed = set(result.scalars())
+            await db.commit()
+        # Reaped (or finished elsewhere) while running here: stop working on them
+        for scan_id in scan_ids:
+            task = self._running.get(scan_id)
+            if scan_id not in renewed and task is not None:
+                print(f"[SCHEDULER] Lost the lease on scan {scan_id}, cancelling it")
+                task.cancel()
+
+    async def reap(self) -> int:
+        """Requeue or fail RUNNING scans whose lease has expired. Returns the count."""
+        now = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(
+                select(RepoScan.id, RepoScan.attempts)
+                .where(RepoScan.status == ScanStatus.RUNNING, RepoScan.lease_expires_at < now)
+                .order_by(RepoScan.lease_expires_at)
+                .limit(REAP_BATCH)
+                .with_for_update(skip_locked=True)
+            )).all()
+            retry = [scan_id for scan_id, attempts in rows if attempts < self.max_attempts]
+            give_up = [scan_id for scan_id, attempts in rows if attempts >= self.max_attempts]
+            if retry:
+                await db.execute(
+                    update(RepoScan)
+                    .where(RepoScan.id.in_(retry))
+                    .values(status=ScanStatus.QUEUED, worker_id=None, lease_expires_at=None)
+                )
+            if give_up:
+                await db.execute(
+                    update(RepoScan)
+                    .where(RepoScan.id.in_(give_up))
+                    .values(
+                        status=ScanStatus.ERROR,
+                        lease_expires_at=None,
+                        summary={"error": f"Scan timed out after {self.max_attempts} attempts"},
+                    )
+                )
+            await db.commit()
+        if rows:
+            self.requeued += len(retry)
+            self.timed_out += len(give_up)
+            print(f"[SCHEDULER] Reaped {len(rows)} expired scans: {len(retry)} requeued, {len(give_up)} timed out")
+            self.wake()
+        return len(rows)
+
+    async def _release(self, scan_ids: List[UUID]) -> None:
+        # Shutting down: hand unfinished local scans back without spending an attempt
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(RepoScan)
+                .where(
+                    RepoScan.id.in_(scan_ids),
+                    RepoScan.status == ScanStatus.RUNNING,
+                    RepoScan.worker_id == self.worker_id,
+                )
+                .values(status=ScanStatus.QUEUED, attempts=RepoScan.attempts - 1, worker_id=None, lease_expires_at=None)
+            )
+            await db.commit()
+        if result.rowcount:
+            print(f"[SCHEDULER] Released {result.rowcount} running scans")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "executor": self.executor,
+            "worker_id": self.worker_id,
+            "local_scans": len(self._running),
+            "claimed": self.claimed,
+            "deduplicated": self.deduplicated,
+            "completed": self.completed,
+            "failed": self.failed,
+            "requeued": self.requeued,
+            "timed_out": self.timed_out,
+            "lock_misses": self.lock_misses,
+            "last_error": self.last_error,
+        }
+
+
+scan_scheduler = ScanScheduler(
+    executor=settings.SCAN_EXECUTOR,
+    max_running=settings.SCAN_MAX_RUNNING,
+    max_running_per_company=settings.SCAN_MAX_RUNNING_PER_COMPANY,
+    concurrency=settings.SCAN_WORKER_CONCURRENCY,
+    poll_interval=settings.SCAN_POLL_INTERVAL_SECONDS,
+    heartbeat_interval=settings.SCAN_HEARTBEAT_SECONDS,
+    lease_seconds=settings.SCAN_LEASE_SECONDS,
+    n8n_lease_seconds=settings.SCAN_N8N_LEASE_SECONDS,
+    max_attempts=settings.SCAN_MAX_ATTEMPTS,
+    reaper_interval=settings.SCAN_REAPER_INTERVAL_SECONDS,
+)
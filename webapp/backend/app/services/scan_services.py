@@ -1,43 +1,25 @@
-import asyncio
-import random
-from uuid import UUID
-from sqlalchemy import update
-from app.models.repo import RepoScan, ScanStatus
+from app.models.repo import Repo
 from app.db.session import AsyncSessionLocal
+from app.services.repo_mirror import MirrorKey, clone_url, repo_mirror
+from app.services.repo_scanner import MANIFEST_PATTERNS
+from app.services.scan_cache import CachedScan, scan_cache
 
 
-async def scan_repository(repo_id: UUID, scan_id: UUID, company_id: UUID):
-    """Simulate repository scanning with fake data"""
-    
-    # Sleep to simulate scanning time
-    await asyncio.sleep(random.uniform(2, 3))
-    
-    # Generate fake scan summary
-    summary = {
-        "dependencies": [
-            "python:requests",
-            "python:fastapi",
-            "node:axios",
-            "node:express"
-        ],
-        "make_targets": ["setup", "test", "build", "deploy"],
-        "package_managers": ["pip", "npm", "yarn"],
-        "file_count": random.randint(50, 200),
-        "language_stats": {
-            "Python": f"{random.randint(30, 60)}%",
-            "JavaScript": f"{random.randint(20, 40)}%",
-            "Other": f"{random.randint(10, 30)}%"
-        }
-    }
-    
-    # Update scan status in database
-    async with AsyncSessionLocal() as db:
-        await db.execute(
-            update(RepoScan)
-            .where(RepoScan.id == scan_id)
-            .values(
-                status=ScanStatus.DONE,
-                summary=summary
-            )
-        )
-        await db.commit()
\ No newline at end of file
+async def scan_repository(repo: Repo, url: str | None = None) -> CachedScan:
+    """
+    Scan the repo's default branch from its local mirror. Status transitions
+    of the scan row belong to the caller (app.services.scan_scheduler).
+    """
+    url = url or clone_url(repo.provider.value, repo.org, repo.name)
+    async with repo_mirror.session(MirrorKey.for_repo(repo), url) as mirror:
+        commit = await mirror.resolve(repo.default_branch)
+        # An already scanned commit needs no checkout at all
+        async with AsyncSessionLocal() as db:
+            cached = await scan_cache.lookup(db, repo.id, commit)
+        if cached is None:
+            # The cache lists files from git objects; only manifests are read
+            # from disk. It opens its own sessions, so no pooled connection
+            # waits on the checkout.
+            async with mirror.worktree(commit, sparse=MANIFEST_PATTERNS) as checkout_path:
+                cached = await scan_cache.scan(repo.id, checkout_path)
+    return cached
@@ -0,0 +1,61 @@
+"""
+Mergeable quantile sketch for durations.
+
+Values fall into logarithmic buckets whose bounds grow by `GAMMA`, so any
+quantile is estimated within RELATIVE_ACCURACY of the true value, and two
+sketches merge by adding bucket counts. Serialized as a flat JSON object of
+`{"<bucket>": count}` ("z" holds zeros), which Postgres can merge with the
+`jsonb_sum_merge` function from migration 008.
+"""
+import math
+from typing import Dict, Iterable, Optional
+
+
+RELATIVE_ACCURACY = 0.02
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+_LOG_GAMMA = math.log(GAMMA)
+ZERO_KEY = "z"
+
+
+class LogHistogram:
+    def __init__(self, buckets: Optional[Dict[str, int]] = None):
+        self.buckets: Dict[str, int] = dict(buckets or {})
+
+    @classmethod
+    def of(cls, values: Iterable[float]) -> "LogHistogram":
+        sketch = cls()
+        for value in values:
+            sketch.add(value)
+        return sketch
+
+    @property
+    def count(self) -> int:
+        return sum(self.buckets.values())
+
+    def add(self, value: float, n: int = 1) -> None:
+        key = ZERO_KEY if value <= 0 else str(math.ceil(math.log(value) / _LOG_GAMMA))
+        self.buckets[key] = self.buckets.get(key, 0) + n
+
+    def merge(self, other: "LogHistogram") -> "LogHistogram":
+        for key, n in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + n
+        return self
+
+    def quantile(self, q: float) -> Optional[float]:
+        total = self.count
+        if total == 0:
+            return None
+        rank = q * (total - 1)
+        seen = 0
+        for key in sorted(self.buckets, key=_bucket_order):
+            seen += self.buckets[key]
+            if seen > rank:
+                return 0.0 if key == ZERO_KEY else 2 * GAMMA ** int(key) / (GAMMA + 1)
+        return None
+
+    def to_json(self) -> Dict[str, int]:
+        return dict(self.buckets)
+
+
+def _bucket_order(key: str) -> float:
+    return -math.inf if key == ZERO_KEY else int(key)
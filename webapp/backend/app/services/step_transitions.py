@@ -0,0 +1,446 @@
+"""
+Server-side step transitions for onboarding states.
+
+Each transition is a single UPDATE that patches one step and adjusts the
+onboarding's `completed_steps` / `progress` counters in the same statement.
+For JSONB storage the step is patched in place with `jsonb_set`; for table
+storage (see app.services.onboarding_steps) only its `onboarding_steps`
+row changes. Either way the patch is applied to the row version the UPDATE
+actually locks, so concurrent transitions on *different* steps of one
+onboarding both survive (the old SELECT / mutate / commit flow lost one of
+them).
+
+Transitions also keep the onboarding's status in step with its counters
+(COMPLETED once every step is) and record `step_completed` /
+`onboarding_completed` events, which feed app.services.analytics_rollups.
+
+Every write bumps `onboarding_states.version`. Callers may pass the
+version they last saw (If-Match); a mismatch raises PreconditionFailed.
+Batches read without row locks and rely on the ORM's version check,
+re-running on a concurrent write since step ops commute with writes to
+other steps and re-apply cleanly on the same one.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import DateTime, Integer, String, bindparam, insert, select, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.core.config import settings
+from app.models.event import Event
+from app.models.onboarding import OnboardingState, OnboardingStatus, OnboardingStep, StepStorage
+from app.schemas.onboarding import StepBatchOp, StepBatchOpResult
+from app.services.onboarding_steps import STATE_FIELDS, progress_for
+
+
+# Shared tail of both transition statements. `calc` carries the locked
+# onboarding's counters/status and the step's completion `delta` (1 if the
+# patch completes the step, -1 if it reopens it, else 0). The onboarding is
+# COMPLETED exactly while all of its steps are.
+_COUNTERS_SET = """
+        completed_steps = calc.completed_steps + calc.delta,
+        progress = CASE WHEN calc.total_steps = 0 THEN 0
+                   ELSE 100 * (calc.completed_steps + calc.delta) / calc.total_steps END,
+        status = CASE
+            WHEN calc.total_steps > 0 AND calc.completed_steps + calc.delta >= calc.total_steps
+                THEN 'COMPLETED'::onboardingstatus
+            WHEN o.status = 'COMPLETED' THEN 'ACTIVE'::onboardingstatus
+            ELSE o.status
+        END,
+        version = o.version + 1,
+        updated_at = :now"""
+
+_RETURNING = """
+    RETURNING o.progress, o.version, o.status::text AS status, o.created_at,
+              calc.onboarding_status::text AS previous_status, calc.delta,"""
+
+# `prev` locks the onboarding row, so the step's current status, the
+# counters and the version check are read from its latest version, and
+# `target` locates the step's array index (positions are stable: steps are
+# never reordered). Concurrent transitions on other steps queue on the lock
+# and then patch their own element, so neither is lost.
+_APPLY_JSONB_PATCH = text(
+    f"""
+    WITH prev AS (
+        SELECT o.id, target.idx, o.steps -> target.idx ->> 'status' AS step_status,
+               o.status AS onboarding_status, o.completed_steps, o.total_steps
+        FROM onboarding_states AS o
+        CROSS JOIN LATERAL (
+            SELECT (e.ord - 1)::int AS idx
+            FROM jsonb_array_elements(o.steps) WITH ORDINALITY AS e(value, ord)
+            WHERE e.value ->> 'id' = :step_id
+            ORDER BY e.ord
+            LIMIT 1
+        ) AS target
+        WHERE o.id = :onboarding_id AND o.company_id = :company_id AND o.step_storage = 'jsonb'
+          AND (CAST(:expected_version AS int) IS NULL OR o.version = :expected_version)
+        FOR NO KEY UPDATE OF o
+    ), calc AS (
+        SELECT prev.*,
+               COALESCE(COALESCE(:patch ->> 'status', prev.step_status) = 'completed', false)::int
+               - COALESCE(prev.step_status = 'completed', false)::int AS delta
+        FROM prev
+    )
+    UPDATE onboarding_states AS o
+    SET steps = jsonb_set(o.steps, ARRAY[calc.idx::text], (o.steps -> calc.idx) || :patch),{_COUNTERS_SET}
+    FROM calc
+    WHERE o.id = calc.id
+    {_RETURNING}
+              o.steps -> calc.idx AS step
+    """
+).bindparams(bindparam("patch", type_=JSONB)).columns(
+    progress=Integer, version=Integer, status=String, created_at=DateTime,
+    previous_status=String, delta=Integer, step=JSONB,
+)
+
+# Same shape for table storage: `prev` locks the step row and the onboarding
+# row, `step` patches the step, and the outer UPDATE moves the counters.
+_APPLY_TABLE_PATCH = text(
+    f"""
+    WITH prev AS (
+        SELECT o.id, s.step_id, s.status AS step_status,
+               o.status AS onboarding_status, o.completed_steps, o.total_steps
+        FROM onboarding_steps AS s
+        JOIN onboarding_states AS o ON o.id = s.onboarding_id
+        WHERE o.id = :onboarding_id AND o.company_id = :company_id
+          AND o.step_storage = 'table' AND s.step_id = :step_id
+          AND (CAST(:expected_version AS int) IS NULL OR o.version = :expected_version)
+        FOR NO KEY UPDATE OF s, o
+    ), step AS (
+        UPDATE onboarding_steps AS s
+        SET status = COALESCE(:status, s.status),
+            started_at = COALESCE(:started_at, s.started_at),
+            completed_at = COALESCE(:completed_at, s.completed_at),
+            validation_result = COALESCE(:validation_result, s.validation_result)
+        FROM prev
+        WHERE s.onboarding_id = prev.id AND s.step_id = prev.step_id
+        RETURNING s.*
+    ), calc AS (
+        SELECT prev.id, prev.onboarding_status, prev.completed_steps, prev.total_steps,
+               step.step_id, step.status, step.started_at, step.completed_at, step.validation_result,
+               (step.status = 'completed')::int - (prev.step_status = 'completed')::int AS delta
+        FROM prev
+        JOIN step ON step.onboarding_id = prev.id AND step.step_id = prev.step_id
+    )
+    UPDATE onboarding_states AS o
+    SET{_COUNTERS_SET}
+    FROM calc
+    WHERE o.id = calc.id
+    {_RETURNING}
+              jsonb_build_object(
+                  'id', calc.step_id,
+                  'status', calc.status,
+                  'started_at', calc.started_at,
+                  'completed_at', calc.completed_at,
+                  'validation_result', calc.validation_result
+              ) AS step
+    """
+).bindparams(bindparam("validation_result", type_=JSONB)).columns(
+    progress=Integer, version=Integer, status=String, created_at=DateTime,
+    previous_status=String, delta=Integer, step=JSONB,
+)
+
+
+class PreconditionFailed(Exception):
+    """The onboarding's version no longer matches the caller's If-Match."""
+
+
+class ConcurrentUpdate(Exception):
+    """A batch kept losing the version race and ran out of retries."""
+
+
+@dataclass
+class StepTransition:
+    progress: int
+    version: int
+    step: Dict[str, Any]
+
+
+@dataclass
+class StepBatchOutcome:
+    progress: int
+    version: int
+    results: List[StepBatchOpResult]
+    attempts: int
+
+
+def _now() -> datetime:
+    return datetime.utcnow()
+
+
+def start_patch() -> Dict[str, Any]:
+    return {"status": "in_progress", "started_at": _now()}
+
+
+def complete_patch() -> Dict[str, Any]:
+    return {"status": "completed", "completed_at": _now()}
+
+
+def validate_patch(status: str, details: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    patch: Dict[str, Any] = {"validation_result": {"status": status, "details": details}}
+    if status == "passed":
+        patch.update(complete_patch())
+    return patch
+
+
+def _as_datetime(value: Any) -> Optional[datetime]:
+    # Timestamps come back from JSONB as ISO strings
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    return value if isinstance(value, datetime) else None
+
+
+def _seconds_between(start: Any, end: Any) -> Optional[float]:
+    start, end = _as_datetime(start), _as_datetime(end)
+    if start is None or end is None:
+        return None
+    return max((end - start).total_seconds(), 0.0)
+
+
+def _event(company_id: UUID, onboarding_id: UUID, action: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "company_id": company_id,
+        "entity": "onboarding_state",
+        "entity_id": onboarding_id,
+        "action": action,
+        "payload": payload,
+    }
+
+
+def step_completed_event(company_id: UUID, onboarding_id: UUID, step: Dict[str, Any]) -> Dict[str, Any]:
+    return _event(company_id, onboarding_id, "step_completed", {
+        "step_id": step.get("id"),
+        "dwell_seconds": _seconds_between(step.get("started_at"), step.get("completed_at")),
+    })
+
+
+def onboarding_completed_event(
+    company_id: UUID, onboarding_id: UUID, created_at: datetime, completed_at: datetime
+) -> Dict[str, Any]:
+    return _event(company_id, onboarding_id, "onboarding_completed", {
+        "seconds": _seconds_between(created_at, completed_at),
+    })
+
+
+def _transition_events(company_id: UUID, onboarding_id: UUID, row: Any, now: datetime) -> List[Dict[str, Any]]:
+    events = []
+    if row.delta > 0:
+        events.append(step_completed_event(company_id, onboarding_id, row.step))
+    # The statements return Postgres enum labels ('COMPLETED'), not values
+    completed = OnboardingStatus.COMPLETED.name
+    if row.status == completed and row.previous_status != completed:
+        events.append(onboarding_completed_event(company_id, onboarding_id, row.created_at, now))
+    return events
+
+
+async def _apply_jsonb(db: AsyncSession, params: Dict[str, Any], patch: Dict[str, Any]):
+    return (await db.execute(_APPLY_JSONB_PATCH, {**params, "patch": patch})).one_or_none()
+
+
+async def _apply_table(db: AsyncSession, params: Dict[str, Any], patch: Dict[str, Any]):
+    fields = {field: patch.get(field) for field in STATE_FIELDS}
+    return (await db.execute(_APPLY_TABLE_PATCH, {**params, **fields})).one_or_none()
+
+
+async def apply_step_patch(
+    db: AsyncSession,
+    onboarding_id: UUID,
+    company_id: UUID,
+    step_id: str,
+    patch: Dict[str, Any],
+    expected_version: Optional[int] = None,
+) -> Optional[StepTransition]:
+    """
+    Merge `patch` into one step and return the new progress and version, or
+    None when the onboarding (scoped to the company) or the step does not
+    exist. Both statements are guarded by `step_storage`, so the one
+    matching the configured default runs first and the other only on a miss.
+    The caller owns the transaction.
+    """
+    params = {
+        "onboarding_id": onboarding_id,
+        "company_id": company_id,
+        "step_id": step_id,
+        "expected_version": expected_version,
+        "now": _now(),
+    }
+    appliers = [_apply_jsonb, _apply_table]
+    if settings.ONBOARDING_STEP_STORAGE == StepStorage.TABLE.value:
+        appliers.reverse()
+
+    for apply in appliers:
+        row = await apply(db, params, patch)
+        if row is not None:
+            events = _transition_events(company_id, onboarding_id, row, params["now"])
+            if events:
+                await db.execute(insert(Event), events)
+            return StepTransition(progress=row.progress, version=row.version, step=row.step)
+
+    if expected_version is not None:
+        await _check_version(db, onboarding_id, company_id, expected_version)
+    return None
+
+
+async def _check_version(db: AsyncSession, onboarding_id: UUID, company_id: UUID, expected_version: int) -> None:
+    current = (await db.execute(
+        select(OnboardingState.version).where(
+            OnboardingState.id == onboarding_id, OnboardingState.company_id == company_id
+        )
+    )).scalar_one_or_none()
+    if current is not None and current != expected_version:
+        raise PreconditionFailed()
+
+
+def patch_for_op(op: StepBatchOp) -> Dict[str, Any]:
+    if op.op == "start":
+        return start_patch()
+    if op.op == "complete":
+        return complete_patch()
+    return validate_patch(op.status, op.details)
+
+
+async def apply_step_batch(
+    db: AsyncSession,
+    onboarding_id: UUID,
+    company_id: UUID,
+    ops: List[StepBatchOp],
+    expected_version: Optional[int] = None,
+) -> Optional[Tuple[OnboardingState, List[StepBatchOpResult]]]:
+    """
+    Apply many step operations with one steps rewrite (or one round of
+    `onboarding_steps` updates), one progress recomputation and one
+    multi-row event INSERT. Ops run in order; an op on an unknown step fails
+    on its own without aborting the batch. No row lock is taken: the flush
+    is version-checked and raises StaleDataError if another write won.
+    Returns (onboarding, per-op results), or None if the onboarding is
+    missing. The caller owns the transaction; see run_step_batch.
+    """
+    result = await db.execute(
+        select(OnboardingState)
+        .where(OnboardingState.id == onboarding_id, OnboardingState.company_id == company_id)
+        .execution_options(populate_existing=True)
+    )
+    onboarding = result.scalar_one_or_none()
+    if onboarding is None:
+        return None
+    if expected_version is not None and onboarding.version != expected_version:
+        raise PreconditionFailed()
+
+    table_backed = onboarding.step_storage == StepStorage.TABLE.value
+    if table_backed:
+        rows = await db.execute(
+            select(OnboardingStep).where(
+                OnboardingStep.onboarding_id == onboarding_id,
+                OnboardingStep.step_id.in_({op.step_id for op in ops}),
+            )
+        )
+        targets: Dict[Any, Any] = {row.step_id: row for row in rows.scalars()}
+    else:
+        steps = [dict(s) for s in onboarding.steps or []]
+        targets = {}
+        for step in steps:
+            targets.setdefault(step.get("id"), step)
+
+    results: List[StepBatchOpResult] = []
+    events: List[Dict[str, Any]] = []
+    completed_delta = 0
+
+    for index, op in enumerate(ops):
+        target = targets.get(op.step_id)
+        error = None
+        if target is None:
+            error = "Step not found"
+        elif op.op == "validate" and op.status is None:
+            error = "validate requires a status"
+        results.append(StepBatchOpResult(
+            index=index, op=op.op, step_id=op.step_id, ok=error is None, error=error
+        ))
+        if error:
+            continue
+
+        patch = patch_for_op(op)
+        if table_backed:
+            was_completed = target.status == "completed"
+            for field, value in patch.items():
+                setattr(target, field, value)
+            now_completed = target.status == "completed"
+            completed_delta += now_completed - was_completed
+            step = {"id": target.step_id, "started_at": target.started_at, "completed_at": target.completed_at}
+        else:
+            was_completed = target.get("status") == "completed"
+            target.update(patch)
+            now_completed = target.get("status") == "completed"
+            step = target
+
+        if now_completed and not was_completed:
+            events.append(step_completed_event(company_id, onboarding_id, step))
+
+        if op.op == "validate":
+            events.append(_event(company_id, onboarding_id, "step_validated", {
+                "step_id": op.step_id, "status": op.status, "details": op.details,
+            }))
+
+    if any(r.ok for r in results):
+        if table_backed:
+            onboarding.completed_steps += completed_delta
+        else:
+            # Assigning a new list (rather than mutating) is what marks the column dirty
+            onboarding.steps = steps
+            onboarding.total_steps = len(steps)
+            onboarding.completed_steps = sum(1 for s in steps if s.get("status") == "completed")
+        onboarding.progress = progress_for(onboarding.completed_steps, onboarding.total_steps)
+        _sync_status(onboarding, company_id, events)
+    if events:
+        await db.execute(insert(Event), events)
+    await db.flush()
+
+    return onboarding, results
+
+
+def _sync_status(onboarding: OnboardingState, company_id: UUID, events: List[Dict[str, Any]]) -> None:
+    # Mirrors the status CASE in _COUNTERS_SET
+    done = 0 < onboarding.total_steps <= onboarding.completed_steps
+    if done and onboarding.status != OnboardingStatus.COMPLETED:
+        onboarding.status = OnboardingStatus.COMPLETED
+        events.append(onboarding_completed_event(company_id, onboarding.id, onboarding.created_at, _now()))
+    elif not done and onboarding.status == OnboardingStatus.COMPLETED:
+        onboarding.status = OnboardingStatus.ACTIVE
+
+
+async def run_step_batch(
+    db: AsyncSession,
+    onboarding_id: UUID,
+    company_id: UUID,
+    ops: List[StepBatchOp],
+    expected_version: Optional[int] = None,
+    max_retries: Optional[int] = None,
+) -> Optional[StepBatchOutcome]:
+    """
+    apply_step_batch + commit, re-run from a fresh read when a concurrent
+    write bumps the version first. With `expected_version` the caller asked
+    for that exact state, so a lost race raises PreconditionFailed instead.
+    """
+    if max_retries is None:
+        max_retries = settings.ONBOARDING_OCC_MAX_RETRIES
+
+    for attempt in range(1, max_retries + 2):
+        try:
+            applied = await apply_step_batch(db, onboarding_id, company_id, ops, expected_version)
+            if applied is None:
+                return None
+            onboarding, results = applied
+            progress, version = onboarding.progress, onboarding.version
+            await db.commit()
+            return StepBatchOutcome(progress=progress, version=version, results=results, attempts=attempt)
+        except StaleDataError:
+            await db.rollback()
+            if expected_version is not None:
+                raise PreconditionFailed()
+    raise ConcurrentUpdate()
@@ -0,0 +1,255 @@
+"""
+Live change stream for the admin UI (GET /api/v1/stream, Server-Sent Events).
+
+Triggers from migration 010 publish onboarding progress/status changes,
+scan status transitions and onboarding lifecycle events
+(STREAMED_EVENT_ACTIONS) on one Postgres channel, with the row's
+company_id in the payload. Each worker process holds a single LISTEN
+connection and fans notifications out in memory to that company's
+subscribers; every message is rendered to SSE bytes once and shared.
+
+Message ids are "<hub id>-<sequence>"; the hub id changes whenever the
+hub may have missed notifications. The hub keeps the last
+STREAM_REPLAY_BUFFER messages per company, so a client reconnecting to the
+same worker with Last-Event-ID gets what it missed. When that is not
+possible (another worker, a restart, a gap too old, a lost LISTEN
+connection, or a subscriber too slow to keep up) it receives a `reset`
+event and should refetch its views.
+
+LISTEN needs a session-pooled connection; behind PgBouncer in transaction
+mode, point DATABASE_URL at Postgres directly for this process.
+"""
+import asyncio
+import uuid
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+from uuid import UUID
+
+import orjson
+
+from app.core.config import settings
+from app.db.session import engine
+
+
+Message = Tuple[int, bytes]  # (sequence, rendered SSE frame)
+
+# Fixed by the triggers of migration 010; changing either needs a migration
+STREAM_CHANNEL = "app_stream"
+STREAMED_EVENT_ACTIONS = ("onboarding_created", "step_completed", "step_validated", "onboarding_completed")
+
+HEARTBEAT_FRAME = b": ping\n\n"
+
+
+def render_frame(message_id: Optional[str], event: str, data: Any) -> bytes:
+    frame = b""
+    if message_id is not None:
+        frame += f"id: {message_id}\n".encode()
+    return frame + f"event: {event}\n".encode() + b"data: " + orjson.dumps(data) + b"\n\n"
+
+
+class Subscription:
+    def __init__(self, company_id: UUID, queue_size: int):
+        self.company_id = company_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+    def deliver(self, message: Message) -> None:
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # The reader fell behind; it gets a reset instead of a partial history
+            self.overflowed = True
+
+
+class StreamHub:
+    def __init__(self, channel: str, replay_buffer: int, queue_size: int, max_subscribers: int):
+        self.channel = channel
+        self.replay_buffer = replay_buffer
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self.hub_id = uuid.uuid4().hex[:12]
+        self._sequence = 0
+        self._subscribers: Dict[UUID, Set[Subscription]] = {}
+        self._recent: Dict[UUID, Deque[Message]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._listening = False
+
+        self.subscriber_count = 0
+        self.published = 0
+        self.delivered = 0
+        self.resets = 0
+        self.reconnects = 0
+
+    # -- subscriptions ---------------------------------------------------
+
+    @property
+    def at_capacity(self) -> bool:
+        return self.subscriber_count >= self.max_subscribers
+
+    def subscribe(self, company_id: UUID) -> Subscription:
+        subscription = Subscription(company_id, self.queue_size)
+        self._subscribers.setdefault(company_id, set()).add(subscription)
+        self.subscriber_count += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(subscription.company_id)
+        if subscribers is None or subscription not in subscribers:
+            return
+        subscribers.discard(subscription)
+        self.subscriber_count -= 1
+        if not subscribers:
+            del self._subscribers[subscription.company_id]
+
+    def replay(self, company_id: UUID, last_event_id: Optional[str]) -> Optional[List[bytes]]:
+        """Frames after `last_event_id`, or None if the gap cannot be filled."""
+        if not last_event_id:
+            return []
+        hub_id, _, sequence = last_event_id.rpartition("-")
+        if hub_id != self.hub_id or not sequence.isdigit():
+            return None
+        last = int(sequence)
+        recent = self._recent.get(company_id, ())
+        # A full buffer may have evicted messages newer than `last`
+        if len(recent) == self.replay_buffer and recent[0][0] > last + 1:
+            return None
+        return [frame for seq, frame in recent if seq > last]
+
+    # -- publishing ------------------------------------------------------
+
+    def publish(self, company_id: UUID, event: str, data: Dict[str, Any]) -> None:
+        self._sequence += 1
+        message = (self._sequence, render_frame(f"{self.hub_id}-{self._sequence}", event, data))
+        recent = self._recent.get(company_id)
+        if recent is None:
+            recent = self._recent[company_id] = deque(maxlen=self.replay_buffer)
+        recent.append(message)
+        self.published += 1
+        for subscription in self._subscribers.get(company_id, ()):
+            subscription.deliver(message)
+            self.delivered += 1
+
+    def reset_all(self) -> None:
+        """Tell every subscriber to refetch (notifications may have been missed)."""
+        self.hub_id = uuid.uuid4().hex[:12]
+        self._recent.clear()
+        self.resets += 1
+        for subscribers in self._subscribers.values():
+            for subscription in subscribers:
+                subscription.overflowed = True
+                # Wake the reader so it notices promptly
+                try:
+                    subscription.queue.put_nowait((0, b""))
+                except asyncio.QueueFull:
+                    pass
+
+    def _on_notify(self, connection: Any, pid: int, channel: str, payload: str) -> None:
+        try:
+            data = orjson.loads(payload)
+            company_id = UUID(data.pop("company_id"))
+            event = data.pop("type")
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"[STREAM] Ignoring malformed notification: {e}")
+            return
+        self.publish(company_id, event, data)
+
+    # -- LISTEN connection -----------------------------------------------
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._listen_forever())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _listen_forever(self) -> None:
+        backoff = 1.0
+        while True:
+            try:
+                await self._listen_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[STREAM] LISTEN connection lost: {e}")
+            if self._listening:
+                backoff = 1.0
+            self._listening = False
+            self.reconnects += 1
+            self.reset_all()
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+
+    async def _listen_once(self) -> None:
+        async with engine.connect() as conn:
+            raw = (await conn.get_raw_connection()).driver_connection
+            await raw.add_listener(self.channel, self._on_notify)
+            self._listening = True
+            print(f"[STREAM] Listening on '{self.channel}'")
+            try:
+                # Notifications arrive via the callback; probing the connection
+                # is what notices it has gone away
+                while True:
+                    await asyncio.sleep(settings.STREAM_HEARTBEAT_SECONDS)
+                    await asyncio.wait_for(raw.execute("SELECT 1"), settings.STREAM_HEARTBEAT_SECONDS)
+            finally:
+                if not raw.is_closed():
+                    await raw.remove_listener(self.channel, self._on_notify)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hub_id": self.hub_id,
+            "listening": self._listening,
+            "subscribers": self.subscriber_count,
+            "companies": len(self._subscribers),
+            "published": self.published,
+            "delivered": self.delivered,
+            "resets": self.resets,
+            "reconnects": self.reconnects,
+        }
+
+
+async def sse_frames(hub: StreamHub, company_id: UUID, last_event_id: Optional[str]):
+    """
+    Frames for one subscriber: a `ready` event (or `reset` when resume
+    failed), the replayed backlog, then live messages with a heartbeat
+    comment whenever the stream has been idle for STREAM_HEARTBEAT_SECONDS.
+    Subscribing here rather than in the route means a response that is
+    never iterated cannot leak its subscription.
+    """
+    # No await between the two, so nothing published can fall in between
+    subscription = hub.subscribe(company_id)
+    backlog = hub.replay(company_id, last_event_id)
+    try:
+        yield render_frame(None, "ready" if backlog is not None else "reset", {"hub_id": hub.hub_id})
+        for frame in backlog or ():
+            yield frame
+        while True:
+            try:
+                _, frame = await asyncio.wait_for(
+                    subscription.queue.get(), settings.STREAM_HEARTBEAT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                yield HEARTBEAT_FRAME
+                continue
+            if subscription.overflowed:
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()
+                subscription.overflowed = False
+                yield render_frame(None, "reset", {"hub_id": hub.hub_id})
+                continue
+            yield frame
+    finally:
+        hub.unsubscribe(subscription)
+
+
+stream_hub = StreamHub(
+    channel=STREAM_CHANNEL,
+    replay_buffer=settings.STREAM_REPLAY_BUFFER,
+    queue_size=settings.STREAM_SUBSCRIBER_QUEUE,
+    max_subscribers=settings.STREAM_MAX_SUBSCRIBERS,
+)
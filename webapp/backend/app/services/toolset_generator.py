@@ -5,19 +5,24 @@ from typing import Any, Dict, List, Optional
 import httpx
 
 from app.core.config import settings
+from app.core.http import http_clients
 from app.models.template import TemplatePart
 
 
 async def generate_resolved_steps(
     questionnaire_answers: Dict[str, Any],
-    template_parts: List[TemplatePart]
+    template_parts: List[TemplatePart],
+    client: Optional[httpx.AsyncClient] = None
 ) -> List[Dict[str, Any]]:
     """
     Build resolved steps via OpenAI; fall back to heuristic generator if the call fails.
+    `client` defaults to the shared pooled OpenAI client.
     """
     serialized_parts = [_serialize_template_part(part) for part in template_parts]
 
-    openai_steps = await _call_openai(questionnaire_answers, serialized_parts)
+    openai_steps = await _call_openai(
+        client or http_clients.get("openai"), questionnaire_answers, serialized_parts
+    )
     if openai_steps is not None:
         return openai_steps
 
@@ -26,6 +31,7 @@ async def generate_resolved_steps(
 
 
 async def _call_openai(
+    client: httpx.AsyncClient,
     questionnaire_answers: Dict[str, Any],
     serialized_parts: List[Dict[str, Any]]
 ) -> Optional[List[Dict[str, Any]]]:
@@ -120,29 +126,28 @@ async def _call_openai(
     }
 
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(endpoint, json=payload, headers=headers)
-            response.raise_for_status()
-            body = response.json()
-            print(body)
-
-            choices = body.get("choices") or []
-            if not choices:
-                print("[OpenAI] WARNING: No choices returned.")
-                return None
-
-            message = choices[0].get("message", {})
-            content = message.get("content")
-            if not content:
-                print("[OpenAI] WARNING: Empty message content.")
-                return None
-
-            parsed = json.loads(content)
-            steps = parsed.get("resolved_steps")
-            if isinstance(steps, list):
-                return steps
-
-            print("[OpenAI] WARNING: Response missing `resolved_steps` array.")
+        response = await client.post(endpoint, json=payload, headers=headers)
+        response.raise_for_status()
+        body = response.json()
+        print(body)
+
+        choices = body.get("choices") or []
+        if not choices:
+            print("[OpenAI] WARNING: No choices returned.")
+            return None
+
+        message = choices[0].get("message", {})
+        content = message.get("content")
+        if not content:
+            print("[OpenAI] WARNING: Empty message content.")
+            return None
+
+        parsed = json.loads(content)
+        steps = parsed.get("resolved_steps")
+        if isinstance(steps, list):
+            return steps
+
+        print("[OpenAI] WARNING: Response missing `resolved_steps` array.")
     except httpx.HTTPStatusError as exc:
         print(f"[OpenAI] ERROR: {exc.response.status_code} - {exc.response.text[:300]}")
     except Exception as exc:  # noqa: BLE001
@@ -0,0 +1,150 @@
+import csv
+import io
+import json
+import os
+from typing import Any, Dict, List, Tuple
+from uuid import UUID
+
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.user import User, UserRole
+from app.schemas.user import UserBulkRow, UserBulkRowResult
+from app.services.password_service import PasswordService
+
+
+# Dedicated process pool so a large import does not queue behind (or starve)
+# interactive logins on the shared password service.
+bulk_password_service = PasswordService(
+    executor_kind="process",
+    max_workers=settings.USER_BULK_HASH_WORKERS or os.cpu_count() or 1,
+    max_concurrency=settings.USER_BULK_HASH_WORKERS or os.cpu_count() or 1,
+)
+
+
+class BulkPayloadError(ValueError):
+    pass
+
+
+def parse_bulk_payload(body: bytes, content_type: str) -> List[Tuple[int, Dict[str, Any] | str]]:
+    """
+    Split a CSV or NDJSON body into (row_number, record) pairs.
+    Unparseable lines are returned as (row_number, error message).
+    """
+    try:
+        text = body.decode("utf-8-sig")
+    except UnicodeDecodeError as exc:
+        raise BulkPayloadError("Body must be UTF-8 encoded") from exc
+
+    rows: List[Tuple[int, Dict[str, Any] | str]] = []
+    if "csv" in content_type:
+        reader = csv.DictReader(io.StringIO(text))
+        missing = {"email", "name", "password"} - set(reader.fieldnames or [])
+        if missing:
+            raise BulkPayloadError(f"CSV header is missing columns: {', '.join(sorted(missing))}")
+        for row_number, record in enumerate(reader, start=1):
+            rows.append((row_number, {k: v for k, v in record.items() if k and v not in (None, "")}))
+    else:
+        for row_number, line in enumerate(text.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as exc:
+                rows.append((row_number, f"Invalid JSON: {exc.msg}"))
+                continue
+            if not isinstance(record, dict):
+                rows.append((row_number, "Each line must be a JSON object"))
+                continue
+            rows.append((row_number, record))
+
+    if len(rows) > settings.USER_BULK_MAX_ROWS:
+        raise BulkPayloadError(f"At most {settings.USER_BULK_MAX_ROWS} rows per request")
+    return rows
+
+
+async def provision_users(
+    db: AsyncSession,
+    company_id: UUID,
+    records: List[Tuple[int, Dict[str, Any] | str]],
+) -> List[UserBulkRowResult]:
+    results: Dict[int, UserBulkRowResult] = {}
+    valid: List[Tuple[int, UserBulkRow]] = []
+    seen_emails: set[str] = set()
+
+    for row_number, record in records:
+        if isinstance(record, str):
+            results[row_number] = UserBulkRowResult(row=row_number, status="invalid", error=record)
+            continue
+        try:
+            row = UserBulkRow.model_validate(record)
+        except ValidationError as exc:
+            first = exc.errors()[0]
+            field = ".".join(str(loc) for loc in first["loc"])
+            email = record.get("email")
+            results[row_number] = UserBulkRowResult(
+                row=row_number,
+                # Echo the email only if it is one: the result must validate too
+                email=email if isinstance(email, str) else None,
+                status="invalid",
+                error=f"{field}: {first['msg']}",
+            )
+            continue
+        if row.email in seen_emails:
+            results[row_number] = UserBulkRowResult(row=row_number, email=row.email, status="duplicate")
+            continue
+        seen_emails.add(row.email)
+        valid.append((row_number, row))
+
+    # Skip rows whose email already exists before spending bcrypt time on them
+    existing: set[str] = set()
+    emails = [row.email for _, row in valid]
+    batch_size = settings.USER_BULK_INSERT_BATCH_SIZE
+    for start in range(0, len(emails), batch_size):
+        result = await db.execute(
+            select(User.email).where(User.email.in_(emails[start:start + batch_size]))
+        )
+        existing.update(result.scalars().all())
+
+    pending: List[Tuple[int, UserBulkRow]] = []
+    for row_number, row in valid:
+        if row.email in existing:
+            results[row_number] = UserBulkRowResult(row=row_number, email=row.email, status="exists")
+        else:
+            pending.append((row_number, row))
+
+    hashes = await bulk_password_service.hash_many([row.password for _, row in pending])
+
+    for start in range(0, len(pending), batch_size):
+        chunk = pending[start:start + batch_size]
+        values = [
+            {
+                "email": row.email,
+                "hashed_password": hashed,
+                "name": row.name,
+                "role": UserRole(row.role),
+                "company_id": company_id,
+            }
+            for (_, row), hashed in zip(chunk, hashes[start:start + batch_size])
+        ]
+        result = await db.execute(
+            insert(User)
+            .values(values)
+            .on_conflict_do_nothing(index_elements=[User.email])
+            .returning(User.email, User.id)
+        )
+        created = {email: user_id for email, user_id in result.all()}
+        for row_number, row in chunk:
+            if row.email in created:
+                results[row_number] = UserBulkRowResult(
+                    row=row_number, email=row.email, status="created", id=created[row.email]
+                )
+            else:
+                # Inserted concurrently by another request since our lookup
+                results[row_number] = UserBulkRowResult(row=row_number, email=row.email, status="exists")
+
+    await db.commit()
+    return [results[row_number] for row_number in sorted(results)]
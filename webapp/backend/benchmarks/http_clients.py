@@ -0,0 +1,102 @@
+"""
+Per-call latency of outbound webhooks: a fresh httpx.AsyncClient per call
+(what notify_n8n and the OpenAI call used to do) vs. the shared pooled
+client from app.core.http.
+
+Starts a minimal keep-alive HTTP/1.1 stub on localhost that answers every
+POST with a small JSON body, so no external service is involved. Loopback
+TCP setup is cheap; against a real TLS endpoint the gap is larger by the
+handshake round trips.
+
+    python -m benchmarks.http_clients --calls 500
+    python -m benchmarks.http_clients --calls 2000 --concurrency 20
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from app.core.http import ClientConfig, ConnectionStats, build_client
+
+
+RESPONSE = (
+    b"HTTP/1.1 200 OK\r\n"
+    b"Content-Type: application/json\r\n"
+    b"Content-Length: 11\r\n"
+    b"\r\n"
+    b'{"ok":true}'
+)
+
+
+async def _handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            if length:
+                await reader.readexactly(length)
+            writer.write(RESPONSE)
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def _measure(call, calls: int, concurrency: int) -> list:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one() -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one() for _ in range(calls)))
+    return sorted(1000 * l for l in latencies)
+
+
+async def main(args: argparse.Namespace) -> None:
+    server = await asyncio.start_server(_handle, "127.0.0.1", 0)
+    url = f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}/webhook"
+    payload = {"scan_id": "00000000-0000-0000-0000-000000000000", "repo_url": "https://github.com/acme/app.git"}
+
+    async def fresh_client_call() -> None:
+        async with httpx.AsyncClient(timeout=10.0) as client:
+            (await client.post(url, json=payload)).raise_for_status()
+
+    stats = ConnectionStats()
+    pooled = build_client(ClientConfig(timeout=10.0, max_connections=args.concurrency), stats)
+
+    async def pooled_call() -> None:
+        (await pooled.post(url, json=payload)).raise_for_status()
+
+    try:
+        print(f"{'':8} {'p50':>9} {'p99':>9} {'total':>9}")
+        for label, call in (("fresh", fresh_client_call), ("pooled", pooled_call)):
+            await _measure(call, min(50, args.calls), args.concurrency)  # warm-up
+            started = time.perf_counter()
+            latencies = await _measure(call, args.calls, args.concurrency)
+            total = time.perf_counter() - started
+            print(
+                f"{label:8} {statistics.median(latencies):>7.2f}ms "
+                f"{latencies[int(0.99 * (len(latencies) - 1))]:>7.2f}ms {total:>8.2f}s"
+            )
+        print(f"pooled connections: {stats.as_dict()}")
+    finally:
+        await pooled.aclose()
+        server.close()
+        await server.wait_closed()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=1)
+    asyncio.run(main(parser.parse_args()))
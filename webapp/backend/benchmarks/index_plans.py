@@ -0,0 +1,271 @@
+"""
+EXPLAIN plans and latencies for the hot tenant-scoped queries, with and
+without the indexes from migration 004.
+
+Seeds a synthetic multi-tenant dataset (marked by an `*.bench.example`
+company domain), ANALYZEs it, then runs each query twice:
+
+* before: inside a transaction that drops the 004 indexes, then rolls back
+* after:  against the live schema
+
+Requires a migrated database in DATABASE_URL. Results are printed and
+written as JSON (plans included) to --output.
+
+    python -m benchmarks.index_plans --tenants 20 --rows-per-tenant 20000
+    python -m benchmarks.index_plans --cleanup
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+from sqlalchemy import text
+
+from app.db.session import engine
+
+
+BENCH_DOMAIN = "%.bench.example"
+
+MIGRATION_004_INDEXES = [
+    "ix_onboarding_states_company_updated",
+    "ix_onboarding_states_company_status",
+    "ix_onboarding_states_user_id",
+    "ix_repos_company_created",
+    "ix_repo_scans_company_updated",
+    "ix_repo_scans_repo_created",
+    "ix_events_company_created",
+    "ix_events_company_entity",
+    "ix_template_parts_company_updated",
+    "ix_template_parts_company_role",
+    "ix_template_parts_tags",
+    "ix_onboarding_templates_company_updated",
+    "ix_onboarding_templates_company_role",
+    "ix_questionnaires_template_id",
+    "ix_toolsets_questionnaire_id",
+]
+
+SEED_STATEMENTS = [
+    """
+    INSERT INTO companies (id, name, domain, created_at)
+    SELECT gen_random_uuid(), 'Bench ' || g, CAST(:run AS text) || '-' || g || '.bench.example', now()
+    FROM generate_series(1, CAST(:tenants AS int)) g
+    """,
+    """
+    INSERT INTO users (id, email, hashed_password, name, role, company_id, created_at)
+    SELECT gen_random_uuid(), 'u' || g || '@' || c.domain, 'x', 'User ' || g, 'DEV', c.id, now()
+    FROM companies c, generate_series(1, CAST(:rows AS int)) g
+    WHERE c.domain LIKE CAST(:run AS text) || '-%'
+    """,
+    """
+    INSERT INTO onboarding_templates (id, company_id, name, role_key, part_ids, status, version, created_at, updated_at)
+    SELECT gen_random_uuid(), c.id, 'Bench ' || r, r, '{}', 'PUBLISHED', 1, now(), now()
+    FROM companies c, unnest(ARRAY['intern', 'manager', 'cto']) r
+    WHERE c.domain LIKE CAST(:run AS text) || '-%'
+    """,
+    """
+    INSERT INTO questionnaires (id, company_id, template_id, fields, answers, created_at)
+    SELECT gen_random_uuid(), t.company_id, t.id, '[]', '{}', now()
+    FROM onboarding_templates t JOIN companies c ON c.id = t.company_id
+    WHERE c.domain LIKE CAST(:run AS text) || '-%'
+    """,
+    """
+    INSERT INTO toolsets (id, company_id, questionnaire_id, resolved_steps, created_at)
+    SELECT gen_random_uuid(), q.company_id, q.id, '[]', now()
+    FROM questionnaires q JOIN companies c ON c.id = q.company_id
+    WHERE c.domain LIKE CAST(:run AS text) || '-%'
+    """,
+    """
+    INSERT INTO onboarding_states (id, company_id, user_id, template_id, toolset_id, status, progress, steps, created_at, updated_at)
+    SELECT gen_random_uuid(), u.company_id, u.id, ts.template_id, ts.id,
+           (ARRAY['ACTIVE', 'COMPLETED', 'PAUSED']::onboardingstatus[])[1 + (random() * 2)::int],
+           (random() * 100)::int,
+           (SELECT jsonb_agg(jsonb_build_object('id', 's' || i, 'title', 'Step ' || i, 'status', 'pending'))
+            FROM generate_series(1, 20) i),
+           now() - random() * interval '365 days',
+           now() - random() * interval '30 days'
+    FROM users u
+    JOIN companies c ON c.id = u.company_id
+    JOIN LATERAL (
+        SELECT t.id AS template_id, tsx.id
+        FROM onboarding_templates t
+        JOIN questionnaires q ON q.template_id = t.id
+        JOIN toolsets tsx ON tsx.questionnaire_id = q.id
+        WHERE t.company_id = u.company_id
+        LIMIT 1
+    ) ts ON true
+    WHERE c.domain LIKE CAST(:run AS text) || '-%'
+    """,
+    """
+    INSERT INTO repos (id, company_id, provider, org, name, default_branch, created_at)
+    SELECT gen_random_uuid(), c.id, 'GITHUB', 'bench', 'repo-' || g, 'main', now() - random() * interval '365 days'
+    FROM companies c, generate_series(1, greatest(CAST(:rows AS int) / 100, 1)) g
+    WHERE c.domain LIKE CAST(:run AS text) || '-%'
+    """,
+    """
+    INSERT INTO repo_scans (id, company_id, repo_id, status, summary, created_at, updated_at)
+    SELECT gen_random_uuid(), r.company_id, r.id, 'DONE', '{}',
+           now() - random() * interval '365 days', now() - random() * interval '30 days'
+    FROM repos r JOIN companies c ON c.id = r.company_id, generate_series(1, 100) g
+    WHERE c.domain LIKE CAST(:run AS text) || '-%'
+    """,
+    """
+    INSERT INTO events (id, company_id, entity, entity_id, action, payload, created_at)
+    SELECT gen_random_uuid(), o.company_id, 'onboarding_state', o.id, 'step_validated',
+           jsonb_build_object('step_id', 's1', 'status', 'passed'), now() - random() * interval '365 days'
+    FROM onboarding_states o JOIN companies c ON c.id = o.company_id, generate_series(1, 3) g
+    WHERE c.domain LIKE CAST(:run AS text) || '-%'
+    """,
+    """
+    INSERT INTO template_parts (id, company_id, title, description, role_key, tags, fields, validators, created_at, updated_at)
+    SELECT gen_random_uuid(), c.id, 'Part ' || g, 'Bench part',
+           (ARRAY['intern', 'manager', 'cto'])[1 + g % 3],
+           jsonb_build_array('tag-' || (g % 50), 'tag-' || (g % 7)),
+           '[]', '[]', now(), now() - random() * interval '30 days'
+    FROM companies c, generate_series(1, greatest(CAST(:rows AS int) / 10, 1)) g
+    WHERE c.domain LIKE CAST(:run AS text) || '-%'
+    """,
+]
+
+# Mirrors the list/detail queries issued by the routers for one tenant
+QUERIES = {
+    "onboardings_enriched": """
+        SELECT o.id, o.status, o.progress, o.updated_at, u.name, t.role_key, t.version
+        FROM onboarding_states o
+        JOIN users u ON u.id = o.user_id
+        JOIN onboarding_templates t ON t.id = o.template_id
+        WHERE o.company_id = :company_id
+        ORDER BY o.updated_at DESC, o.id DESC
+        LIMIT 50
+    """,
+    "onboardings_by_status": """
+        SELECT id, progress FROM onboarding_states
+        WHERE company_id = :company_id AND status = 'PAUSED'
+    """,
+    "recent_scans": """
+        SELECT s.id, s.status, r.name
+        FROM repo_scans s JOIN repos r ON r.id = s.repo_id
+        WHERE s.company_id = :company_id
+        ORDER BY s.updated_at DESC, s.id DESC
+        LIMIT 6
+    """,
+    "events_latest": """
+        SELECT * FROM events
+        WHERE company_id = :company_id
+        ORDER BY created_at DESC, id DESC
+        LIMIT 100
+    """,
+    "events_for_entity": """
+        SELECT * FROM events
+        WHERE company_id = :company_id AND entity = 'onboarding_state' AND entity_id = :entity_id
+        ORDER BY created_at DESC
+        LIMIT 100
+    """,
+    "template_parts_by_tag": """
+        SELECT id, title FROM template_parts
+        WHERE company_id = :company_id AND tags @> '["tag-3"]'::jsonb
+    """,
+    "repos_list": """
+        SELECT * FROM repos
+        WHERE company_id = :company_id
+        ORDER BY created_at DESC, id DESC
+        LIMIT 50
+    """,
+}
+
+
+async def seed(tenants: int, rows: int) -> None:
+    run = f"b{uuid.uuid4().hex[:8]}"
+    async with engine.begin() as conn:
+        for statement in SEED_STATEMENTS:
+            started = time.perf_counter()
+            await conn.execute(text(statement), {"run": run, "tenants": tenants, "rows": rows})
+            print(f"  seeded in {time.perf_counter() - started:6.2f}s: {statement.split()[2]}")
+    async with engine.begin() as conn:
+        for table in ("onboarding_states", "users", "repos", "repo_scans", "events", "template_parts"):
+            await conn.execute(text(f"ANALYZE {table}"))
+
+
+async def _explain(conn, sql: str, params: dict) -> dict:
+    result = await conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}"), params)
+    plan = result.scalar_one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    plan = plan[0]
+    return {
+        "execution_ms": plan["Execution Time"],
+        "planning_ms": plan["Planning Time"],
+        "root_node": plan["Plan"]["Node Type"],
+        "plan": plan["Plan"],
+    }
+
+
+async def measure(repeat: int) -> dict:
+    async with engine.connect() as conn:
+        row = (await conn.execute(text("""
+            SELECT c.id, (SELECT o.id FROM onboarding_states o WHERE o.company_id = c.id LIMIT 1)
+            FROM companies c WHERE c.domain LIKE :pattern LIMIT 1
+        """), {"pattern": BENCH_DOMAIN})).first()
+    if row is None:
+        raise SystemExit("No benchmark tenants found; run with --seed first.")
+    params = {"company_id": row[0], "entity_id": row[1]}
+
+    report: dict = {}
+    for phase in ("before", "after"):
+        async with engine.connect() as conn:
+            trans = await conn.begin()
+            if phase == "before":
+                for name in MIGRATION_004_INDEXES:
+                    await conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+            for name, sql in QUERIES.items():
+                runs = [await _explain(conn, sql, params) for _ in range(repeat)]
+                best = min(runs, key=lambda r: r["execution_ms"])
+                report.setdefault(name, {})[phase] = best
+            await trans.rollback()
+    return report
+
+
+async def cleanup() -> None:
+    async with engine.begin() as conn:
+        ids = "SELECT id FROM companies WHERE domain LIKE :pattern"
+        for table in ("events", "outbox_messages", "onboarding_rollups", "onboarding_step_rollups",
+                      "template_parts", "repo_scans", "repos", "onboarding_states", "toolsets",
+                      "questionnaires", "onboarding_templates", "users"):
+            await conn.execute(text(f"DELETE FROM {table} WHERE company_id IN ({ids})"), {"pattern": BENCH_DOMAIN})
+        await conn.execute(text("DELETE FROM companies WHERE domain LIKE :pattern"), {"pattern": BENCH_DOMAIN})
+
+
+async def main(args: argparse.Namespace) -> None:
+    try:
+        if args.cleanup:
+            await cleanup()
+            print("Removed benchmark tenants.")
+            return
+        if args.seed:
+            print(f"Seeding {args.tenants} tenants x {args.rows_per_tenant} onboardings...")
+            await seed(args.tenants, args.rows_per_tenant)
+
+        report = await measure(args.repeat)
+        print(f"{'query':26} {'before ms':>10} {'after ms':>10}  plan before -> after")
+        for name, phases in report.items():
+            before, after = phases["before"], phases["after"]
+            print(
+                f"{name:26} {before['execution_ms']:>10.2f} {after['execution_ms']:>10.2f}  "
+                f"{before['root_node']} -> {after['root_node']}"
+            )
+        with open(args.output, "w") as fh:
+            json.dump(report, fh, indent=2, default=str)
+        print(f"Plans written to {args.output}")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tenants", type=int, default=20)
+    parser.add_argument("--rows-per-tenant", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", action=argparse.BooleanOptionalAction, default=True)
+    parser.add_argument("--cleanup", action="store_true")
+    parser.add_argument("--output", default="index_plans.json")
+    asyncio.run(main(parser.parse_args()))
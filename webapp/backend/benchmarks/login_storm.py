@@ -0,0 +1,80 @@
+"""
+Event-loop latency under a login storm: inline bcrypt vs. PasswordService.
+
+Simulates N concurrent logins (one bcrypt verify each) while a ticker
+coroutine measures how late it wakes up. No database required.
+
+    python -m benchmarks.login_storm --logins 200
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.core.security import hash_password, verify_password
+from app.services.password_service import PasswordService
+
+
+TICK_SECONDS = 0.005
+
+
+async def _ticker(lags: list[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        expected = time.perf_counter() + TICK_SECONDS
+        await asyncio.sleep(TICK_SECONDS)
+        lags.append(max(0.0, time.perf_counter() - expected))
+
+
+async def _storm(logins: int, verify) -> dict:
+    hashed = hash_password("benchmark-password")
+    lags: list[float] = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(_ticker(lags, stop))
+    await asyncio.sleep(0)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(verify("benchmark-password", hashed) for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await ticker
+    assert all(results)
+
+    lags_ms = sorted(lag * 1000 for lag in lags) or [0.0]
+    return {
+        "logins_per_sec": round(logins / elapsed, 1),
+        "loop_lag_p50_ms": round(statistics.median(lags_ms), 2),
+        "loop_lag_p99_ms": round(lags_ms[int(0.99 * (len(lags_ms) - 1))], 2),
+        "loop_lag_max_ms": round(lags_ms[-1], 2),
+        "ticks": len(lags),
+    }
+
+
+async def main(logins: int, executor: str, workers: int, concurrency: int) -> None:
+    async def inline_verify(plain: str, hashed: str) -> bool:
+        return verify_password(plain, hashed)
+
+    service = PasswordService(executor, workers, concurrency)
+    try:
+        before = await _storm(logins, inline_verify)
+        after = await _storm(logins, service.verify)
+    finally:
+        service.shutdown()
+
+    print(f"{'':10} {'logins/s':>10} {'lag p50':>10} {'lag p99':>10} {'lag max':>10} {'ticks':>7}")
+    for label, r in (("inline", before), (executor, after)):
+        print(
+            f"{label:10} {r['logins_per_sec']:>10} {r['loop_lag_p50_ms']:>9}ms "
+            f"{r['loop_lag_p99_ms']:>9}ms {r['loop_lag_max_ms']:>9}ms {r['ticks']:>7}"
+        )
+    print("service stats:", service.stats())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--executor", choices=["thread", "process"], default="thread")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.executor, args.workers, args.concurrency))
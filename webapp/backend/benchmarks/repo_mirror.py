@@ -0,0 +1,105 @@
+"""
+Checkout cost per scan: a fresh shallow clone into an emptied directory
+(what the n8n "Clone Repo (shallow)" step does) vs. app.services.repo_mirror
+(incremental fetch into a bare mirror, then a temporary worktree, full or
+sparse with only the manifests the scan cache reads).
+
+The source is a local file:// repository built from the
+benchmarks.repo_scanner monorepo fixture, so no network is involved; a
+remote clone pays for transferring the whole tree on every fresh clone,
+where a warm mirror only fetches new objects.
+
+    python -m benchmarks.repo_mirror --packages 500 --runs 5
+    python -m benchmarks.repo_mirror --concurrent 10
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+
+from app.services.repo_mirror import MirrorKey, RepoMirror
+from app.services.repo_scanner import MANIFEST_PATTERNS
+from benchmarks.repo_scanner import build_fixture
+
+
+def _git(*args: str) -> None:
+    subprocess.run(["git", *args], check=True, capture_output=True)
+
+
+def _commit(src: str, message: str) -> None:
+    _git("-C", src, "add", "-A")
+    _git("-C", src, "-c", "user.name=bench", "-c", "user.email=bench@example.com", "commit", "-q", "-m", message)
+
+
+def fresh_clone(url: str, workdir: str) -> None:
+    shutil.rmtree(workdir, ignore_errors=True)
+    os.makedirs(workdir)
+    _git("clone", "--depth", "1", "--quiet", url, workdir)
+
+
+async def mirror_checkout(mirror: RepoMirror, key: MirrorKey, url: str, sparse=None) -> None:
+    async with mirror.session(key, url) as session:
+        commit = await session.resolve("main")
+        async with session.worktree(commit, sparse=sparse):
+            pass
+
+
+async def main(args: argparse.Namespace) -> None:
+    base = tempfile.mkdtemp(prefix="mirror-bench-")
+    src = os.path.join(base, "src")
+    os.makedirs(src)
+    try:
+        build_fixture(src, args.packages, args.files)
+        _git("init", "-q", "-b", "main", src)
+        _commit(src, "fixture")
+        url = f"file://{src}"
+        mirror = RepoMirror(os.path.join(base, "cache"), max_bytes=10 ** 12, git_timeout=600)
+        key = MirrorKey("github", "bench", "monorepo")
+
+        async def timed(label: str, call, runs: int) -> None:
+            timings = []
+            for run in range(runs):
+                if args.new_commit:
+                    with open(os.path.join(src, "CHANGELOG"), "a") as f:
+                        f.write(f"{label} {run}\n")
+                    _commit(src, f"{label} {run}")
+                started = time.perf_counter()
+                await call()
+                timings.append(time.perf_counter() - started)
+            print(f"{label:14} {1000 * statistics.median(timings):>9.1f} ms")
+
+        async def fetch_only() -> None:
+            async with mirror.session(key, url):
+                pass
+
+        await timed("fresh clone", lambda: asyncio.to_thread(fresh_clone, url, os.path.join(base, "work")), args.runs)
+        await timed("mirror cold", lambda: mirror_checkout(mirror, key, url), 1)
+        await timed("mirror warm", lambda: mirror_checkout(mirror, key, url), args.runs)
+        await timed("  fetch only", fetch_only, args.runs)
+        await timed("mirror sparse", lambda: mirror_checkout(mirror, key, url, MANIFEST_PATTERNS), args.runs)
+
+        fetches = mirror.fetches
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            mirror_checkout(mirror, key, url, MANIFEST_PATTERNS) for _ in range(args.concurrent)
+        ))
+        print(f"{args.concurrent} sparse concurrent  {1000 * (time.perf_counter() - started):>9.1f} ms, "
+              f"{mirror.fetches - fetches} fetch(es)")
+        print(f"mirror stats: {mirror.stats()}")
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--packages", type=int, default=500)
+    parser.add_argument("--files", type=int, default=40)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--concurrent", type=int, default=10)
+    parser.add_argument("--no-new-commit", dest="new_commit", action="store_false",
+                        help="do not add a commit before each timed checkout")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,125 @@
+"""
+Scanning a generated monorepo with app.services.repo_scanner.
+
+The fixture has --packages packages (Python, Node, Go and Rust, rotating),
+each with its manifest, a Makefile and --files source files, plus an
+installed node_modules tree and build output that .gitignore excludes.
+
+Compared:
+  naive   os.walk into a list of every path (node_modules included), then
+          parse each manifest in turn
+  inline  repo_scanner with the process pool disabled
+  pooled  repo_scanner parsing manifests in the process pool
+
+Reports the median wall time over --runs warm-cache runs and the walker's
+peak Python heap (tracemalloc; pool workers are separate processes and not
+included).
+
+    python -m benchmarks.repo_scanner --packages 2000 --files 40
+    python -m benchmarks.repo_scanner --root /path/to/checkout
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from app.services.repo_scanner import RepoScanner, manifest_kind, parse_manifest
+
+
+MANIFEST_FILES = [
+    ("requirements.txt", "".join(f"package-{j}>=1.{j}\n" for j in range(30)), ".py"),
+    ("package.json", json.dumps({"dependencies": {f"lib-{j}": "^1.0.0" for j in range(40)}}), ".ts"),
+    ("go.mod", "module example.com/svc\n\nrequire (\n" + "".join(f"\texample.com/mod{j} v1.0.{j}\n" for j in range(30)) + ")\n", ".go"),
+    ("Cargo.toml", "[package]\nname = \"c\"\n\n[dependencies]\n" + "".join(f"crate{j} = \"1\"\n" for j in range(30)), ".rs"),
+]
+
+
+def build_fixture(root: str, packages: int, files: int) -> None:
+    with open(os.path.join(root, ".gitignore"), "w") as f:
+        f.write("node_modules/\ndist/\n*.pyc\n")
+    for i in range(packages):
+        name, manifest, ext = MANIFEST_FILES[i % len(MANIFEST_FILES)]
+        package = os.path.join(root, "packages", f"pkg{i:05d}")
+        os.makedirs(os.path.join(package, "src"))
+        with open(os.path.join(package, name), "w") as f:
+            f.write(manifest)
+        with open(os.path.join(package, "Makefile"), "w") as f:
+            f.write(".PHONY: test\nbuild:\n\ttrue\ntest: build\n\ttrue\n")
+        for j in range(files):
+            with open(os.path.join(package, "src", f"m{j}{ext}"), "w") as f:
+                f.write("x = 1\n" * 20)
+        # Ignored trees the walk must not enter
+        for ignored in ("node_modules/dep/lib", "dist"):
+            os.makedirs(os.path.join(package, ignored))
+            for j in range(files // 2):
+                with open(os.path.join(package, ignored, f"f{j}.js"), "w") as f:
+                    f.write("module.exports = 1\n")
+            with open(os.path.join(package, ignored, "package.json"), "w") as f:
+                f.write('{"dependencies": {"left-pad": "1"}}')
+
+
+def naive_scan(root: str) -> int:
+    paths = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        if ".git" in dirnames:
+            dirnames.remove(".git")
+        paths.extend(os.path.join(dirpath, name) for name in filenames)
+    for path in paths:
+        kind = manifest_kind(os.path.basename(path))
+        if kind is not None:
+            parse_manifest(path, kind)
+    return len(paths)
+
+
+def _measure(label: str, fn, runs: int) -> None:
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    files = result if isinstance(result, int) else result["file_count"]
+    print(f"{label:8} {statistics.median(timings):>8.2f}s {peak / 1024 / 1024:>8.1f} MiB {files:>9}")
+
+
+def main(args: argparse.Namespace) -> None:
+    root = args.root
+    tmp = None
+    if root is None:
+        tmp = root = tempfile.mkdtemp(prefix="scan-bench-")
+        started = time.perf_counter()
+        build_fixture(root, args.packages, args.files)
+        print(f"fixture: {args.packages} packages in {time.perf_counter() - started:.1f}s ({root})")
+
+    inline = RepoScanner(max_workers=None, pool_min_manifests=10 ** 9, pool_batch_size=16)
+    pooled = RepoScanner(max_workers=args.workers, pool_min_manifests=1, pool_batch_size=16)
+    try:
+        pooled.scan(root)  # start the pool and warm the page cache
+        print(f"{'':8} {'time':>9} {'peak heap':>12} {'files':>9}")
+        _measure("naive", lambda: naive_scan(root), args.runs)
+        _measure("inline", lambda: inline.scan(root), args.runs)
+        _measure("pooled", lambda: pooled.scan(root), args.runs)
+        summary = pooled.scan(root)
+        print(f"dependencies: {len(summary['dependencies'])}, managers: {summary['package_managers']}")
+    finally:
+        pooled.shutdown()
+        if tmp is not None and not args.keep:
+            shutil.rmtree(tmp)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--root", help="scan an existing checkout instead of a generated fixture")
+    parser.add_argument("--packages", type=int, default=2000)
+    parser.add_argument("--files", type=int, default=40)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--keep", action="store_true", help="keep the generated fixture")
+    main(parser.parse_args())
@@ -0,0 +1,127 @@
+"""
+Rescans of a large git repo through app.services.scan_cache vs. a full
+repo_scanner walk.
+
+Builds the benchmarks.repo_scanner monorepo fixture as a git repository,
+then times:
+
+  full         repo_scanner.scan (walk + parse every manifest)
+  cold         first cached scan: tree listing + parse every manifest
+  same commit  rescan without new commits (commit hit)
+  sources      a commit touching --changed source files (unchanged hit)
+  manifests    a commit touching --changed manifests (incremental)
+
+The cached phases seed a `*-scancache.bench.example` tenant and need a
+migrated database in DATABASE_URL; --listing-only skips them and compares
+the walk with the git tree listing alone.
+
+    python -m benchmarks.scan_cache --packages 2000 --changed 5
+    python -m benchmarks.scan_cache --listing-only
+    python -m benchmarks.index_plans --cleanup   # removes bench tenants
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import uuid
+
+from sqlalchemy import text
+
+from app.db.session import engine
+from app.services.repo_scanner import RepoScanner, git_head, list_git_tree
+from app.services.scan_cache import ScanCache
+from benchmarks.repo_scanner import build_fixture
+
+
+SEED = """
+WITH c AS (
+    INSERT INTO companies (id, name, domain, created_at)
+    VALUES (gen_random_uuid(), 'Bench scan cache', CAST(:run AS text) || '-scancache.bench.example', now())
+    RETURNING id
+)
+INSERT INTO repos (id, company_id, provider, org, name, default_branch, created_at)
+SELECT gen_random_uuid(), c.id, 'GITHUB', 'bench', 'monorepo', 'main', now() FROM c
+RETURNING id
+"""
+
+
+def _git(root: str, *args: str) -> None:
+    subprocess.run(["git", "-C", root, *args], check=True, capture_output=True)
+
+
+def _commit(root: str, message: str) -> None:
+    _git(root, "add", "-A")
+    _git(root, "-c", "user.name=bench", "-c", "user.email=bench@example.com", "commit", "-q", "-m", message)
+
+
+def _touch(root: str, count: int, manifests: bool, run: int) -> None:
+    packages = sorted(os.listdir(os.path.join(root, "packages")))[:count]
+    for package in packages:
+        path = os.path.join(root, "packages", package)
+        if manifests:
+            with open(os.path.join(path, "Makefile"), "a") as f:
+                f.write(f"lint{run}:\n\ttrue\n")
+        else:
+            with open(os.path.join(path, "src", sorted(os.listdir(os.path.join(path, "src")))[0]), "a") as f:
+                f.write(f"y = {run}\n")
+
+
+def _timed(label: str, fn):
+    started = time.perf_counter()
+    result = fn()
+    print(f"{label:14} {1000 * (time.perf_counter() - started):>9.1f} ms")
+    return result
+
+
+async def _cached_phases(root: str, args: argparse.Namespace, scanner: RepoScanner) -> None:
+    cache = ScanCache(scanner, snapshots_per_repo=20)
+    async with engine.begin() as conn:
+        repo_id = (await conn.execute(text(SEED), {"run": uuid.uuid4().hex[:8]})).scalar_one()
+
+    async def scan(label: str) -> None:
+        started = time.perf_counter()
+        result = await cache.scan(repo_id, root)
+        print(f"{label:14} {1000 * (time.perf_counter() - started):>9.1f} ms  "
+              f"{result.source:11} parsed {result.parsed}, reused {result.reused}")
+
+    await scan("cold")
+    await scan("same commit")
+    _touch(root, args.changed, manifests=False, run=1)
+    _commit(root, "touch sources")
+    await scan("sources")
+    _touch(root, args.changed, manifests=True, run=2)
+    _commit(root, "touch manifests")
+    await scan("manifests")
+    await engine.dispose()
+
+
+def main(args: argparse.Namespace) -> None:
+    root = tempfile.mkdtemp(prefix="scan-cache-bench-")
+    scanner = RepoScanner(max_workers=None, pool_min_manifests=32, pool_batch_size=16)
+    try:
+        build_fixture(root, args.packages, args.files)
+        _git(root, "init", "-q")
+        _commit(root, "fixture")
+        print(f"fixture: {args.packages} packages, commit {git_head(root)[:12]}")
+
+        scanner.scan(root)  # warm the page cache and the pool
+        _timed("full", lambda: scanner.scan(root))
+        listing = _timed("listing", lambda: list_git_tree(root, git_head(root)))
+        _timed("fingerprint", listing.fingerprint)
+        if not args.listing_only:
+            asyncio.run(_cached_phases(root, args, scanner))
+    finally:
+        scanner.shutdown()
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--packages", type=int, default=2000)
+    parser.add_argument("--files", type=int, default=40)
+    parser.add_argument("--changed", type=int, default=5)
+    parser.add_argument("--listing-only", action="store_true")
+    main(parser.parse_args())
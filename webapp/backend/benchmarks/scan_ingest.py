@@ -0,0 +1,152 @@
+"""
+Ingesting a 300-part scan result (the n8n workflow's cap): legacy per-part
+ORM adds plus a refresh per part vs. app.services.scan_ingest (one
+multi-row INSERT ... RETURNING, idempotent replay).
+
+Parsing is timed without a database: json.loads + model_validate (what the
+FastAPI body parameter did), orjson.loads + model_validate (what
+read_scan_result does) and model_validate_json on the raw bytes.
+
+The ingest phase seeds a `*-ingest.bench.example` tenant with one repo and
+a fresh QUEUED scan per run, and needs a migrated database in DATABASE_URL.
+
+    python -m benchmarks.scan_ingest --parts 300 --runs 20
+    python -m benchmarks.scan_ingest --parse-only
+    python -m benchmarks.index_plans --cleanup   # removes bench tenants
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import uuid
+
+import orjson
+from sqlalchemy import select, text
+
+from app.db.session import AsyncSessionLocal, engine
+from app.models.repo import RepoScan, ScanStatus
+from app.models.template import TemplatePart
+from app.schemas.repo import ScanResultPayload
+from app.services.scan_ingest import ingest_scan_result
+
+
+SEED = """
+WITH c AS (
+    INSERT INTO companies (id, name, domain, created_at)
+    VALUES (gen_random_uuid(), 'Bench ingest', CAST(:run AS text) || '-ingest.bench.example', now())
+    RETURNING id
+)
+INSERT INTO repos (id, company_id, provider, org, name, default_branch, created_at)
+SELECT gen_random_uuid(), c.id, 'GITHUB', 'bench', 'ingest', 'main', now() FROM c
+RETURNING id, company_id
+"""
+
+NEW_SCAN = """
+INSERT INTO repo_scans (id, company_id, repo_id, status, summary, created_at, updated_at)
+VALUES (gen_random_uuid(), :company_id, :repo_id, 'QUEUED', '{}', now(), now())
+RETURNING id
+"""
+
+
+def _payload(scan_id: uuid.UUID, parts: int) -> bytes:
+    return json.dumps({
+        "scan_id": str(scan_id),
+        "summary_markdown": "# Scan\n" + "Found tooling.\n" * 50,
+        "template_parts": [
+            {
+                "title": f"Install tool {i}",
+                "description": f"Set up tool {i} for local development. " * 4,
+                "role_key": "backend",
+                "tags": ["setup", f"tool-{i}"],
+                "fields": [{"key": f"f{j}", "label": f"Field {j}", "type": "text"} for j in range(4)],
+                "validators": [{"type": "command", "run": f"tool{i} --version"}],
+            }
+            for i in range(parts)
+        ],
+    }).encode()
+
+
+def _time_parse(body: bytes, runs: int) -> None:
+    parsers = {
+        "json + validate": lambda: ScanResultPayload.model_validate(json.loads(body)),
+        "orjson + validate": lambda: ScanResultPayload.model_validate(orjson.loads(body)),
+        "validate_json": lambda: ScanResultPayload.model_validate_json(body),
+    }
+    print(f"payload            {len(body) / 1024:.0f} KiB")
+    for label, parse in parsers.items():
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            parse()
+            timings.append(time.perf_counter() - started)
+        print(f"parse {label:18} {1000 * statistics.median(timings):.2f} ms")
+
+
+async def _legacy_ingest(payload: ScanResultPayload) -> list:
+    async with AsyncSessionLocal() as db:
+        scan = (await db.execute(select(RepoScan).where(RepoScan.id == payload.scan_id))).scalar_one()
+        scan.status = ScanStatus.DONE
+        scan.summary = {"markdown": payload.summary_markdown}
+        created = []
+        for part in payload.template_parts:
+            row = TemplatePart(
+                company_id=scan.company_id, title=part.title, description=part.description,
+                role_key=part.role_key, tags=part.tags, fields=part.fields, validators=part.validators,
+            )
+            db.add(row)
+            created.append(row)
+        await db.commit()
+        await db.refresh(scan)
+        for row in created:
+            await db.refresh(row)
+        return [row.id for row in created]
+
+
+async def _new_ingest(payload: ScanResultPayload) -> list:
+    async with AsyncSessionLocal() as db:
+        ingested = await ingest_scan_result(db, payload)
+        await db.commit()
+        return ingested.part_ids
+
+
+async def main(args: argparse.Namespace) -> None:
+    _time_parse(_payload(uuid.uuid4(), args.parts), args.runs)
+    if args.parse_only:
+        return
+
+    try:
+        async with engine.begin() as conn:
+            repo_id, company_id = (await conn.execute(text(SEED), {"run": uuid.uuid4().hex[:8]})).one()
+
+        async def fresh_payload() -> ScanResultPayload:
+            async with engine.begin() as conn:
+                scan_id = (await conn.execute(text(NEW_SCAN), {"company_id": company_id, "repo_id": repo_id})).scalar_one()
+            return ScanResultPayload.model_validate(orjson.loads(_payload(scan_id, args.parts)))
+
+        for label, ingest in (("legacy", _legacy_ingest), ("bulk", _new_ingest)):
+            timings = []
+            for _ in range(args.runs):
+                payload = await fresh_payload()
+                started = time.perf_counter()
+                ids = await ingest(payload)
+                timings.append(time.perf_counter() - started)
+                assert len(ids) == args.parts
+            print(f"ingest {label:11} {1000 * statistics.median(timings):.1f} ms median")
+
+        payload = await fresh_payload()
+        first = await _new_ingest(payload)
+        started = time.perf_counter()
+        replayed = await _new_ingest(payload)
+        print(f"replay             {1000 * (time.perf_counter() - started):.1f} ms, "
+              f"same ids: {sorted(first) == sorted(replayed)}")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--parts", type=int, default=300)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--parse-only", action="store_true")
+    asyncio.run(main(parser.parse_args()))
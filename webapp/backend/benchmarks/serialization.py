@@ -0,0 +1,124 @@
+"""
+Per-request CPU for list responses: legacy encoding vs. the orjson path.
+
+Legacy is what handlers used to do: build each model with `from_orm`, call
+`.dict()`, return the envelope dict and let FastAPI run `jsonable_encoder`
+plus `json.dumps`. The new path validates the rows once with a TypeAdapter
+(`dump_models`) and renders the envelope with orjson. No database required;
+rows are synthetic stand-ins for `/onboardings/enriched` result rows.
+
+    python -m benchmarks.serialization --rows 5000
+    python -m benchmarks.serialization --rows 500 --steps 30   # full OnboardingResponse
+"""
+import argparse
+import statistics
+import time
+import warnings
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.models.onboarding import OnboardingStatus
+from app.schemas.common import dump_models, success_response
+from app.schemas.onboarding import OnboardingResponse, RecentOnboardingItem
+
+
+def _enriched_rows(n: int) -> list:
+    now = datetime.now(timezone.utc)
+    return [
+        SimpleNamespace(
+            id=uuid4(),
+            status=OnboardingStatus.ACTIVE,
+            progress=i % 100,
+            created_at=now - timedelta(days=1, seconds=i),
+            updated_at=now - timedelta(seconds=i),
+            user_name=f"Member {i}",
+            role_key="backend",
+            template_version=3,
+        )
+        for i in range(n)
+    ]
+
+
+def _onboarding_rows(n: int, steps: int) -> list:
+    now = datetime.now(timezone.utc)
+    return [
+        SimpleNamespace(
+            id=uuid4(),
+            company_id=uuid4(),
+            user_id=uuid4(),
+            template_id=uuid4(),
+            toolset_id=uuid4(),
+            status=OnboardingStatus.ACTIVE,
+            progress=40,
+            steps=[
+                {
+                    "id": f"step-{s}",
+                    "title": f"Step {s}",
+                    "description": "Clone the repository and run the setup script.",
+                    "status": "completed" if s % 3 else "pending",
+                    "started_at": now.isoformat(),
+                    "completed_at": None,
+                    "validation_result": {"status": "passed", "details": {"checks": [1, 2, 3]}},
+                }
+                for s in range(steps)
+            ],
+            created_at=now,
+            updated_at=now,
+        )
+        for _ in range(n)
+    ]
+
+
+def _legacy(schema, rows) -> bytes:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        items = [schema.from_orm(r).dict() for r in rows]
+    envelope = {"ok": True, "data": items, "next_cursor": None}
+    return JSONResponse(jsonable_encoder(envelope)).body
+
+
+def _fast(schema, rows) -> bytes:
+    return success_response(dump_models(schema, rows), next_cursor=None).body
+
+
+def _measure(fn, schema, rows, repeat: int) -> dict:
+    fn(schema, rows)  # warm-up (TypeAdapter build, imports)
+    cpu = []
+    for _ in range(repeat):
+        started = time.process_time()
+        body = fn(schema, rows)
+        cpu.append(time.process_time() - started)
+    return {
+        "cpu_ms_p50": round(statistics.median(cpu) * 1000, 2),
+        "cpu_ms_min": round(min(cpu) * 1000, 2),
+        "bytes": len(body),
+    }
+
+
+def main(rows: int, steps: int, repeat: int) -> None:
+    if steps:
+        schema, data = OnboardingResponse, _onboarding_rows(rows, steps)
+    else:
+        schema, data = RecentOnboardingItem, _enriched_rows(rows)
+
+    before = _measure(_legacy, schema, data, repeat)
+    after = _measure(_fast, schema, data, repeat)
+
+    print(f"{schema.__name__} x {rows} rows, {repeat} requests")
+    print(f"{'':8} {'cpu p50':>10} {'cpu min':>10} {'bytes':>10}")
+    for label, r in (("legacy", before), ("orjson", after)):
+        print(f"{label:8} {r['cpu_ms_p50']:>8}ms {r['cpu_ms_min']:>8}ms {r['bytes']:>10}")
+    print(f"speedup: {before['cpu_ms_p50'] / max(after['cpu_ms_p50'], 1e-6):.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--steps", type=int, default=0, help="benchmark OnboardingResponse with N steps per row")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    main(args.rows, args.steps, args.repeat)
@@ -0,0 +1,114 @@
+"""
+Contention on one onboarding: pessimistic row lock vs. optimistic version
+checks for the batch endpoint's code path.
+
+--workers concurrent sessions each submit batches of --ops random step ops
+(start/complete/validate) against the same onboarding for --seconds:
+
+* lock: SELECT ... FOR UPDATE first, then apply the batch (no retries needed)
+* occ:  run_step_batch as the endpoint does (version-checked, re-run on conflict)
+
+Reports batches/sec, latency percentiles, average attempts per batch and
+batches that ran out of retries. Reuses the tenant seeded by
+benchmarks.step_updates. Requires a migrated database in DATABASE_URL.
+
+    python -m benchmarks.step_contention --workers 16 --ops 10 --seconds 10
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from sqlalchemy import select, text
+
+from app.db.session import AsyncSessionLocal, engine
+from app.models.onboarding import OnboardingState
+from app.schemas.onboarding import StepBatchOp
+from app.services.step_transitions import ConcurrentUpdate, run_step_batch
+from benchmarks.step_updates import RESET, seed
+
+
+def _random_ops(steps: int, count: int) -> list:
+    ops = []
+    for _ in range(count):
+        kind = random.choice(("start", "complete", "validate"))
+        ops.append(StepBatchOp(
+            op=kind,
+            step_id=f"s{random.randint(1, steps)}",
+            status=random.choice(("passed", "failed")) if kind == "validate" else None,
+        ))
+    return ops
+
+
+async def _locked_batch(onboarding_id, company_id, ops) -> int:
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            select(OnboardingState.id).where(OnboardingState.id == onboarding_id).with_for_update()
+        )
+        outcome = await run_step_batch(db, onboarding_id, company_id, ops, max_retries=0)
+        return outcome.attempts
+
+
+async def _occ_batch(onboarding_id, company_id, ops) -> int:
+    async with AsyncSessionLocal() as db:
+        outcome = await run_step_batch(db, onboarding_id, company_id, ops)
+        return outcome.attempts
+
+
+async def _run(submit, onboarding_id, company_id, args) -> dict:
+    async with engine.begin() as conn:
+        await conn.execute(text(RESET), {"steps": args.steps, "onboarding_id": onboarding_id})
+
+    deadline = time.perf_counter() + args.seconds
+    latencies: list[float] = []
+    attempts: list[int] = []
+    exhausted = 0
+
+    async def worker() -> None:
+        nonlocal exhausted
+        while time.perf_counter() < deadline:
+            ops = _random_ops(args.steps, args.ops)
+            started = time.perf_counter()
+            try:
+                attempts.append(await submit(onboarding_id, company_id, ops))
+            except ConcurrentUpdate:
+                exhausted += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    begin = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.workers)))
+    elapsed = time.perf_counter() - begin
+
+    latencies_ms = sorted(l * 1000 for l in latencies) or [0.0]
+    return {
+        "batches_per_sec": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies_ms),
+        "p99_ms": latencies_ms[int(0.99 * (len(latencies_ms) - 1))],
+        "avg_attempts": statistics.mean(attempts) if attempts else 0.0,
+        "exhausted": exhausted,
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    try:
+        onboarding_id, company_id = await seed()
+        print(f"{'':6} {'batches/s':>10} {'p50':>9} {'p99':>9} {'attempts':>9} {'exhausted':>10}")
+        for label, submit in (("lock", _locked_batch), ("occ", _occ_batch)):
+            r = await _run(submit, onboarding_id, company_id, args)
+            print(
+                f"{label:6} {r['batches_per_sec']:>10.1f} {r['p50_ms']:>7.1f}ms {r['p99_ms']:>7.1f}ms "
+                f"{r['avg_attempts']:>9.2f} {r['exhausted']:>10}"
+            )
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--ops", type=int, default=10)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    asyncio.run(main(parser.parse_args()))
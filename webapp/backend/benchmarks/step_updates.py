@@ -0,0 +1,193 @@
+"""
+Step-updates/sec for one onboarding: legacy read-modify-write vs. the
+single-statement transition in app.services.step_transitions, on both
+JSONB and onboarding_steps table storage.
+
+Seeds one `*.bench.example` tenant with a single onboarding of --steps
+steps, then has --workers concurrent sessions start disjoint steps for
+--seconds. Afterwards it counts how many started steps actually persisted,
+which exposes lost updates from the legacy flow.
+
+Requires a migrated database in DATABASE_URL.
+
+    python -m benchmarks.step_updates --steps 200 --workers 8 --seconds 10
+    python -m benchmarks.index_plans --cleanup   # removes bench tenants
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from sqlalchemy import select, text
+from sqlalchemy.orm.attributes import flag_modified
+
+from app.db.session import AsyncSessionLocal, engine
+from app.models.onboarding import OnboardingState
+from app.services.step_transitions import apply_step_patch, start_patch
+
+
+SEED = """
+WITH c AS (
+    INSERT INTO companies (id, name, domain, created_at)
+    VALUES (gen_random_uuid(), 'Bench steps', CAST(:run AS text) || '-steps.bench.example', now())
+    RETURNING id
+), u AS (
+    INSERT INTO users (id, email, hashed_password, name, role, company_id, created_at)
+    SELECT gen_random_uuid(), CAST(:run AS text) || '@steps.bench.example', 'x', 'Bench', 'DEV', c.id, now() FROM c
+    RETURNING id, company_id
+), t AS (
+    INSERT INTO onboarding_templates (id, company_id, name, role_key, part_ids, status, version, created_at, updated_at)
+    SELECT gen_random_uuid(), c.id, 'Bench', 'intern', '{}', 'PUBLISHED', 1, now(), now() FROM c
+    RETURNING id, company_id
+), q AS (
+    INSERT INTO questionnaires (id, company_id, template_id, fields, answers, created_at)
+    SELECT gen_random_uuid(), t.company_id, t.id, '[]', '{}', now() FROM t
+    RETURNING id, company_id
+), ts AS (
+    INSERT INTO toolsets (id, company_id, questionnaire_id, resolved_steps, created_at)
+    SELECT gen_random_uuid(), q.company_id, q.id, '[]', now() FROM q
+    RETURNING id
+)
+INSERT INTO onboarding_states (id, company_id, user_id, template_id, toolset_id, status, progress, steps, created_at, updated_at)
+SELECT gen_random_uuid(), u.company_id, u.id, t.id, ts.id, 'ACTIVE', 0, '[]', now(), now()
+FROM u, t, ts
+RETURNING id, company_id
+"""
+
+RESET = """
+UPDATE onboarding_states
+SET progress = 0,
+    completed_steps = 0,
+    total_steps = CAST(:steps AS int),
+    step_storage = 'jsonb',
+    steps = (SELECT jsonb_agg(jsonb_build_object('id', 's' || i, 'title', 'Step ' || i, 'status', 'pending'))
+             FROM generate_series(1, CAST(:steps AS int)) i)
+WHERE id = :onboarding_id
+"""
+
+# Moves the reset onboarding to table storage
+TO_TABLE = [
+    "DELETE FROM onboarding_steps WHERE onboarding_id = :onboarding_id",
+    """
+    INSERT INTO onboarding_steps (onboarding_id, step_id, position, status)
+    SELECT :onboarding_id, 's' || i, i - 1, 'pending'
+    FROM generate_series(1, CAST(:steps AS int)) i
+    """,
+    "UPDATE onboarding_states SET step_storage = 'table' WHERE id = :onboarding_id",
+]
+
+PERSISTED = {
+    "jsonb": """
+        SELECT count(*) FROM onboarding_states o, jsonb_array_elements(o.steps) e
+        WHERE o.id = :onboarding_id AND e ->> 'status' = 'in_progress'
+    """,
+    "table": """
+        SELECT count(*) FROM onboarding_steps
+        WHERE onboarding_id = :onboarding_id AND status = 'in_progress'
+    """,
+}
+
+
+async def seed() -> tuple:
+    async with engine.begin() as conn:
+        row = (await conn.execute(text(SEED), {"run": f"b{uuid.uuid4().hex[:8]}"})).one()
+    return row.id, row.company_id
+
+
+async def _legacy_start(onboarding_id, company_id, step_id: str) -> None:
+    async with AsyncSessionLocal() as db:
+        onboarding = (await db.execute(
+            select(OnboardingState).where(
+                OnboardingState.id == onboarding_id,
+                OnboardingState.company_id == company_id,
+            )
+        )).scalar_one()
+        steps = [dict(s) for s in onboarding.steps]
+        for step in steps:
+            if step["id"] == step_id:
+                step.update(start_patch())
+                break
+        onboarding.steps = steps
+        flag_modified(onboarding, "steps")
+        await db.commit()
+        await db.refresh(onboarding)
+
+
+async def _atomic_start(onboarding_id, company_id, step_id: str) -> None:
+    async with AsyncSessionLocal() as db:
+        await apply_step_patch(db, onboarding_id, company_id, step_id, start_patch())
+        await db.commit()
+
+
+async def _run(update, storage: str, onboarding_id, company_id, steps: int, workers: int, seconds: float) -> dict:
+    params = {"steps": steps, "onboarding_id": onboarding_id}
+    async with engine.begin() as conn:
+        await conn.execute(text(RESET), params)
+        if storage == "table":
+            for statement in TO_TABLE:
+                await conn.execute(text(statement), params)
+
+    deadline = time.perf_counter() + seconds
+    started: list[set] = [set() for _ in range(workers)]
+
+    async def worker(n: int) -> None:
+        # Worker n owns steps n+1, n+1+workers, ... so no two workers touch the same step
+        owned = [f"s{i}" for i in range(n + 1, steps + 1, workers)]
+        i = 0
+        while time.perf_counter() < deadline and owned:
+            step_id = owned[i % len(owned)]
+            await update(onboarding_id, company_id, step_id)
+            started[n].add(step_id)
+            i += 1
+
+    begin = time.perf_counter()
+    counts = await asyncio.gather(*(worker(n) for n in range(workers)), return_exceptions=True)
+    elapsed = time.perf_counter() - begin
+    errors = [c for c in counts if isinstance(c, Exception)]
+
+    async with engine.connect() as conn:
+        persisted = (await conn.execute(
+            text(PERSISTED[storage]), {"onboarding_id": onboarding_id}
+        )).scalar_one()
+
+    expected = sum(len(s) for s in started)
+    return {
+        "elapsed": elapsed,
+        "expected": expected,
+        "persisted": persisted,
+        "errors": len(errors),
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    try:
+        onboarding_id, company_id = await seed()
+        print(f"{'':14} {'updates/s':>10} {'started':>8} {'persisted':>10} {'lost':>6} {'errors':>7}")
+        phases = (
+            ("legacy", "jsonb", _legacy_start),
+            ("atomic/jsonb", "jsonb", _atomic_start),
+            ("atomic/table", "table", _atomic_start),
+        )
+        for label, storage, update in phases:
+            calls = 0
+
+            async def counted(*a, _update=update):
+                nonlocal calls
+                await _update(*a)
+                calls += 1
+
+            r = await _run(counted, storage, onboarding_id, company_id, args.steps, args.workers, args.seconds)
+            print(
+                f"{label:14} {calls / r['elapsed']:>10.1f} {r['expected']:>8} {r['persisted']:>10} "
+                f"{r['expected'] - r['persisted']:>6} {r['errors']:>7}"
+            )
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    asyncio.run(main(parser.parse_args()))
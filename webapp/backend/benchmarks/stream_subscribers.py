@@ -0,0 +1,121 @@
+"""
+Load test for the SSE stream with thousands of mostly idle subscribers.
+
+In-process (default, no database): --subscribers consumers spread over
+--companies read sse_frames() from one StreamHub while --messages
+notifications are published to random companies. Reports memory per idle
+subscriber, publish cost and the time until every subscriber of a company
+has received a message.
+
+    python -m benchmarks.stream_subscribers --subscribers 5000 --companies 50
+
+Against a running server: opens --subscribers concurrent GET /api/v1/stream
+requests with a bearer token and holds them for --seconds, counting frames,
+heartbeats and failures. Raise the client's open-file limit first.
+
+    python -m benchmarks.stream_subscribers --url http://localhost:8000 --token $TOKEN \\
+        --subscribers 2000 --seconds 60
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import tracemalloc
+import uuid
+
+from app.services.stream import StreamHub, sse_frames
+
+
+async def _in_process(args: argparse.Namespace) -> None:
+    hub = StreamHub(channel="bench", replay_buffer=256, queue_size=100, max_subscribers=args.subscribers)
+    companies = [uuid.uuid4() for _ in range(args.companies)]
+    received: dict = {}
+
+    async def consume(company_id):
+        async for frame in sse_frames(hub, company_id, None):
+            if frame.startswith(b"id: "):
+                stamp = received.setdefault(frame.split(b"\n", 1)[0], [])
+                stamp.append(time.perf_counter())
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tasks = [asyncio.create_task(consume(companies[i % len(companies)])) for i in range(args.subscribers)]
+    await asyncio.sleep(0.5)  # let every consumer subscribe and park on its queue
+    idle_bytes = (tracemalloc.get_traced_memory()[0] - before) / args.subscribers
+    tracemalloc.stop()
+
+    publish_times = []
+    fanout_ms = []
+    for n in range(args.messages):
+        company_id = random.choice(companies)
+        started = time.perf_counter()
+        hub.publish(company_id, "onboarding", {"id": str(uuid.uuid4()), "progress": n % 100})
+        publish_times.append(time.perf_counter() - started)
+        await asyncio.sleep(args.interval)
+        frame_id = f"id: {hub.hub_id}-{hub._sequence}".encode()
+        stamps = received.get(frame_id, [])
+        if stamps:
+            fanout_ms.append(1000 * (max(stamps) - started))
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    per_company = args.subscribers / args.companies
+    print(f"subscribers        {args.subscribers} ({per_company:.0f} per company)")
+    print(f"idle memory        {idle_bytes / 1024:.1f} KiB per subscriber")
+    print(f"publish            {1e6 * statistics.median(publish_times):.1f} us median")
+    if fanout_ms:
+        fanout_ms.sort()
+        print(f"fanout complete    {statistics.median(fanout_ms):.2f} ms p50, "
+              f"{fanout_ms[int(0.99 * (len(fanout_ms) - 1))]:.2f} ms p99")
+    print(f"hub                {hub.stats()}")
+
+
+async def _over_http(args: argparse.Namespace) -> None:
+    import httpx
+
+    counters = {"connected": 0, "frames": 0, "heartbeats": 0, "failed": 0}
+    deadline = time.perf_counter() + args.seconds
+    limits = httpx.Limits(max_connections=args.subscribers, max_keepalive_connections=0)
+
+    async def subscriber(client: httpx.AsyncClient) -> None:
+        try:
+            async with client.stream(
+                "GET", f"{args.url}/api/v1/stream", headers={"Authorization": f"Bearer {args.token}"}
+            ) as response:
+                if response.status_code != 200:
+                    counters["failed"] += 1
+                    return
+                counters["connected"] += 1
+                async for chunk in response.aiter_bytes():
+                    counters["heartbeats"] += chunk.count(b": ping")
+                    counters["frames"] += chunk.count(b"event: ")
+                    if time.perf_counter() >= deadline:
+                        return
+        except httpx.HTTPError:
+            counters["failed"] += 1
+
+    async with httpx.AsyncClient(timeout=httpx.Timeout(None, connect=30.0), limits=limits) as client:
+        tasks = [asyncio.create_task(subscriber(client)) for _ in range(args.subscribers)]
+        while time.perf_counter() < deadline:
+            await asyncio.sleep(5)
+            print(counters)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    print(counters)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subscribers", type=int, default=5000)
+    parser.add_argument("--companies", type=int, default=50)
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--interval", type=float, default=0.01, help="seconds between published messages")
+    parser.add_argument("--url")
+    parser.add_argument("--token")
+    parser.add_argument("--seconds", type=float, default=60.0)
+    args = parser.parse_args()
+    asyncio.run(_over_http(args) if args.url else _in_process(args))
@@ -0,0 +1,111 @@
+"""
+Move existing onboardings between step storage backends.
+
+ONBOARDING_STEP_STORAGE only picks the backend for new onboardings; this
+moves the ones that already exist, in batches, each in its own transaction:
+
+    python migrate_step_storage.py table   # JSONB -> onboarding_steps rows
+    python migrate_step_storage.py jsonb   # and back
+
+Each batch locks its onboardings first, so step transitions running at the
+same time wait for the move instead of writing to the old backend.
+"""
+import argparse
+import asyncio
+
+from sqlalchemy import text
+
+from app.db.session import AsyncSessionLocal, engine
+
+
+LOCK_BATCH = text("""
+    SELECT id FROM onboarding_states
+    WHERE step_storage = :source
+    ORDER BY id
+    LIMIT :batch_size
+    FOR UPDATE
+""")
+
+# The first occurrence wins for duplicate step ids; steps without an id stay
+# in the JSONB definitions only. Timestamps that are not ISO datetimes (early
+# builds wrote UUIDs there) are dropped.
+COPY_TO_TABLE = text("""
+    INSERT INTO onboarding_steps (onboarding_id, step_id, position, status, started_at, completed_at, validation_result)
+    SELECT DISTINCT ON (o.id, e.value ->> 'id')
+           o.id,
+           e.value ->> 'id',
+           (e.ord - 1)::int,
+           COALESCE(e.value ->> 'status', 'pending'),
+           CASE WHEN e.value ->> 'started_at' ~ '^\\d{4}-\\d{2}-\\d{2}' THEN (e.value ->> 'started_at')::timestamp END,
+           CASE WHEN e.value ->> 'completed_at' ~ '^\\d{4}-\\d{2}-\\d{2}' THEN (e.value ->> 'completed_at')::timestamp END,
+           e.value -> 'validation_result'
+    FROM onboarding_states o,
+         jsonb_array_elements(COALESCE(o.steps, '[]'::jsonb)) WITH ORDINALITY AS e(value, ord)
+    WHERE o.id = ANY(:ids) AND e.value ->> 'id' IS NOT NULL
+    ORDER BY o.id, e.value ->> 'id', e.ord
+    ON CONFLICT DO NOTHING
+""")
+
+FLIP_TO_TABLE = text("""
+    UPDATE onboarding_states o
+    SET step_storage = 'table',
+        completed_steps = (
+            SELECT count(*) FROM onboarding_steps s
+            WHERE s.onboarding_id = o.id AND s.status = 'completed'
+        )
+    WHERE o.id = ANY(:ids)
+""")
+
+FOLD_TO_JSONB = text("""
+    UPDATE onboarding_states o
+    SET step_storage = 'jsonb',
+        steps = COALESCE((
+            SELECT jsonb_agg(
+                CASE WHEN s.step_id IS NULL THEN e.value
+                ELSE e.value || jsonb_build_object(
+                    'status', s.status,
+                    'started_at', s.started_at,
+                    'completed_at', s.completed_at,
+                    'validation_result', s.validation_result
+                ) END
+                ORDER BY e.ord
+            )
+            FROM jsonb_array_elements(o.steps) WITH ORDINALITY AS e(value, ord)
+            LEFT JOIN onboarding_steps s
+              ON s.onboarding_id = o.id AND s.step_id = e.value ->> 'id'
+        ), o.steps)
+    WHERE o.id = ANY(:ids)
+""")
+
+DELETE_ROWS = text("DELETE FROM onboarding_steps WHERE onboarding_id = ANY(:ids)")
+
+
+async def move(target: str, batch_size: int) -> int:
+    source = "jsonb" if target == "table" else "table"
+    statements = [COPY_TO_TABLE, FLIP_TO_TABLE] if target == "table" else [FOLD_TO_JSONB, DELETE_ROWS]
+    moved = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            ids = list((await db.execute(LOCK_BATCH, {"source": source, "batch_size": batch_size})).scalars())
+            if not ids:
+                return moved
+            for statement in statements:
+                await db.execute(statement, {"ids": ids})
+            await db.commit()
+        moved += len(ids)
+        print(f"Moved {moved} onboardings to {target} storage")
+
+
+async def main(args: argparse.Namespace) -> None:
+    try:
+        moved = await move(args.target, args.batch_size)
+        print(f"✅ {moved} onboardings now use {args.target} storage")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("target", choices=["table", "jsonb"])
+    parser.add_argument("--batch-size", type=int, default=500)
+    asyncio.run(main(parser.parse_args()))
@@ -10,7 +10,8 @@ from app.models.template import TemplatePart, OnboardingTemplate, TemplateStatus
 from app.models.questionnaire import Questionnaire, ToolSet
 from app.models.repo import Repo, RepoScan, RepoProvider, ScanStatus
 from app.models.onboarding import OnboardingState, OnboardingStatus
-from app.core.security import hash_password
+from app.services.onboarding_steps import init_steps
+from app.services.password_service import password_service
 
 
 async def seed_database():
@@ -37,7 +38,7 @@ async def seed_database():
             admin_user = User(
                 id=uuid.uuid4(),
                 email="admin@acme.io",
-                hashed_password=hash_password("admin123"),
+                hashed_password=await password_service.hash("admin123"),
                 name="Admin User",
                 role=UserRole.ADMIN,
                 company_id=company.id,
@@ -53,16 +54,27 @@ async def seed_database():
             {"email": "charlie.wilson@acme.io", "name": "Charlie Wilson", "password": "dev123"},
         ]
 
+        # One lookup for all devs, then hash the missing ones in parallel
+        existing_devs = {
+            u.email: u
+            for u in (
+                await db.execute(select(User).where(User.email.in_([d["email"] for d in fake_devs])))
+            ).scalars().all()
+        }
+        missing_devs = [d for d in fake_devs if d["email"] not in existing_devs]
+        dev_hashes = dict(zip(
+            [d["email"] for d in missing_devs],
+            await password_service.hash_many([d["password"] for d in missing_devs]),
+        ))
+
         created_devs = []
         for fake_dev in fake_devs:
-            existing_user = (
-                await db.execute(select(User).where(User.email == fake_dev["email"]))
-            ).scalar_one_or_none()
+            existing_user = existing_devs.get(fake_dev["email"])
             if not existing_user:
                 user = User(
                     id=uuid.uuid4(),
                     email=fake_dev["email"],
-                    hashed_password=hash_password(fake_dev["password"]),
+                    hashed_password=dev_hashes[fake_dev["email"]],
                     name=fake_dev["name"],
                     role=UserRole.DEV,
                     company_id=company.id,
@@ -82,7 +94,7 @@ async def seed_database():
             intern_demo = User(
                 id=uuid.uuid4(),
                 email="intern.demo@acme.io",
-                hashed_password=hash_password("demo123"),
+                hashed_password=await password_service.hash("demo123"),
                 name="Intern Demo",
                 role=UserRole.DEV,
                 company_id=company.id,
@@ -206,7 +218,6 @@ async def seed_database():
                         {"id": f"step-2-{idx}", "title": "CLI Tools", "status": "completed"},
                         {"id": f"step-3-{idx}", "title": "Final Setup", "status": "in_progress"},
                     ]
-                    progress = 66
                     status = OnboardingStatus.ACTIVE
                 elif idx == 1:
                     # Bob: just started
@@ -215,7 +226,6 @@ async def seed_database():
                         {"id": f"step-2-{idx}", "title": "CLI Tools", "status": "not_started"},
                         {"id": f"step-3-{idx}", "title": "Final Setup", "status": "not_started"},
                     ]
-                    progress = 0
                     status = OnboardingStatus.ACTIVE
                 else:
                     # Charlie: halfway through
@@ -224,7 +234,6 @@ async def seed_database():
                         {"id": f"step-2-{idx}", "title": "CLI Tools", "status": "in_progress"},
                         {"id": f"step-3-{idx}", "title": "Final Setup", "status": "not_started"},
                     ]
-                    progress = 33
                     status = OnboardingStatus.ACTIVE
 
                 onboarding = OnboardingState(
@@ -234,10 +243,9 @@ async def seed_database():
                     template_id=template.id,
                     toolset_id=toolset.id,
                     status=status,
-                    progress=progress,
-                    steps=steps,
                 )
                 db.add(onboarding)
+                db.add_all(init_steps(onboarding, steps))
                 created_onboardings += 1
 
         # Ensure at least one repository
@@ -353,4 +361,7 @@ async def seed_database():
 
 
 if __name__ == "__main__":
-    asyncio.run(seed_database())
+    try:
+        asyncio.run(seed_database())
+    finally:
+        password_service.shutdown()
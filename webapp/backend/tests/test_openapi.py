@@ -0,0 +1,18 @@
+import json
+
+from app.main import app
+from app.schemas.repo import ScanResultPayload
+
+
+def test_scan_result_body_is_documented():
+    paths = app.openapi()["paths"]
+    operation = next(item["post"] for path, item in paths.items() if path.endswith("/repos/scanresult"))
+
+    body = operation["requestBody"]
+    schema = body["content"]["application/json"]["schema"]
+    assert body["required"] is True
+    assert schema["title"] == "ScanResultPayload"
+    assert set(schema["required"]) == set(ScanResultPayload.model_json_schema()["required"])
+    # Nested template parts are inlined, not left as dangling $defs references
+    assert schema["properties"]["template_parts"]["items"]["title"] == "TemplatePartData"
+    assert "$ref" not in json.dumps(schema)
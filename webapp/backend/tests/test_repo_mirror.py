@@ -0,0 +1,143 @@
+import asyncio
+import os
+import subprocess
+
+import pytest
+
+from app.services.repo_mirror import FileLock, MirrorKey, RepoMirror
+
+
+def _git(*args: str) -> str:
+    return subprocess.run(["git", *args], check=True, capture_output=True, text=True).stdout.strip()
+
+
+def _commit(src: str, path: str, content: str) -> str:
+    os.makedirs(os.path.dirname(os.path.join(src, path)) or src, exist_ok=True)
+    with open(os.path.join(src, path), "w") as f:
+        f.write(content)
+    _git("-C", src, "add", "-A")
+    _git("-C", src, "-c", "user.name=test", "-c", "user.email=test@example.com", "commit", "-q", "-m", path)
+    return _git("-C", src, "rev-parse", "HEAD")
+
+
+@pytest.fixture
+def source(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    _git("init", "-q", "-b", "main", str(src))
+    _commit(str(src), "requirements.txt", "fastapi==0.115.0\n")
+    return str(src)
+
+
+@pytest.fixture
+def mirror(tmp_path):
+    return RepoMirror(str(tmp_path / "cache"), max_bytes=10 ** 12, git_timeout=60)
+
+
+KEY = MirrorKey("github", "acme", "api")
+
+
+@pytest.mark.asyncio
+async def test_clone_then_fetch_sees_new_commits(mirror, source):
+    url = f"file://{source}"
+    async with mirror.session(KEY, url) as session:
+        first = await session.resolve("main")
+    assert (mirror.clones, mirror.fetches) == (1, 0)
+
+    second = _commit(source, "README.md", "hello\n")
+    async with mirror.session(KEY, url) as session:
+        assert await session.resolve("main") == second
+    assert (mirror.clones, mirror.fetches) == (1, 1)
+    assert first != second
+    assert os.path.isdir(mirror.mirror_path(KEY))
+
+
+@pytest.mark.asyncio
+async def test_concurrent_sessions_share_one_fetch(mirror, source):
+    url = f"file://{source}"
+    async with mirror.session(KEY, url):
+        pass
+
+    async def use() -> str:
+        async with mirror.session(KEY, url) as session:
+            return await session.resolve("main")
+
+    heads = await asyncio.gather(use(), use())
+    assert heads[0] == heads[1]
+    assert mirror.fetches == 1
+    assert mirror.shared_fetches == 1
+
+
+@pytest.mark.asyncio
+async def test_worktree_is_checked_out_and_removed(mirror, source):
+    _commit(source, "src/app.py", "x = 1\n")
+    async with mirror.session(KEY, f"file://{source}") as session:
+        commit = await session.resolve("main")
+        async with session.worktree(commit) as full:
+            assert os.path.isfile(os.path.join(full, "src", "app.py"))
+        async with session.worktree(commit, sparse=["requirements.txt"]) as sparse:
+            assert os.path.isfile(os.path.join(sparse, "requirements.txt"))
+            assert not os.path.exists(os.path.join(sparse, "src", "app.py"))
+
+    assert not os.path.exists(full)
+    assert not os.path.exists(sparse)
+    assert os.listdir(os.path.join(mirror.root, "worktrees")) == []
+    # Unregistered from the mirror as well: only the bare repository is left
+    listing = _git("-C", mirror.mirror_path(KEY), "worktree", "list", "--porcelain")
+    assert [line for line in listing.splitlines() if line.startswith("worktree ")] == [
+        f"worktree {mirror.mirror_path(KEY)}"
+    ]
+
+
+@pytest.mark.asyncio
+async def test_eviction_skips_mirrors_in_use(mirror, source):
+    other = MirrorKey("github", "acme", "web")
+    url = f"file://{source}"
+    async with mirror.session(other, url):
+        pass
+    async with mirror.session(KEY, url):
+        mirror.max_bytes = 0
+        # KEY is held by this session; only the idle mirror can go
+        assert mirror.evict() == 1
+        assert os.path.isdir(mirror.mirror_path(KEY))
+        assert not os.path.exists(mirror.mirror_path(other))
+
+
+@pytest.mark.asyncio
+async def test_eviction_skips_mirrors_locked_by_another_process(mirror, source):
+    async with mirror.session(KEY, f"file://{source}"):
+        pass
+    mirror.max_bytes = 0
+    path = mirror.mirror_path(KEY)
+    # Another process holding its shared use lock
+    other_process = FileLock(f"{path}.use.lock", shared=True)
+    assert other_process.try_acquire()
+    try:
+        assert mirror.evict() == 0
+        assert os.path.isdir(path)
+    finally:
+        other_process.release()
+    assert mirror.evict() == 1
+    assert not os.path.exists(path)
+
+
+@pytest.mark.asyncio
+async def test_eviction_thread_leaves_shared_state_to_the_loop(mirror, source):
+    other = MirrorKey("github", "acme", "web")
+    url = f"file://{source}"
+    async with mirror.session(other, url):
+        pass
+    async with mirror.session(KEY, url):
+        mirror.max_bytes = 0
+        sizes_before = dict(mirror._sizes)
+
+        measured, evicted = await asyncio.to_thread(mirror._evict, dict(mirror._sizes), set(mirror._in_use))
+
+        # The worker thread deleted the idle mirror but left _sizes alone
+        assert [path for path, _ in evicted] == [mirror.mirror_path(other)]
+        assert mirror._sizes == sizes_before
+        mirror._apply_eviction(measured, evicted)
+
+    stats = mirror.stats()
+    assert (stats["mirrors"], stats["evictions"]) == (1, 1)
+    assert stats["bytes"] == mirror._sizes[mirror.mirror_path(KEY)]
@@ -0,0 +1,235 @@
+import json
+
+import pytest
+
+from app.core.config import settings
+from app.services.repo_scanner import (
+    IgnoreRules, cacheable, manifest_kind, parse_gitignore, parse_manifest, walk_repository,
+)
+
+
+def _rules(*gitignores):
+    """IgnoreRules for (base, text) pairs, outermost directory first."""
+    rules = IgnoreRules([])
+    for base, text in gitignores:
+        rules = rules.extend(parse_gitignore(text, base))
+    return rules
+
+
+@pytest.mark.parametrize("gitignore, path, is_dir, ignored", [
+    # Unanchored patterns match at any depth
+    ("*.pyc", "x.pyc", False, True),
+    ("*.pyc", "a/b/x.pyc", False, True),
+    ("*.pyc", "a/x.py", False, False),
+    ("node_modules", "pkg/node_modules", True, True),
+    # A leading or inner slash anchors to the .gitignore's directory
+    ("/build", "build", True, True),
+    ("/build", "src/build", True, False),
+    ("doc/*.txt", "doc/a.txt", False, True),
+    ("doc/*.txt", "x/doc/a.txt", False, False),
+    ("doc/*.txt", "doc/sub/a.txt", False, False),
+    # Trailing slash: directories only
+    ("build/", "a/build", True, True),
+    ("build/", "a/build", False, False),
+    # ** wildcards
+    ("**/logs", "a/b/logs", True, True),
+    ("logs/**", "logs/a/b.txt", False, True),
+    ("a/**/b", "a/b", False, True),
+    ("a/**/b", "a/x/y/b", False, True),
+    ("a/**/b", "c/a/b", False, False),
+    # ? and character classes
+    ("?.md", "a.md", False, True),
+    ("?.md", "ab.md", False, False),
+    ("[abc].txt", "b.txt", False, True),
+    ("[abc].txt", "d.txt", False, False),
+    ("[!abc].txt", "d.txt", False, True),
+    # Comments, blank lines and escapes
+    ("# comment\n\n", "# comment", False, False),
+    ("\\#notes", "#notes", False, True),
+    ("\\!important", "!important", False, True),
+])
+def test_gitignore_patterns(gitignore, path, is_dir, ignored):
+    assert _rules(("", gitignore)).match(path, is_dir) is ignored
+
+
+@pytest.mark.parametrize("gitignore, path, ignored", [
+    ("*.log\n!keep.log", "a.log", True),
+    ("*.log\n!keep.log", "keep.log", False),
+    ("*.log\n!keep.log", "dir/keep.log", False),
+    # The last matching rule wins
+    ("!keep.log\n*.log", "keep.log", True),
+    ("*.log\n!keep.log\nkeep.log", "keep.log", True),
+])
+def test_gitignore_negation(gitignore, path, ignored):
+    assert _rules(("", gitignore)).match(path, False) is ignored
+
+
+@pytest.mark.parametrize("gitignores, path, is_dir, ignored", [
+    # Patterns of a nested .gitignore are relative to its directory
+    ([("pkg", "/dist")], "pkg/dist", True, True),
+    ([("pkg", "/dist")], "dist", True, False),
+    ([("pkg", "/dist")], "other/pkg/dist", True, False),
+    ([("pkg", "*.tmp")], "pkg/a/x.tmp", False, True),
+    ([("pkg", "*.tmp")], "x.tmp", False, False),
+    # ...and can re-include what an outer one ignores
+    ([("", "*.log"), ("pkg", "!important.log")], "pkg/important.log", False, False),
+    ([("", "*.log"), ("pkg", "!important.log")], "important.log", False, True),
+    ([("", "*.log"), ("pkg", "!important.log")], "pkg/other.log", False, True),
+])
+def test_nested_gitignore(gitignores, path, is_dir, ignored):
+    assert _rules(*gitignores).match(path, is_dir) is ignored
+
+
+def test_walk_repository_applies_nested_gitignores(tmp_path):
+    files = {
+        ".gitignore": "node_modules/\n*.pyc\n",
+        "app/main.py": "",
+        "app/main.pyc": "",
+        "node_modules/left-pad/package.json": "{}",
+        "pkg/.gitignore": "/dist\n!keep.pyc\n",
+        "pkg/keep.pyc": "",
+        "pkg/dist/bundle.js": "",
+        "pkg/src/dist/page.js": "",
+        ".git/HEAD": "ref: refs/heads/main\n",
+    }
+    for path, content in files.items():
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_text(content)
+
+    assert [path for path, _ in walk_repository(str(tmp_path))] == [
+        ".gitignore",
+        "app/main.py",
+        "pkg/.gitignore",
+        "pkg/keep.pyc",
+        "pkg/src/dist/page.js",
+    ]
+
+
+@pytest.mark.parametrize("name, kind", [
+    ("pyproject.toml", "pyproject"),
+    ("package.json", "package_json"),
+    ("go.mod", "go_mod"),
+    ("Cargo.toml", "cargo"),
+    ("GNUmakefile", "makefile"),
+    ("requirements.txt", "requirements"),
+    ("requirements-dev.in", "requirements"),
+    ("requirements.lock", None),
+    ("package-lock.json", None),
+])
+def test_manifest_kind(name, kind):
+    assert manifest_kind(name) == kind
+
+
+PYPROJECT = """
+[project]
+dependencies = ["FastAPI>=0.110", "pydantic_settings"]
+
+[project.optional-dependencies]
+test = ["pytest"]
+
+[tool.poetry.dependencies]
+python = "^3.11"
+Requests = "*"
+"""
+
+CARGO = """
+[dependencies]
+serde = "1"
+
+[dev-dependencies]
+tokio = { version = "1", features = ["full"] }
+
+[target.'cfg(unix)'.dependencies]
+libc = "0.2"
+"""
+
+GO_MOD = """module example.com/svc
+
+go 1.22
+
+require github.com/pkg/errors v0.9.1
+
+require (
+\tgolang.org/x/sync v0.7.0
+\tgithub.com/stretchr/testify v1.9.0 // indirect
+)
+"""
+
+
+@pytest.mark.parametrize("kind, text, expected", [
+    (
+        "requirements",
+        "Django>=4.2\nrequests[socks]==2.32 # http\n-r base.txt\ngit+https://example.com/x.git\n# c\nzope_interface\n",
+        {"package_managers": ["pip"], "dependencies": ["python:django", "python:requests", "python:zope-interface"]},
+    ),
+    (
+        "pyproject",
+        PYPROJECT,
+        {"package_managers": ["poetry"],
+         "dependencies": ["python:fastapi", "python:pydantic-settings", "python:pytest", "python:requests"]},
+    ),
+    (
+        "package_json",
+        json.dumps({"dependencies": {"react": "^18"}, "devDependencies": {"vite": "^5"}, "packageManager": "pnpm@8.15.0"}),
+        {"package_managers": ["pnpm"], "dependencies": ["node:react", "node:vite"]},
+    ),
+    (
+        "go_mod",
+        GO_MOD,
+        {"package_managers": ["go"],
+         "dependencies": ["go:github.com/pkg/errors", "go:github.com/stretchr/testify", "go:golang.org/x/sync"]},
+    ),
+    (
+        "cargo",
+        CARGO,
+        {"package_managers": ["cargo"], "dependencies": ["rust:libc", "rust:serde", "rust:tokio"]},
+    ),
+    (
+        "makefile",
+        ".PHONY: test\nCC := gcc\nbuild: deps\n\t$(CC) main.c\ntest:: build\n\ttrue\n",
+        {"package_managers": ["make"], "make_targets": ["build", "test"]},
+    ),
+])
+def test_parse_manifest(tmp_path, kind, text, expected):
+    path = tmp_path / "manifest"
+    path.write_text(text)
+
+    result = parse_manifest(str(path), kind)
+
+    assert {key: sorted(value) for key, value in result.items()} == expected
+
+
+@pytest.mark.parametrize("kind, text, error", [
+    ("pyproject", "[project\ndependencies = [", "TOMLDecodeError"),
+    ("cargo", "[dependencies]\nserde = ", "TOMLDecodeError"),
+    ("package_json", '{"dependencies": ', "JSONDecodeError"),
+    ("package_json", "[1, 2]", "AttributeError"),
+])
+def test_parse_manifest_malformed(tmp_path, kind, text, error):
+    path = tmp_path / "manifest"
+    path.write_text(text)
+
+    result = parse_manifest(str(path), kind)
+
+    assert list(result) == ["error"]
+    assert result["error"].startswith(error)
+    # Deterministic for the blob, so the scan cache may keep it
+    assert cacheable(result)
+
+
+def test_parse_manifest_too_large(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "SCANNER_MAX_MANIFEST_BYTES", 10)
+    path = tmp_path / "package.json"
+    path.write_text(json.dumps({"dependencies": {"react": "^18"}}))
+
+    result = parse_manifest(str(path), "package_json")
+
+    assert result == {"error": "too large"}
+    assert cacheable(result)
+
+
+def test_parse_manifest_unreadable_file_is_not_cacheable(tmp_path):
+    result = parse_manifest(str(tmp_path / "gone.toml"), "cargo")
+
+    assert result["error"].startswith("FileNotFoundError")
+    assert not cacheable(result)
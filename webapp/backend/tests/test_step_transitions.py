@@ -0,0 +1,41 @@
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from app.services.step_transitions import _transition_events
+
+
+COMPANY_ID = uuid.uuid4()
+ONBOARDING_ID = uuid.uuid4()
+NOW = datetime(2025, 10, 1, 12, 0, 0)
+
+
+def _row(status, previous_status, delta):
+    # Shaped like a row of the transition statements, whose statuses are enum labels
+    return SimpleNamespace(
+        status=status,
+        previous_status=previous_status,
+        delta=delta,
+        created_at=NOW - timedelta(days=2),
+        step={"id": "s3", "started_at": (NOW - timedelta(hours=1)).isoformat(), "completed_at": NOW.isoformat()},
+    )
+
+
+def test_completing_last_step_emits_onboarding_completed():
+    events = _transition_events(COMPANY_ID, ONBOARDING_ID, _row("COMPLETED", "ACTIVE", 1), NOW)
+
+    assert [e["action"] for e in events] == ["step_completed", "onboarding_completed"]
+    assert events[0]["payload"] == {"step_id": "s3", "dwell_seconds": 3600.0}
+    assert events[1]["payload"] == {"seconds": 2 * 24 * 3600.0}
+
+
+def test_completing_other_step_emits_only_step_completed():
+    events = _transition_events(COMPANY_ID, ONBOARDING_ID, _row("ACTIVE", "ACTIVE", 1), NOW)
+
+    assert [e["action"] for e in events] == ["step_completed"]
+
+
+def test_already_completed_onboarding_is_not_completed_again():
+    events = _transition_events(COMPANY_ID, ONBOARDING_ID, _row("COMPLETED", "COMPLETED", 0), NOW)
+
+    assert events == []
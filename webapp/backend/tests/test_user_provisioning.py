@@ -0,0 +1,34 @@
+import uuid
+
+import pytest
+
+from app.services.user_provisioning import provision_users
+
+
+class _Session:
+    """Enough of an AsyncSession for batches that never reach the database."""
+
+    def __init__(self):
+        self.commits = 0
+
+    async def commit(self):
+        self.commits += 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("email, echoed", [
+    (123, None),
+    (["a@example.com"], None),
+    (None, None),
+    ("not-an-email", "not-an-email"),
+])
+async def test_invalid_rows_are_reported_per_row(email, echoed):
+    records = [
+        (1, {"email": email, "name": "A", "password": "secret123", "role": "dev"}),
+        (2, "Each line must be a JSON object"),
+    ]
+
+    results = await provision_users(_Session(), uuid.uuid4(), records)
+
+    assert [(r.row, r.status, r.email) for r in results] == [(1, "invalid", echoed), (2, "invalid", None)]
+    assert results[0].error.startswith("email")